@@ -36,7 +36,8 @@ CREATE TABLE IF NOT EXISTS books (
   INDEX idx_title (title),
   INDEX idx_author (author),
   INDEX idx_category (category),
-  INDEX idx_isbn (isbn)
+  INDEX idx_isbn (isbn),
+  INDEX idx_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Loans table
@@ -54,7 +55,10 @@ CREATE TABLE IF NOT EXISTS loans (
   FOREIGN KEY (book_id) REFERENCES books(id) ON DELETE CASCADE,
   INDEX idx_user_id (user_id),
   INDEX idx_book_id (book_id),
-  INDEX idx_status (status)
+  INDEX idx_status (status),
+  INDEX idx_loan_date_status (loan_date, status, due_date),
+  INDEX idx_status_due_date (status, due_date),
+  INDEX idx_book_loan_date (book_id, loan_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Holds table
@@ -75,7 +79,8 @@ CREATE TABLE IF NOT EXISTS holds (
   INDEX idx_user_id (user_id),
   INDEX idx_book_id (book_id),
   INDEX idx_status (status),
-  INDEX idx_expiry_datetime (expiry_datetime)
+  INDEX idx_expiry_datetime (expiry_datetime),
+  INDEX idx_status_hold_date (status, hold_date)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Fines table
@@ -95,6 +100,40 @@ CREATE TABLE IF NOT EXISTS fines (
   FOREIGN KEY (loan_id) REFERENCES loans(id) ON DELETE SET NULL,
   INDEX idx_user_id (user_id),
   INDEX idx_status (status),
-  INDEX idx_type (type)
+  INDEX idx_type (type),
+  INDEX idx_status_created (status, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Book search index (filled by scripts/build_search_index.py)
+CREATE TABLE IF NOT EXISTS book_search_terms (
+  kind ENUM('trigram', 'phonetic') NOT NULL,
+  term VARCHAR(4) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+  book_id INT NOT NULL,
+  PRIMARY KEY (kind, term, book_id),
+  INDEX idx_book_id (book_id),
+  FOREIGN KEY (book_id) REFERENCES books(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS search_index_state (
+  name VARCHAR(50) PRIMARY KEY,
+  value VARCHAR(255) NOT NULL
+) ENGINE=InnoDB;
+
+-- "Patrons who borrowed this also borrowed" lists, maintained by
+-- scripts/build_recommendations.py
+CREATE TABLE IF NOT EXISTS book_recommendations (
+  book_id INT NOT NULL,
+  position TINYINT UNSIGNED NOT NULL,
+  recommended_book_id INT NOT NULL,
+  score FLOAT NOT NULL,
+  co_borrowers INT NOT NULL,
+  computed_at TIMESTAMP NOT NULL,
+  PRIMARY KEY (book_id, position),
+  FOREIGN KEY (book_id) REFERENCES books(id) ON DELETE CASCADE,
+  FOREIGN KEY (recommended_book_id) REFERENCES books(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE IF NOT EXISTS recommendation_state (
+  name VARCHAR(50) PRIMARY KEY,
+  value VARCHAR(255) NOT NULL
+) ENGINE=InnoDB;
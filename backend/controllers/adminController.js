@@ -1,4 +1,7 @@
 const pool = require('../config/database');
+const reportJobService = require('../services/reportJobService');
+const statsSnapshotService = require('../services/statsSnapshotService');
+const batchJobService = require('../services/batchJobService');
 
 // Get user details with all their loans, holds, and fines
 exports.getUserWithHistory = async (req, res) => {
@@ -306,115 +309,153 @@ exports.getAdminHistory = async (req, res) => {
   }
 };
 
-// Generate PDF report with system statistics
-exports.generateReport = async (req, res) => {
-  const { spawn } = require('child_process');
-  const path = require('path');
-  const fs = require('fs');
-  const os = require('os');
+// Optional ?from=YYYY-MM-DD&to=YYYY-MM-DD&category=... report scope; returns
+// { error } when the dates are malformed
+const parseReportScope = ({ from, to, category, appendix, analytics }) => {
+  const datePattern = /^\d{4}-\d{2}-\d{2}$/;
+  if ((from && !datePattern.test(from)) || (to && !datePattern.test(to))) {
+    return { error: 'from and to must be dates in YYYY-MM-DD format' };
+  }
+  if (from && to && from > to) {
+    return { error: 'from must not be after to' };
+  }
+  return {
+    scope: {
+      from: from || null,
+      to: to || null,
+      category: category || null,
+      appendix: appendix === true || appendix === 'true' || appendix === '1',
+      analytics: analytics === true || analytics === 'true' || analytics === '1'
+    }
+  };
+};
+
+const sendReportPdf = (res, pdf, createdAt) => {
+  // Generate filename with timestamp
+  const timestamp = createdAt.toISOString().replace(/[:.]/g, '-').slice(0, -5);
+  const filename = `library-report-${timestamp}.pdf`;
+
+  // Send PDF
+  res.setHeader('Content-Type', 'application/pdf');
+  res.setHeader('Content-Length', pdf.length);
+  res.setHeader('Content-Disposition', `attachment; filename="${filename}"`);
+  res.end(pdf);
+};
+
+// Publish a new statistics snapshot in the background; a run already in
+// progress is joined rather than repeated
+const refreshStatsInBackground = () => {
+  batchJobService.runJob('statsSnapshot').catch((error) => {
+    console.error('Statistics snapshot refresh failed:', error.message);
+  });
+};
 
+// Dashboard KPIs from the published statistics snapshot; reads a file, never
+// the loans/books tables. A stale snapshot is still served (flagged as
+// stale) while a fresh one is published.
+exports.getDashboardStats = async (req, res) => {
   try {
-    // Create temporary directory for report generation
-    const tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'library-report-'));
-    const pythonScript = path.join(__dirname, '../scripts/generate_report.py');
-    
-    // Check if Python script exists
-    if (!fs.existsSync(pythonScript)) {
-      return res.status(500).json({ error: 'Report generation script not found' });
+    const snapshot = await statsSnapshotService.read();
+    if (!snapshot) {
+      refreshStatsInBackground();
+      return res.status(503).json({ error: 'Statistics have not been published yet; try again shortly' });
     }
 
-    const isWindows = process.platform === 'win32';
-    let command, args;
-    
-    if (isWindows) {
-      command = `py -3.13 "${pythonScript}" "${tempDir}"`;
-      args = [];
-    } else {
-      command = 'python3';
-      args = [pythonScript, tempDir];
+    const stats = statsSnapshotService.describe(snapshot);
+    if (stats.stale) {
+      refreshStatsInBackground();
     }
-    
-    // Spawn Python process
-    const pythonProcess = spawn(command, args, {
-      env: {
-        ...process.env,
-        DB_HOST: process.env.DB_HOST || 'localhost',
-        DB_USER: process.env.DB_USER || 'root',
-        DB_PASSWORD: process.env.DB_PASSWORD || 'root',
-        DB_NAME: process.env.DB_NAME || 'library_system'
-      },
-      shell: isWindows // Use shell on Windows for better compatibility
-    });
+    res.json(stats);
+  } catch (error) {
+    console.error('Get dashboard stats error:', error);
+    res.status(500).json({ error: 'Failed to fetch dashboard statistics: ' + error.message });
+  }
+};
 
-    let stdout = '';
-    let stderr = '';
+// Publish a fresh statistics snapshot now and return it
+exports.refreshDashboardStats = async (req, res) => {
+  try {
+    const result = await batchJobService.runJob('statsSnapshot');
+    if (!result) {
+      return res.status(409).json({ error: 'Statistics are already being published' });
+    }
 
-    pythonProcess.stdout.on('data', (data) => {
-      stdout += data.toString();
-    });
+    const snapshot = await statsSnapshotService.read();
+    res.json(statsSnapshotService.describe(snapshot));
+  } catch (error) {
+    console.error('Refresh dashboard stats error:', error);
+    res.status(500).json({ error: 'Failed to publish statistics: ' + error.message });
+  }
+};
 
-    pythonProcess.stderr.on('data', (data) => {
-      stderr += data.toString();
-    });
+// Submit a report job; identical requests share one job or its cached result
+exports.submitReportJob = async (req, res) => {
+  try {
+    const { scope, error } = parseReportScope({ ...req.query, ...req.body });
+    if (error) {
+      return res.status(400).json({ error });
+    }
 
-    pythonProcess.on('close', (code) => {
-      if (code !== 0) {
-        console.error('Python script error:', stderr);
-        // Cleanup
-        fs.rmSync(tempDir, { recursive: true, force: true });
-        return res.status(500).json({ error: 'Failed to generate report: ' + stderr });
-      }
+    const { job, reused } = reportJobService.submit(scope);
+    res.status(202).json({ job, reused });
+  } catch (error) {
+    console.error('Submit report job error:', error);
+    res.status(500).json({ error: 'Failed to submit report job: ' + error.message });
+  }
+};
 
-      try {
-        // Parse output
-        const output = JSON.parse(stdout);
-        
-        if (!output.success) {
-          fs.rmSync(tempDir, { recursive: true, force: true });
-          return res.status(500).json({ error: output.error || 'Failed to generate report' });
-        }
+// Poll a report job's status and stage progress
+exports.getReportJob = async (req, res) => {
+  try {
+    const job = reportJobService.getJob(req.params.id);
+    if (!job) {
+      return res.status(404).json({ error: 'Report job not found or expired' });
+    }
 
-        const pdfPath = output.pdf_path;
-        
-        if (!fs.existsSync(pdfPath)) {
-          fs.rmSync(tempDir, { recursive: true, force: true });
-          return res.status(500).json({ error: 'Generated PDF not found' });
-        }
+    res.json({ job });
+  } catch (error) {
+    console.error('Get report job error:', error);
+    res.status(500).json({ error: 'Failed to fetch report job: ' + error.message });
+  }
+};
 
-        // Generate filename with timestamp
-        const timestamp = new Date().toISOString().replace(/[:.]/g, '-').slice(0, -5);
-        const filename = `library-report-${timestamp}.pdf`;
-
-        // Send PDF file
-        res.setHeader('Content-Type', 'application/pdf');
-        res.setHeader('Content-Disposition', `attachment; filename="${filename}"`);
-        
-        const fileStream = fs.createReadStream(pdfPath);
-        fileStream.pipe(res);
-
-        // Cleanup after sending
-        fileStream.on('end', () => {
-          setTimeout(() => {
-            fs.rmSync(tempDir, { recursive: true, force: true });
-          }, 1000);
-        });
+// Download a completed report job's PDF
+exports.downloadReportJob = async (req, res) => {
+  try {
+    const job = reportJobService.getJob(req.params.id);
+    if (!job) {
+      return res.status(404).json({ error: 'Report job not found or expired' });
+    }
+    const result = reportJobService.getResult(req.params.id);
+    if (!result) {
+      return res.status(409).json({ error: `Report is ${job.status}`, job });
+    }
 
-      } catch (error) {
-        console.error('Error processing report:', error);
-        fs.rmSync(tempDir, { recursive: true, force: true });
-        res.status(500).json({ error: 'Failed to process report' });
-      }
-    });
+    sendReportPdf(res, result.pdf, result.createdAt);
+  } catch (error) {
+    console.error('Download report error:', error);
+    res.status(500).json({ error: 'Failed to download report: ' + error.message });
+  }
+};
 
-    pythonProcess.on('error', (error) => {
-      console.error('Failed to start Python process:', error);
-      fs.rmSync(tempDir, { recursive: true, force: true });
-      res.status(500).json({ error: 'Failed to start report generation. Make sure Python 3 is installed.' });
-    });
+// Generate PDF report with system statistics in one request; goes through
+// the same jobs, so it also shares in-flight runs and cached results
+exports.generateReport = async (req, res) => {
+  try {
+    const { scope, error } = parseReportScope(req.query);
+    if (error) {
+      return res.status(400).json({ error });
+    }
 
+    const { job } = reportJobService.submit(scope);
+    const result = await reportJobService.wait(job.id);
+    if (!result || !result.pdf) {
+      throw new Error((result && result.job.error) || 'Report job expired');
+    }
+
+    sendReportPdf(res, result.pdf, new Date(result.job.createdAt));
   } catch (error) {
     console.error('Generate report error:', error);
-    res.status(500).json({ error: 'Failed to generate report' });
+    res.status(500).json({ error: 'Failed to generate report: ' + error.message });
   }
 };
-
@@ -66,7 +66,8 @@ exports.getAllBooks = async (req, res) => {
           page: searchResult.page,
           limit: searchResult.limit,
           total: searchResult.total,
-          totalPages: searchResult.totalPages
+          totalPages: searchResult.totalPages,
+          totalCapped: searchResult.totalCapped
         }
       });
     } else {
@@ -170,6 +171,41 @@ exports.getSearchSuggestions = async (req, res) => {
   }
 };
 
+// Get books borrowed by patrons who also borrowed this one
+exports.getBookRecommendations = async (req, res) => {
+  try {
+    const { id } = req.params;
+
+    let recommendations = [];
+    try {
+      // precomputed by scripts/build_recommendations.py, one primary key range
+      const [rows] = await pool.execute(
+        `SELECT b.id, b.title, b.author, b.category, b.available_copies, b.total_copies,
+                b.average_rating, r.score, r.co_borrowers
+         FROM book_recommendations r
+         JOIN books b ON b.id = r.recommended_book_id
+         WHERE r.book_id = ?
+         ORDER BY r.position`,
+        [id]
+      );
+      recommendations = rows.map((row) => ({
+        ...row,
+        average_rating: row.average_rating ? parseFloat(row.average_rating) : null
+      }));
+    } catch (error) {
+      // table doesnt exist until the job ran once
+      if (error.code !== 'ER_NO_SUCH_TABLE') {
+        throw error;
+      }
+    }
+
+    res.json({ recommendations });
+  } catch (error) {
+    console.error('Get recommendations error:', error);
+    res.status(500).json({ error: 'Failed to fetch recommendations' });
+  }
+};
+
 // Get book by ID
 exports.getBookById = async (req, res) => {
   try {
@@ -6,9 +6,6 @@ exports.getUserFines = async (req, res) => {
   try {
     const userId = req.user.id;
 
-    // Check and create fines for overdue loans before fetching
-    await fineService.checkAndCreateOverdueFines();
-
     const [fines] = await pool.execute(
       `SELECT f.*, 
        COALESCE(hb.title, lb.title) as book_title,
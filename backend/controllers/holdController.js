@@ -1,4 +1,5 @@
 const pool = require('../config/database');
+const batchJobService = require('../services/batchJobService');
 
 // Get all holds for a user
 exports.getUserHolds = async (req, res) => {
@@ -49,50 +50,21 @@ exports.getHoldById = async (req, res) => {
 // Check and process expired holds (apply fees)
 exports.processExpiredHolds = async (req, res) => {
   try {
-    const now = new Date();
-    const HOLD_FEE_AMOUNT = 250.00; // 250 EGP
+    // Expiry runs as a chunked, transactional batch job (scripts/expire_holds.py);
+    // ?dryRun=true reports what would expire without writing anything
+    const dryRun = req.query.dryRun === 'true';
+    const result = await batchJobService.runJob('expireHolds', dryRun ? ['--dry-run'] : []);
 
-    // Find expired holds that haven't had fees applied yet
-    const [expiredHolds] = await pool.execute(
-      `SELECT h.*, b.title 
-       FROM holds h 
-       JOIN books b ON h.book_id = b.id 
-       WHERE h.expiry_datetime < ? 
-       AND h.status IN ('pending', 'available') 
-       AND h.fee_applied = FALSE`,
-      [now]
-    );
-
-    let feesApplied = 0;
-
-    for (const hold of expiredHolds) {
-      // Update hold status to expired and mark fee as applied
-      await pool.execute(
-        'UPDATE holds SET status = ?, fee_amount = ?, fee_applied = TRUE WHERE id = ?',
-        ['expired', HOLD_FEE_AMOUNT, hold.id]
-      );
-
-      // Create fine record
-      await pool.execute(
-        `INSERT INTO fines (user_id, hold_id, amount, type, status, description) 
-         VALUES (?, ?, ?, ?, ?, ?)`,
-        [
-          hold.user_id,
-          hold.id,
-          HOLD_FEE_AMOUNT,
-          'hold_expiry',
-          'pending',
-          `Fee for expired hold on book: ${hold.title}. Hold expired on ${new Date(hold.expiry_datetime).toLocaleString()}`
-        ]
-      );
-
-      feesApplied++;
+    if (!result) {
+      return res.status(409).json({ error: 'Expired holds are already being processed' });
     }
 
     res.json({ 
-      message: `Processed ${feesApplied} expired holds`,
-      feesApplied,
-      expiredHolds: expiredHolds.length
+      message: `${dryRun ? 'Would process' : 'Processed'} ${result.holds_expired} expired holds`,
+      feesApplied: result.fees_applied,
+      expiredHolds: result.holds_expired,
+      holdsPerSecond: result.holds_per_sec,
+      dryRun
     });
   } catch (error) {
     console.error('Process expired holds error:', error);
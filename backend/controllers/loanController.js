@@ -6,9 +6,6 @@ exports.getUserLoans = async (req, res) => {
   try {
     const userId = req.user.id;
 
-    // Check and create fines for overdue loans
-    await fineService.checkAndCreateOverdueFines();
-
     const [loans] = await pool.execute(
       `SELECT l.*, b.title, b.author, b.isbn 
        FROM loans l 
@@ -13,7 +13,12 @@ router.get('/users/:id/history', adminController.getUserWithHistory);
 router.get('/staff/:id/history', adminController.getStaffHistory);
 router.get('/staff', adminController.getAllStaff);
 router.get('/history', adminController.getAdminHistory);
+router.get('/stats', adminController.getDashboardStats);
+router.post('/stats/refresh', adminController.refreshDashboardStats);
 router.get('/reports/generate', adminController.generateReport);
+router.post('/reports/jobs', adminController.submitReportJob);
+router.get('/reports/jobs/:id', adminController.getReportJob);
+router.get('/reports/jobs/:id/download', adminController.downloadReportJob);
 
 // User management routes
 router.post('/users/:id/activate', userManagementController.activateUser);
@@ -7,6 +7,7 @@ const { verifyToken, requireAdmin } = require('../middleware/authMiddleware');
 router.get('/', bookController.getAllBooks);
 router.get('/suggestions', bookController.getSearchSuggestions);
 router.get('/:id', bookController.getBookById);
+router.get('/:id/recommendations', bookController.getBookRecommendations);
 
 // Protected routes (admin only)
 router.post('/', verifyToken, requireAdmin, bookController.createBook);
@@ -0,0 +1,14 @@
+-- Add the composite indexes used by date-range and category-scoped reports
+-- to an existing database (new databases get them from config/db-schema.sql)
+USE library_system;
+
+ALTER TABLE loans
+  ADD INDEX idx_loan_date_status (loan_date, status, due_date),
+  ADD INDEX idx_status_due_date (status, due_date),
+  ADD INDEX idx_book_loan_date (book_id, loan_date);
+
+ALTER TABLE holds
+  ADD INDEX idx_status_hold_date (status, hold_date);
+
+ALTER TABLE fines
+  ADD INDEX idx_status_created (status, created_at);
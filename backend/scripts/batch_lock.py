@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Batch job locking
+MySQL named locks that keep two runs of the same batch job from overlapping
+"""
+
+from contextlib import contextmanager
+
+@contextmanager
+def named_lock(connection, name):
+    """Hold the server-wide lock `name` for the block; yields False if another session has it"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (name,))
+        locked = cursor.fetchone()[0] == 1
+        try:
+            yield locked
+        finally:
+            if locked:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (name,))
+                cursor.fetchone()
+    finally:
+        cursor.close()
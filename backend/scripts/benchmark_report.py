@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Report benchmarks
+Measures the report pipeline and prints the results as JSON
+"""
+
+import sys
+import os
+import re
+import json
+import time
+import argparse
+import platform
+import subprocess
+import statistics
+import random
+import tempfile
+import shutil
+from datetime import date, datetime, timedelta
+
+from report_timing import peak_rss_mb
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_SCRIPT = os.path.join(SCRIPT_DIR, 'generate_report.py')
+SCHEMA_FILE = os.path.join(SCRIPT_DIR, '..', 'config', 'db-schema.sql')
+
+# Database the seed and pipeline benchmarks use; never the application's
+BENCH_DATABASE = os.getenv('BENCH_DB_NAME', 'library_bench')
+
+BENCH_CATEGORIES = [
+    'Fiction', 'Science Fiction', 'Fantasy', 'Mystery', 'Romance', 'History',
+    'Biography', 'Science', 'Technology', 'Philosophy', 'Poetry', 'Children',
+    'Young Adult', 'Art', 'Travel', 'Cooking', 'Business', 'Health', 'Religion', 'Reference'
+]
+
+# Interpreter startup scenarios: what each report mode has to import
+STARTUP_SCENARIOS = {
+    'interpreter': ['-c', 'pass'],
+    'help': [REPORT_SCRIPT, '--help'],
+    'import': ['-c', 'import generate_report'],
+    'stats_json_imports': ['-c', 'import generate_report, mysql.connector'],
+    'pdf_imports': ['-c', 'import generate_report, mysql.connector, '
+                          'matplotlib.figure, reportlab.platypus']
+}
+
+def _time_command(args, runs):
+    """Wall time in milliseconds of `runs` fresh interpreter runs"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=SCRIPT_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'runs': runs,
+        'median_ms': round(statistics.median(timings), 2),
+        'min_ms': round(min(timings), 2),
+        'max_ms': round(max(timings), 2)
+    }
+
+def bench_startup(args):
+    """Time interpreter startup plus the imports of each report mode"""
+    # Warm the bytecode and font caches so the first run isn't an outlier
+    _time_command(STARTUP_SCENARIOS['pdf_imports'], 1)
+    results = {name: _time_command(command, args.runs)
+               for name, command in STARTUP_SCENARIOS.items()}
+
+    failed = False
+    if args.max_import_ms is not None:
+        overhead = results['import']['median_ms'] - results['interpreter']['median_ms']
+        results['import_overhead_ms'] = round(overhead, 2)
+        failed = overhead > args.max_import_ms
+    return results, failed
+
+def synthetic_stats(scale=1_000_000, seed=42):
+    """A stats dict shaped like get_statistics output for a library of `scale` loans"""
+    rng = random.Random(seed)
+    today = date.today()
+    months = []
+    for offset in range(11, -1, -1):
+        year, month = divmod(today.year * 12 + today.month - 1 - offset, 12)
+        months.append(f"{year}-{month + 1:02d}")
+    returned = int(scale * 0.9)
+    active = scale - returned
+    return {
+        'total_books': scale // 100,
+        'total_copies': scale // 40,
+        'available_copies': scale // 50,
+        'total_users': scale // 10,
+        'total_loans': scale,
+        'active_loans': active,
+        'returned_loans': returned,
+        'overdue_loans': active // 4,
+        'total_fines': round(active * 1.75, 2),
+        'active_holds': scale // 200,
+        'loans_by_month': [{'month': month, 'count': rng.randint(scale // 15, scale // 10)}
+                           for month in months],
+        'books_by_category': [{'category': f'Category {i}', 'count': scale // (100 + 40 * i)}
+                              for i in range(10)],
+        'most_borrowed': [{'title': f'Synthetic Book Title Number {i}', 'author': f'Author {i}',
+                           'borrow_count': scale // (500 + 100 * i)}
+                          for i in range(10)]
+    }
+
+def _load_stats(args):
+    import generate_report
+    if not args.from_db:
+        return synthetic_stats(args.scale)
+    pool = generate_report.ConnectionPool()
+    try:
+        return generate_report.get_statistics(pool)
+    finally:
+        pool.close()
+
+def bench_charts(args):
+    """PDF size and chart + PDF build time for raster vs vector charts"""
+    import io
+    import generate_report
+
+    stats = _load_stats(args)
+    results = {}
+    for mode in generate_report.CHART_MODES:
+        timings = []
+        size = 0
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            if mode == 'vector':
+                graphs = generate_report._vector_graphs(stats)
+            else:
+                graphs = generate_report.render_graphs(stats, jobs=args.jobs)
+            buffer = io.BytesIO()
+            generate_report.generate_pdf_with_reportlab(stats, graphs, buffer)
+            timings.append((time.perf_counter() - start) * 1000)
+            size = len(buffer.getvalue())
+        results[mode] = {
+            'runs': args.runs,
+            'pdf_bytes': size,
+            'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(min(timings), 2)
+        }
+    return results, False
+
+def _median_ms(func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'runs': runs, 'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(min(timings), 2)}
+
+def _latex_two_pass(stats, graphs):
+    """The LaTeX build before the fast path: full preamble, always two passes"""
+    import report_latex
+    work = tempfile.mkdtemp(prefix='library-bench-latex-')
+    try:
+        report_latex.stage_graphs(graphs, work)
+        report_latex.generate_latex_document(stats, graphs, os.path.join(work, 'report.tex'))
+        for _ in range(2):
+            subprocess.run(['pdflatex', '-interaction=nonstopmode', '-halt-on-error', 'report.tex'],
+                           cwd=work, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+def bench_latex(args):
+    """PDF build time of reportlab vs LaTeX (two passes vs the fast path), and parallel LaTeX builds"""
+    import io
+    from concurrent.futures import ThreadPoolExecutor
+    import generate_report
+    import report_latex
+
+    if shutil.which('pdflatex') is None:
+        raise SystemExit("pdflatex not found; install a TeX distribution to run this benchmark")
+    stats = synthetic_stats(args.scale)
+    # Same charts for every backend, rendered once
+    graphs = generate_report.render_graphs(stats, jobs=1)
+    format_dir = tempfile.mkdtemp(prefix='library-bench-formats-')
+    try:
+        start = time.perf_counter()
+        report_latex.preamble_format(format_dir)
+        format_ms = (time.perf_counter() - start) * 1000
+
+        def fast():
+            if report_latex.build_latex_pdf(stats, graphs, io.BytesIO(), format_dir) is None:
+                raise SystemExit("pdflatex failed; see the log above")
+
+        results = {
+            'reportlab': _median_ms(
+                lambda: generate_report.generate_pdf_with_reportlab(stats, graphs, io.BytesIO()),
+                args.runs),
+            'latex_two_pass': _median_ms(lambda: _latex_two_pass(stats, graphs), args.runs),
+            'latex_fast': _median_ms(fast, args.runs),
+            'format_build_ms': round(format_ms, 2)
+        }
+
+        # Builds are subprocesses in private directories, so threads run them in parallel
+        workers = args.jobs or os.cpu_count() or 1
+        start = time.perf_counter()
+        for _ in range(args.reports):
+            fast()
+        sequential = time.perf_counter() - start
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda _: fast(), range(args.reports)))
+        parallel = time.perf_counter() - start
+    finally:
+        shutil.rmtree(format_dir, ignore_errors=True)
+
+    results['parallel'] = {
+        'reports': args.reports,
+        'workers': workers,
+        'sequential_reports_per_min': round(args.reports * 60 / sequential, 1),
+        'parallel_reports_per_min': round(args.reports * 60 / parallel, 1),
+        'speedup': round(sequential / parallel, 2)
+    }
+    results['speedup_vs_two_pass'] = round(
+        results['latex_two_pass']['median_ms'] / results['latex_fast']['median_ms'], 2)
+    return results, False
+
+def _seed_connection(database=None):
+    import mysql.connector
+    import generate_report
+    config = dict(generate_report.DB_CONFIG, database=database)
+    if database is None:
+        del config['database']
+    return mysql.connector.connect(**config)
+
+def _schema_statements():
+    """CREATE TABLE statements from config/db-schema.sql, without its database name"""
+    with open(SCHEMA_FILE, encoding='utf-8') as f:
+        lines = [line for line in f if not line.lstrip().startswith('--')]
+    for statement in ''.join(lines).split(';'):
+        statement = statement.strip()
+        if statement.upper().startswith('CREATE TABLE'):
+            yield statement
+
+def _insert_rows(connection, sql, rows, batch):
+    """Insert `rows` as multi-row INSERTs of `batch` rows, one transaction each"""
+    cursor = connection.cursor()
+    count = 0
+    start = time.perf_counter()
+    chunk = []
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == batch:
+                cursor.executemany(sql, chunk)
+                connection.commit()
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            cursor.executemany(sql, chunk)
+            connection.commit()
+            count += len(chunk)
+    finally:
+        cursor.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': count,
+        'seconds': round(elapsed, 2),
+        'rows_per_sec': round(count / elapsed) if elapsed else None
+    }
+
+def _bench_users(count, rng):
+    # Every synthetic user shares one placeholder hash; nobody logs in as them
+    password = '$2a$10$' + 'x' * 53
+    for i in range(1, count + 1):
+        yield (f'bench_{i}', f'bench{i}@example.com', password, f'Bench User {i}',
+               rng.random() < 0.8, 'user')
+
+def _bench_books(count, rng):
+    for i in range(1, count + 1):
+        copies = rng.randint(1, 10)
+        yield (f'BENCH-{i:012d}', f'Benchmark Book Title {i}', f'Author {rng.randrange(count // 5 + 1)}',
+               f'Publisher {rng.randrange(500)}', rng.randint(1900, 2024),
+               rng.choice(BENCH_CATEGORIES), copies, rng.randint(0, copies))
+
+def _bench_loans(count, users, books, years, rng):
+    today = date.today()
+    span = 365 * years
+    for _ in range(count):
+        loan_date = today - timedelta(days=rng.randrange(span))
+        due_date = loan_date + timedelta(days=14)
+        # A few books account for most loans, like a real catalog
+        book_id = int(books * rng.random() ** 3) + 1
+        kept = rng.randint(1, 30)
+        if loan_date + timedelta(days=kept) < today:
+            status, return_date = 'returned', loan_date + timedelta(days=kept)
+        else:
+            status, return_date = 'active', None
+        yield (rng.randint(1, users), book_id, loan_date, due_date, return_date, status,
+               datetime.combine(loan_date, datetime.min.time()) + timedelta(seconds=rng.randrange(86400)))
+
+def _bench_holds(count, users, books, years, rng):
+    now = datetime.now().replace(microsecond=0)
+    span = 86400 * 365 * years
+    statuses = ['pending', 'available', 'cancelled', 'expired']
+    for _ in range(count):
+        hold_date = now - timedelta(seconds=rng.randrange(span))
+        expiry = hold_date + timedelta(days=3)
+        yield (rng.randint(1, users), rng.randint(1, books), hold_date, expiry.date(), expiry,
+               rng.choice(statuses), hold_date)
+
+def _bench_fines(count, users, loans, years, rng):
+    now = datetime.now().replace(microsecond=0)
+    span = 86400 * 365 * years
+    for _ in range(count):
+        yield (rng.randint(1, users), rng.randint(1, loans), round(rng.uniform(0.5, 25), 2),
+               'overdue', 'pending' if rng.random() < 0.3 else 'paid',
+               now - timedelta(seconds=rng.randrange(span)))
+
+def bench_seed(args):
+    """Create and fill the benchmark database with a synthetic library"""
+    import generate_report
+    if args.database in (generate_report.DB_CONFIG['database'], 'library_system'):
+        raise SystemExit(f"Refusing to seed the application database '{args.database}'")
+    rng = random.Random(args.seed)
+    holds = args.loans // 100 if args.holds is None else args.holds
+    fines = args.loans // 50 if args.fines is None else args.fines
+
+    connection = _seed_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        cursor.execute(f"CREATE DATABASE `{args.database}` "
+                       "DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci")
+        cursor.execute(f"USE `{args.database}`")
+        for statement in _schema_statements():
+            cursor.execute(statement)
+        # Fresh tables: skip per-row uniqueness and foreign key checks
+        cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        cursor.close()
+
+        print(f"Seeding {args.database}...", file=sys.stderr)
+        results = {'database': args.database, 'batch': args.batch}
+        results['users'] = _insert_rows(connection, """
+            INSERT INTO users (uid, email, password, display_name, email_verified, role)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, _bench_users(args.users, rng), args.batch)
+        results['books'] = _insert_rows(connection, """
+            INSERT INTO books (isbn, title, author, publisher, publication_year, category,
+                               total_copies, available_copies)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, _bench_books(args.books, rng), args.batch)
+        results['loans'] = _insert_rows(connection, """
+            INSERT INTO loans (user_id, book_id, loan_date, due_date, return_date, status, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, _bench_loans(args.loans, args.users, args.books, args.years, rng), args.batch)
+        results['holds'] = _insert_rows(connection, """
+            INSERT INTO holds (user_id, book_id, hold_date, expiry_date, expiry_datetime, status, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """, _bench_holds(holds, args.users, args.books, args.years, rng), args.batch)
+        results['fines'] = _insert_rows(connection, """
+            INSERT INTO fines (user_id, loan_id, amount, type, status, created_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, _bench_fines(fines, args.users, max(args.loans, 1), args.years, rng), args.batch)
+    finally:
+        connection.close()
+    return results, False
+
+def _reset_peak_rss():
+    """Reset the kernel's peak RSS counter so the next reading covers one stage (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _timed_stage(timings, name, func, *args, **kwargs):
+    per_stage = _reset_peak_rss()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[name] = {
+        'ms': round((time.perf_counter() - start) * 1000, 2),
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_scope': 'stage' if per_stage else 'process'
+    }
+    return result
+
+def bench_pipeline(args):
+    """Time get_statistics, chart generation and PDF assembly against the benchmark database"""
+    import generate_report
+    generate_report.DB_CONFIG['database'] = args.database
+
+    work_dir = tempfile.mkdtemp(prefix='library-bench-')
+    rollup_path = None if args.no_rollup else os.path.join(work_dir, 'rollup.sqlite3')
+    pool = generate_report.ConnectionPool()
+    runs = []
+    try:
+        for _ in range(args.runs):
+            timings = {}
+            stats = _timed_stage(timings, 'get_statistics', generate_report.get_statistics,
+                                 pool, rollup_path=rollup_path)
+            if args.charts == 'vector':
+                graphs = _timed_stage(timings, 'generate_graphs', generate_report._vector_graphs, stats)
+            else:
+                graphs = _timed_stage(timings, 'generate_graphs', generate_report.generate_graphs,
+                                      stats, work_dir, jobs=args.jobs)
+            _timed_stage(timings, 'generate_pdf_with_reportlab', generate_report.generate_pdf_with_reportlab,
+                         stats, graphs, os.path.join(work_dir, 'report.pdf'))
+            timings['pdf_bytes'] = os.path.getsize(os.path.join(work_dir, 'report.pdf'))
+            runs.append(timings)
+    finally:
+        pool.close()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    stages = ('get_statistics', 'generate_graphs', 'generate_pdf_with_reportlab')
+    return {
+        'database': args.database,
+        'charts': args.charts,
+        'rollup': not args.no_rollup,
+        'volumes': {key: stats[key] for key in ('total_books', 'total_users', 'total_loans')},
+        'runs': runs,
+        'median_ms': {stage: round(statistics.median(run[stage]['ms'] for run in runs), 2)
+                      for stage in stages},
+        'peak_rss_mb': max(run[stage]['peak_rss_mb'] or 0 for run in runs for stage in stages),
+        'chart_workers_peak_rss_mb': peak_rss_mb(children=True)
+    }, False
+
+def _batch_manifest(database, months, categories):
+    """Specs for one report per (largest category, last full month) in `database`"""
+    connection = _seed_connection(database)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT category FROM books WHERE category IS NOT NULL
+            GROUP BY category ORDER BY COUNT(*) DESC LIMIT %s
+        """, (categories,))
+        names = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+    finally:
+        connection.close()
+
+    reports = []
+    first = date.today().replace(day=1)
+    for _ in range(months):
+        first = (first - timedelta(days=1)).replace(day=1)
+        for category in names:
+            slug = re.sub(r'[^A-Za-z0-9._-]+', '-', category)
+            reports.append({'name': f"{slug}-{first:%Y-%m}", 'month': f"{first:%Y-%m}",
+                            'category': category})
+    return reports
+
+def _month_range(month):
+    first = date.fromisoformat(f"{month}-01")
+    last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return first.isoformat(), last.isoformat()
+
+def bench_batch(args):
+    """Reports/min of one --batch run vs one generate_report.py invocation per report"""
+    reports = _batch_manifest(args.database, args.months, args.categories)
+    if not reports:
+        raise SystemExit(f"No categorised books in {args.database}; run the seed benchmark first")
+    work_dir = tempfile.mkdtemp(prefix='library-bench-batch-')
+    env = dict(os.environ, DB_NAME=args.database)
+    # Both sides render every chart so the chart cache doesn't favour either,
+    # and neither adds the loan analytics section (--batch never does)
+    common = ['--no-cache', '--charts', args.charts] + (['--jobs', str(args.jobs)] if args.jobs else [])
+    try:
+        start = time.perf_counter()
+        for report in reports:
+            date_from, date_to = _month_range(report['month'])
+            subprocess.run([sys.executable, REPORT_SCRIPT, os.path.join(work_dir, 'sequential', report['name']),
+                            '--from', date_from, '--to', date_to, '--category', report['category']] + common,
+                           cwd=SCRIPT_DIR, env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        sequential = time.perf_counter() - start
+
+        manifest = os.path.join(work_dir, 'manifest.json')
+        with open(manifest, 'w', encoding='utf-8') as f:
+            json.dump({'reports': reports}, f)
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, REPORT_SCRIPT, os.path.join(work_dir, 'batch'),
+                                 '--batch', manifest] + common,
+                                cwd=SCRIPT_DIR, env=env, check=True, capture_output=True, text=True).stdout
+        batched = time.perf_counter() - start
+        batch_result = json.loads(output.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'database': args.database,
+        'reports': len(reports),
+        'charts': args.charts,
+        'sequential': {
+            'seconds': round(sequential, 2),
+            'reports_per_min': round(len(reports) * 60 / sequential, 1)
+        },
+        'batch': {
+            'seconds': round(batched, 2),
+            'reports_per_min': round(len(reports) * 60 / batched, 1),
+            'stages_ms': {name: span['wall_ms'] for name, span in batch_result['timings']['stages'].items()},
+            'queries': len(batch_result['timings'].get('queries', {}))
+        },
+        'speedup': round(sequential / batched, 2)
+    }, False
+
+def _environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True).stdout.strip() or None
+    except FileNotFoundError:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Benchmark the report generator')
+    parser.add_argument('--output', help='Write the JSON results to this file as well')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    startup = subparsers.add_parser('startup', help='Interpreter startup and import cost')
+    startup.add_argument('--runs', type=int, default=10)
+    startup.add_argument('--max-import-ms', type=float, default=None,
+                         help='Exit non-zero if importing generate_report costs more than this')
+    startup.set_defaults(handler=bench_startup)
+
+    charts = subparsers.add_parser('charts', help='Raster vs vector charts: PDF size and build time')
+    charts.add_argument('--runs', type=int, default=5)
+    charts.add_argument('--jobs', type=int, default=1,
+                        help='Processes for raster rendering (default: 1)')
+    charts.add_argument('--scale', type=int, default=10_000_000,
+                        help='Loans in the synthetic dataset (default: 10M)')
+    charts.add_argument('--from-db', action='store_true',
+                        help='Use live statistics from the database instead of synthetic ones')
+    charts.set_defaults(handler=bench_charts)
+
+    latex = subparsers.add_parser('latex', help='reportlab vs LaTeX PDF builds, and parallel LaTeX builds')
+    latex.add_argument('--runs', type=int, default=5)
+    latex.add_argument('--reports', type=int, default=16,
+                       help='LaTeX builds in the sequential vs parallel comparison (default: 16)')
+    latex.add_argument('--jobs', type=int, default=None,
+                       help='Concurrent LaTeX builds (default: one per CPU)')
+    latex.add_argument('--scale', type=int, default=10_000_000,
+                       help='Loans in the synthetic dataset (default: 10M)')
+    latex.set_defaults(handler=bench_latex)
+
+    seed = subparsers.add_parser('seed', help='Fill the benchmark database with a synthetic library')
+    seed.add_argument('--database', default=BENCH_DATABASE,
+                      help=f'Database to (re)create (default: {BENCH_DATABASE})')
+    seed.add_argument('--books', type=int, default=100_000)
+    seed.add_argument('--users', type=int, default=1_000_000)
+    seed.add_argument('--loans', type=int, default=10_000_000)
+    seed.add_argument('--holds', type=int, default=None, help='Default: 1%% of loans')
+    seed.add_argument('--fines', type=int, default=None, help='Default: 2%% of loans')
+    seed.add_argument('--years', type=int, default=3, help='Spread loans over this many years')
+    seed.add_argument('--batch', type=int, default=5000, help='Rows per INSERT and transaction')
+    seed.add_argument('--seed', type=int, default=42)
+    seed.set_defaults(handler=bench_seed)
+
+    pipeline = subparsers.add_parser('pipeline', help='Per-stage time and peak RSS of a full report')
+    pipeline.add_argument('--database', default=BENCH_DATABASE,
+                          help=f'Database to report on (default: {BENCH_DATABASE})')
+    pipeline.add_argument('--runs', type=int, default=3)
+    pipeline.add_argument('--jobs', type=int, default=None,
+                          help='Processes for raster rendering (default: one per CPU)')
+    pipeline.add_argument('--charts', choices=('raster', 'vector'), default='raster')
+    pipeline.add_argument('--no-rollup', action='store_true',
+                          help='Scan the loans table instead of using a (fresh) rollup store')
+    pipeline.set_defaults(handler=bench_pipeline)
+
+    batch = subparsers.add_parser('batch', help='Reports/min of --batch vs one invocation per report')
+    batch.add_argument('--database', default=BENCH_DATABASE,
+                       help=f'Database to report on (default: {BENCH_DATABASE})')
+    batch.add_argument('--months', type=int, default=3, help='Last full months to slice (default: 3)')
+    batch.add_argument('--categories', type=int, default=4,
+                       help='Largest categories to slice (default: 4)')
+    batch.add_argument('--jobs', type=int, default=None,
+                       help='Processes for rendering (default: one per CPU)')
+    batch.add_argument('--charts', choices=('raster', 'vector'), default='raster')
+    batch.set_defaults(handler=bench_batch)
+
+    args = parser.parse_args()
+    results, failed = args.handler(args)
+
+    output = json.dumps({
+        'benchmark': args.benchmark,
+        'environment': _environment(),
+        'results': results
+    }, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    if failed:
+        print("Startup regression: import overhead above --max-import-ms", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
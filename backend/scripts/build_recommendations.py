@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Co-borrowing recommendations
+Builds a sparse user x book matrix from loans and stores, for every book,
+the books most often borrowed by the same patrons (cosine similarity of
+their borrower sets) in book_recommendations, so the book page reads its
+"patrons who borrowed this also borrowed" list with one key lookup
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+from scipy import sparse
+
+from generate_report import DB_CONFIG, connect_to_database
+from batch_lock import named_lock
+
+# Neighbours stored per book, and the fewest shared borrowers a pair needs
+# (one shared patron gives two rarely borrowed books a perfect score)
+TOP_K = int(os.getenv('RECOMMENDATION_TOP_K', '10'))
+MIN_CO_BORROWERS = int(os.getenv('RECOMMENDATION_MIN_CO_BORROWERS', '2'))
+
+# Upper bound on co-borrowing counts held in memory at once; books are
+# processed in blocks sized to stay under it
+BLOCK_PAIRS = int(os.getenv('RECOMMENDATION_BLOCK_PAIRS', '20000000'))
+
+# Incremental runs only recompute books borrowed by patrons with new loans;
+# a full rebuild this often also refreshes the scores those runs skip
+REBUILD_HOURS = float(os.getenv('RECOMMENDATION_REBUILD_HOURS', '24'))
+
+# Loans fetched per round trip, and books written per transaction
+FETCH_SIZE = 100000
+CHUNK_SIZE = 1000
+
+# Ids per IN (...) list when an incremental run loads the loans around the
+# new ones
+IN_BATCH = 1000
+
+LOCK_NAME = 'library_recommendations'
+
+# Kept in sync with config/db-schema.sql; created here too so the
+# recommendations can be added to an existing database by running this script
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS book_recommendations (
+      book_id INT NOT NULL,
+      position TINYINT UNSIGNED NOT NULL,
+      recommended_book_id INT NOT NULL,
+      score FLOAT NOT NULL,
+      co_borrowers INT NOT NULL,
+      computed_at TIMESTAMP NOT NULL,
+      PRIMARY KEY (book_id, position),
+      FOREIGN KEY (book_id) REFERENCES books(id) ON DELETE CASCADE,
+      FOREIGN KEY (recommended_book_id) REFERENCES books(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS recommendation_state (
+      name VARCHAR(50) PRIMARY KEY,
+      value VARCHAR(255) NOT NULL
+    ) ENGINE=InnoDB
+    """
+]
+
+def _get_state(cursor, name):
+    cursor.execute("SELECT value FROM recommendation_state WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def _set_state(cursor, name, value):
+    cursor.execute(
+        "INSERT INTO recommendation_state (name, value) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE value = VALUES(value)",
+        (name, str(value))
+    )
+
+def ensure_schema(connection):
+    """Create the recommendation tables"""
+    cursor = connection.cursor()
+    try:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+def _id_batches(ids):
+    ids = [int(value) for value in ids]
+    for start in range(0, len(ids), IN_BATCH):
+        batch = ids[start:start + IN_BATCH]
+        yield batch, ', '.join(['%s'] * len(batch))
+
+def load_borrowings(connection, upto, user_ids=None, fetch_size=FETCH_SIZE):
+    """(user ids, book ids) of every loan up to id `upto`, as int32 arrays
+
+    With `user_ids`, only the loans of those users (through idx_user_id).
+    Streams through an unbuffered cursor, so only one batch of row tuples
+    exists in Python at a time; the arrays take 8 bytes per loan.
+    """
+    if user_ids is None:
+        queries = [("SELECT user_id, book_id FROM loans WHERE id <= %s", [upto])]
+    else:
+        queries = [(f"SELECT user_id, book_id FROM loans WHERE user_id IN ({placeholders}) AND id <= %s",
+                    batch + [upto])
+                   for batch, placeholders in _id_batches(user_ids)]
+    users = []
+    books = []
+    for sql, params in queries:
+        cursor = connection.cursor(buffered=False)
+        try:
+            cursor.execute(sql, params)
+            while True:
+                chunk = cursor.fetchmany(fetch_size)
+                if not chunk:
+                    break
+                block = np.array(chunk, dtype=np.int32).reshape(len(chunk), 2)
+                users.append(block[:, 0].copy())
+                books.append(block[:, 1].copy())
+        finally:
+            cursor.close()
+    if not users:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    return np.concatenate(users), np.concatenate(books)
+
+def _distinct(connection, column, key, ids, upto):
+    """Distinct `column` values of the loans up to `upto` whose `key` is one of `ids`"""
+    found = set()
+    cursor = connection.cursor()
+    try:
+        for batch, placeholders in _id_batches(ids):
+            cursor.execute(f"SELECT DISTINCT {column} FROM loans WHERE {key} IN ({placeholders}) AND id <= %s",
+                           batch + [upto])
+            found.update(row[0] for row in cursor.fetchall())
+    finally:
+        cursor.close()
+    return np.array(sorted(found), dtype=np.int64)
+
+def borrower_counts(connection, book_ids, upto, size):
+    """Distinct borrowers of each of `book_ids` in the loans up to `upto`
+
+    Returns a float array of length `size` indexed by book id (0 for books
+    not asked for), counted by MySQL through idx_book_id.
+    """
+    counts = np.zeros(size, dtype=np.float64)
+    cursor = connection.cursor()
+    try:
+        for batch, placeholders in _id_batches(book_ids):
+            cursor.execute(f"""
+                SELECT book_id, COUNT(DISTINCT user_id) FROM loans
+                WHERE book_id IN ({placeholders}) AND id <= %s
+                GROUP BY book_id
+            """, batch + [upto])
+            for book_id, count in cursor.fetchall():
+                counts[book_id] = count
+    finally:
+        cursor.close()
+    return counts
+
+def borrow_matrix(users, books):
+    """Binary CSR matrix with a 1 where user (row id) borrowed book (column id)
+
+    Rows and columns are the database ids, so no id mapping is needed;
+    repeat loans of a book by the same user count once.
+    """
+    shape = (int(users.max()) + 1, int(books.max()) + 1) if len(users) else (0, 0)
+    matrix = sparse.csr_matrix((np.ones(len(users), dtype=np.int32), (users, books)), shape=shape)
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+def top_neighbours(matrix, book_ids, top_k=TOP_K, min_co_borrowers=MIN_CO_BORROWERS,
+                   block_pairs=BLOCK_PAIRS, borrowers=None):
+    """Yield (book id, [(other book id, score, co-borrowers), ...]) for `book_ids`
+
+    A block of books gets its co-borrowing counts from one sparse product,
+    X[:, block].T @ X, scored as cosine similarity: shared borrowers over
+    the geometric mean of both books' borrowers. Ties go to the lower id.
+    The blocks are sized so the product has at most `block_pairs` nonzeros
+    (one book at least), bounding memory however many loans there are.
+    `borrowers` holds each book's borrower count when `matrix` only has
+    some of the loans (default: counted from `matrix`).
+    """
+    columns = matrix.tocsc()
+    if borrowers is None:
+        borrowers = np.diff(columns.indptr).astype(np.float64)
+    # Nonzeros a book's product row can have: the loans of its borrowers,
+    # capped at the number of books
+    degree = np.diff(matrix.indptr).astype(np.int64)
+    cost = np.minimum(columns.T @ degree, matrix.shape[1])
+
+    book_ids = np.asarray(book_ids, dtype=np.int64)
+    total = np.cumsum(cost[book_ids])
+    start = 0
+    while start < len(book_ids):
+        spent = total[start - 1] if start else 0
+        end = max(int(np.searchsorted(total, spent + block_pairs, side='right')), start + 1)
+        block = book_ids[start:end]
+        start = end
+
+        counts = (columns[:, block].T @ matrix).tocsr()
+        rows = np.repeat(np.arange(len(block)), np.diff(counts.indptr))
+        others = counts.indices
+        shared = counts.data
+        keep = (others != block[rows]) & (shared >= min_co_borrowers)
+        rows, others, shared = rows[keep], others[keep], shared[keep]
+        scores = shared / np.sqrt(borrowers[block[rows]] * borrowers[others])
+
+        # Best first within each book, then keep the first top_k of each
+        order = np.lexsort((others, -scores, rows))
+        rows, others, shared, scores = rows[order], others[order], shared[order], scores[order]
+        bounds = np.searchsorted(rows, np.arange(len(block) + 1))
+        rank = np.arange(len(rows)) - bounds[rows]
+        keep = rank < top_k
+        rows, others, shared, scores = rows[keep], others[keep], shared[keep], scores[keep]
+        bounds = np.searchsorted(rows, np.arange(len(block) + 1))
+
+        for index, book_id in enumerate(block.tolist()):
+            low, high = bounds[index], bounds[index + 1]
+            yield book_id, list(zip(others[low:high].tolist(),
+                                    np.round(scores[low:high], 4).tolist(),
+                                    shared[low:high].tolist()))
+
+def _write_chunk(connection, chunk, computed_at):
+    """Replace the recommendations of the books in `chunk` in one transaction"""
+    rows = [(book_id, position, other, score, shared, computed_at)
+            for book_id, neighbours in chunk
+            for position, (other, score, shared) in enumerate(neighbours, 1)]
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        placeholders = ', '.join(['%s'] * len(chunk))
+        cursor.execute(f"DELETE FROM book_recommendations WHERE book_id IN ({placeholders})",
+                       [book_id for book_id, _ in chunk])
+        if rows:
+            # IGNORE skips pairs whose book was deleted since the loans were
+            # read, instead of failing the chunk on the foreign key
+            cursor.executemany("""
+                INSERT IGNORE INTO book_recommendations
+                  (book_id, position, recommended_book_id, score, co_borrowers, computed_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, rows)
+        connection.commit()
+        return len(rows)
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def refresh_recommendations(connection, rebuild=False, chunk_size=CHUNK_SIZE):
+    """Recompute recommendations for books affected by loans since the last run
+
+    All books are recomputed from every loan on the first run, with
+    `rebuild`, or when the last full rebuild is older than REBUILD_HOURS.
+    Otherwise only books borrowed by patrons who have new loans are: theirs
+    are the only co-borrowing counts that changed. Such a run loads only the
+    loans of those books' borrowers, and asks MySQL for the borrower counts
+    of the books they share, so its cost follows the new loans'
+    neighbourhood rather than the whole loan history.
+
+    Every other book keeps its stored list. When one of its neighbours
+    gained borrowers, that neighbour's cosine score in the list is stale
+    until the next full rebuild.
+    """
+    connection.autocommit = True
+    ensure_schema(connection)
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT NOW(), COALESCE(MAX(id), 0) FROM loans")
+        started, upto = cursor.fetchone()
+        since = _get_state(cursor, 'loans_until')
+        rebuilt_at = _get_state(cursor, 'rebuilt_at')
+        full = (rebuild or since is None or rebuilt_at is None
+                or datetime.fromisoformat(rebuilt_at) < started - timedelta(hours=REBUILD_HOURS))
+
+        start = time.perf_counter()
+        new_users = None
+        if not full:
+            cursor.execute("SELECT DISTINCT user_id FROM loans WHERE id > %s AND id <= %s",
+                           (int(since), upto))
+            new_users = np.array([row[0] for row in cursor.fetchall()], dtype=np.int64)
+
+        books = 0
+        pairs = 0
+        matrix = None
+        if full or len(new_users):
+            borrowers = None
+            if full:
+                matrix = borrow_matrix(*load_borrowings(connection, upto))
+                book_ids = np.flatnonzero(np.bincount(matrix.indices, minlength=matrix.shape[1]))
+            else:
+                # Every borrower of an affected book, with all of their
+                # loans: exactly what those books' co-borrowing counts need
+                book_ids = _distinct(connection, 'book_id', 'user_id', new_users, upto)
+                users = _distinct(connection, 'user_id', 'book_id', book_ids, upto)
+                matrix = borrow_matrix(*load_borrowings(connection, upto, users))
+                # The other books are only partly in it; count theirs in MySQL
+                others = np.flatnonzero(np.bincount(matrix.indices, minlength=matrix.shape[1]))
+                borrowers = borrower_counts(connection, others, upto, matrix.shape[1])
+
+            chunk = []
+            for item in top_neighbours(matrix, book_ids, borrowers=borrowers):
+                chunk.append(item)
+                if len(chunk) == chunk_size:
+                    pairs += _write_chunk(connection, chunk, started)
+                    books += len(chunk)
+                    chunk = []
+            if chunk:
+                pairs += _write_chunk(connection, chunk, started)
+                books += len(chunk)
+
+        if full:
+            # Books that no longer have any loans
+            cursor.execute("DELETE FROM book_recommendations WHERE computed_at < %s", (started,))
+            _set_state(cursor, 'rebuilt_at', started)
+        _set_state(cursor, 'loans_until', upto)
+    finally:
+        cursor.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': 'rebuild' if full else 'incremental',
+        'loans_until': upto,
+        'matrix': {'users': int(matrix.shape[0]), 'books': int(matrix.shape[1]),
+                   'borrowings': int(matrix.nnz)} if matrix is not None else None,
+        'books_updated': books,
+        'pairs_written': pairs,
+        'seconds': round(elapsed, 2),
+        'books_per_sec': round(books / elapsed) if elapsed else None
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Build or refresh the co-borrowing recommendations')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Recompute every book instead of only those affected by new loans')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, metavar='N',
+                        help=f'Books written per transaction (default: {CHUNK_SIZE})')
+    args = parser.parse_args()
+
+    connection = connect_to_database()
+    try:
+        with named_lock(connection, LOCK_NAME) as locked:
+            if not locked:
+                print(json.dumps({'success': False,
+                                  'error': 'Another recommendations refresh is in progress'}))
+                sys.exit(1)
+            results = refresh_recommendations(connection, args.rebuild, args.chunk_size)
+        print(json.dumps({'success': True, 'database': DB_CONFIG['database'], **results}))
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Book search index builder
+Maintains a trigram and phonetic (Soundex) inverted index over book titles,
+authors, publishers and ISBNs in MySQL, so searchService can find fuzzy
+matches with index probes instead of scanning books with LIKE '%term%'
+"""
+
+import re
+import sys
+import json
+import time
+import argparse
+import unicodedata
+
+from generate_report import DB_CONFIG, connect_to_database
+from batch_lock import named_lock
+
+# Books indexed per transaction
+CHUNK_SIZE = 1000
+
+LOCK_NAME = 'library_search_index'
+
+# Kept in sync with config/db-schema.sql; created here too so the index can
+# be added to an existing database by just running this script
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS book_search_terms (
+      kind ENUM('trigram', 'phonetic') NOT NULL,
+      term VARCHAR(4) CHARACTER SET ascii COLLATE ascii_bin NOT NULL,
+      book_id INT NOT NULL,
+      PRIMARY KEY (kind, term, book_id),
+      INDEX idx_book_id (book_id),
+      FOREIGN KEY (book_id) REFERENCES books(id) ON DELETE CASCADE
+    ) ENGINE=InnoDB
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS search_index_state (
+      name VARCHAR(50) PRIMARY KEY,
+      value VARCHAR(255) NOT NULL
+    ) ENGINE=InnoDB
+    """
+]
+
+SOUNDEX_CODES = {}
+for letters, code in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6')):
+    SOUNDEX_CODES.update(dict.fromkeys(letters, code))
+
+def words(text):
+    """Lowercase ASCII words of `text` (accents stripped, punctuation dropped)
+
+    Must match normalizeWords in services/searchService.js. Words in other
+    scripts are dropped; searchService sends queries containing them to its
+    LIKE search.
+    """
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return re.sub(r'[^a-z0-9]+', ' ', text).split()
+
+def trigrams(word):
+    """Trigrams of `word` padded like pg_trgm: two spaces before, one after"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def soundex(word):
+    """American Soundex code of `word`, or None for words not starting with a letter"""
+    if not word or not word[0].isalpha():
+        return None
+    code = word[0].upper()
+    previous = SOUNDEX_CODES.get(word[0])
+    for char in word[1:]:
+        digit = SOUNDEX_CODES.get(char)
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'hw':
+            previous = digit
+    return code.ljust(4, '0')
+
+def book_terms(book):
+    """Index terms of one book as a set of (kind, term)"""
+    terms = set()
+    isbn = re.sub(r'[^0-9a-z]', '', (book['isbn'] or '').lower())
+    for word in words(book['title']) + words(book['author']) + words(book['publisher']) + ([isbn] if isbn else []):
+        terms.update(('trigram', gram) for gram in trigrams(word))
+        # Phonetic keys only for real words; short ones match too much
+        if len(word) >= 3:
+            key = soundex(word)
+            if key:
+                terms.add(('phonetic', key))
+    return terms
+
+def _get_state(cursor, name):
+    cursor.execute("SELECT value FROM search_index_state WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def _set_state(cursor, name, value):
+    cursor.execute(
+        "INSERT INTO search_index_state (name, value) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE value = VALUES(value)",
+        (name, str(value))
+    )
+
+def ensure_schema(connection):
+    """Create the index tables and the books.updated_at index refreshes rely on"""
+    cursor = connection.cursor()
+    try:
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'books' AND index_name = 'idx_updated_at'
+        """)
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("ALTER TABLE books ADD INDEX idx_updated_at (updated_at)")
+    finally:
+        cursor.close()
+
+def _index_chunk(connection, books):
+    """Replace the terms of `books` in one transaction; returns the number of terms written"""
+    rows = [(kind, term, book['id']) for book in books for kind, term in book_terms(book)]
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        placeholders = ', '.join(['%s'] * len(books))
+        cursor.execute(f"DELETE FROM book_search_terms WHERE book_id IN ({placeholders})",
+                       [book['id'] for book in books])
+        if rows:
+            # executemany turns this into one multi-row INSERT
+            cursor.executemany(
+                "INSERT INTO book_search_terms (kind, term, book_id) VALUES (%s, %s, %s)", rows)
+        connection.commit()
+        return len(rows)
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def refresh_index(connection, rebuild=False, chunk_size=CHUNK_SIZE):
+    """Index books changed since the last refresh (all books on the first run or with `rebuild`)
+
+    The high-water mark is the server time when the refresh started, so a
+    book updated while it runs is picked up again next time; re-indexing a
+    book is idempotent.
+    """
+    connection.autocommit = True
+    ensure_schema(connection)
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT NOW() as now")
+        started = cursor.fetchone()['now']
+        state = connection.cursor()
+        since = None if rebuild else _get_state(state, 'indexed_until')
+        if since is None:
+            # Without a state row searchService falls back to its LIKE
+            # queries, so searches never see a half-built index
+            state.execute("DELETE FROM search_index_state WHERE name = 'indexed_until'")
+            state.execute("DELETE FROM book_search_terms")
+
+        start = time.perf_counter()
+        books = 0
+        terms = 0
+        after = None
+        while True:
+            # Keyset pagination over (updated_at, id), backed by idx_updated_at
+            clauses = []
+            params = []
+            if since is not None:
+                clauses.append("updated_at >= %s")
+                params.append(since)
+            if after is not None:
+                clauses.append("(updated_at > %s OR (updated_at = %s AND id > %s))")
+                params += [after[0], after[0], after[1]]
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            cursor.execute(f"""
+                SELECT id, title, author, publisher, isbn, updated_at
+                FROM books
+                {where}
+                ORDER BY updated_at, id
+                LIMIT %s
+            """, params + [chunk_size])
+            chunk = cursor.fetchall()
+            if not chunk:
+                break
+            terms += _index_chunk(connection, chunk)
+            books += len(chunk)
+            after = (chunk[-1]['updated_at'], chunk[-1]['id'])
+
+        _set_state(state, 'indexed_until', started)
+        state.close()
+    finally:
+        cursor.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'mode': 'rebuild' if since is None else 'incremental',
+        'indexed_until': str(started),
+        'books_indexed': books,
+        'terms_written': terms,
+        'seconds': round(elapsed, 2),
+        'books_per_sec': round(books / elapsed) if elapsed else None
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Build or refresh the book search index')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Re-index every book instead of only those changed since the last run')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, metavar='N',
+                        help=f'Books indexed per transaction (default: {CHUNK_SIZE})')
+    args = parser.parse_args()
+
+    connection = connect_to_database()
+    try:
+        with named_lock(connection, LOCK_NAME) as locked:
+            if not locked:
+                print(json.dumps({'success': False,
+                                  'error': 'Another search index refresh is in progress'}))
+                sys.exit(1)
+            results = refresh_index(connection, args.rebuild, args.chunk_size)
+        print(json.dumps({'success': True, 'database': DB_CONFIG['database'], **results}))
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
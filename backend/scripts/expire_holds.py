@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Hold expiry batch job
+Expires pending/available holds past their expiry time and charges the hold
+fee, one bounded chunk per transaction
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from decimal import Decimal
+
+from generate_report import DB_CONFIG, connect_to_database
+from batch_lock import named_lock
+
+# Fee charged for a hold that was never picked up (EGP)
+HOLD_FEE_AMOUNT = Decimal(os.getenv('HOLD_FEE_AMOUNT', '250.00'))
+
+# Holds expired per transaction
+CHUNK_SIZE = 1000
+
+LOCK_NAME = 'library_hold_expiry'
+
+def _expire_chunk(connection, now, after, chunk_size, dry_run):
+    """Expire the next `chunk_size` due holds after the (expiry_datetime, id) key `after`
+
+    `after` is None for the first chunk. Returns the last key seen and the
+    number of holds, or None when no due holds remain.
+    """
+    keyset = ""
+    params = [now]
+    if after:
+        keyset = "AND (h.expiry_datetime > %s OR (h.expiry_datetime = %s AND h.id > %s))"
+        params += [after[0], after[0], after[1]]
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        # Walks idx_expiry_datetime in (expiry_datetime, id) order, so each
+        # chunk is a short index range scan; FOR UPDATE keeps a concurrent
+        # pickup or cancellation from racing the status change. The date
+        # format uses %S, not %s, which the driver would take for a parameter
+        cursor.execute(f"""
+            SELECT h.id, h.user_id, h.expiry_datetime,
+                   CONCAT('Fee for expired hold on book: ', b.title, '. Hold expired on ',
+                          DATE_FORMAT(h.expiry_datetime, '%c/%e/%Y, %l:%i:%S %p')) as description
+            FROM holds h
+            JOIN books b ON h.book_id = b.id
+            WHERE h.expiry_datetime < %s
+            {keyset}
+            AND h.status IN ('pending', 'available')
+            AND h.fee_applied = FALSE
+            ORDER BY h.expiry_datetime, h.id
+            LIMIT %s
+            FOR UPDATE
+        """, params + [chunk_size])
+        holds = cursor.fetchall()
+        if not holds:
+            connection.rollback()
+            return None
+
+        if dry_run:
+            connection.rollback()
+        else:
+            placeholders = ', '.join(['%s'] * len(holds))
+            cursor.execute(f"""
+                UPDATE holds SET status = 'expired', fee_amount = %s, fee_applied = TRUE
+                WHERE id IN ({placeholders})
+            """, [HOLD_FEE_AMOUNT] + [hold[0] for hold in holds])
+            # executemany turns this into one multi-row INSERT
+            cursor.executemany("""
+                INSERT INTO fines (user_id, hold_id, amount, type, status, description)
+                VALUES (%s, %s, %s, 'hold_expiry', 'pending', %s)
+            """, [(user_id, hold_id, HOLD_FEE_AMOUNT, description)
+                  for hold_id, user_id, _, description in holds])
+            connection.commit()
+        last = holds[-1]
+        return (last[2], last[0]), len(holds)
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def process_expired_holds(connection, now=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """Expire every due hold and create its fee; safe to re-run at any time
+
+    A hold and its fine are written in the same transaction, and expired
+    holds (fee_applied = TRUE) are never picked up again.
+    """
+    now = now or datetime.now().replace(microsecond=0)
+    # Statements outside a chunk's explicit transaction commit on their own
+    connection.autocommit = True
+    start = time.perf_counter()
+    expired = 0
+    chunks = 0
+    after = None
+    while True:
+        result = _expire_chunk(connection, now, after, chunk_size, dry_run)
+        if result is None:
+            break
+        after, count = result
+        expired += count
+        chunks += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'now': now.isoformat(sep=' '),
+        'holds_expired': expired,
+        'fees_applied': 0 if dry_run else expired,
+        'fee_amount': str(HOLD_FEE_AMOUNT),
+        'chunks': chunks,
+        'dry_run': dry_run,
+        'seconds': round(elapsed, 2),
+        'holds_per_sec': round(expired / elapsed) if elapsed else None
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Expire overdue holds and charge the hold fee')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, metavar='N',
+                        help=f'Holds expired per transaction (default: {CHUNK_SIZE})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report what would be expired without writing anything')
+    args = parser.parse_args()
+
+    connection = connect_to_database()
+    try:
+        with named_lock(connection, LOCK_NAME) as locked:
+            if not locked:
+                print(json.dumps({'success': False,
+                                  'error': 'Another hold expiry run is in progress'}))
+                sys.exit(1)
+            results = process_expired_holds(connection, chunk_size=args.chunk_size,
+                                            dry_run=args.dry_run)
+        print(json.dumps({'success': True, 'database': DB_CONFIG['database'], **results}))
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
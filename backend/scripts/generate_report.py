@@ -6,22 +6,28 @@ Generates PDF reports with graphs using LaTeX and matplotlib
 
 import sys
 import json
+import argparse
 import os
-import subprocess
 import tempfile
-from datetime import datetime
-import mysql.connector
-from mysql.connector import Error
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
-import numpy as np
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+import queue
+import threading
+import signal
+import time
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from xml.sax.saxutils import escape
+# mysql.connector, matplotlib and reportlab are imported where they are
+# first needed, so runs that never touch a stack don't pay to load it
+from report_rollup import ROLLUP_PATH, months_ago, rollup_statistics
+from report_cache import ChartCache
+from report_timing import Timings, profiled
+from report_export import EXPORTS, EXPORT_FORMATS, EXPORT_BATCH_SIZE, export_tables
+from report_batch import load_manifest, fetch_aggregates, slice_statistics
+from report_analytics import fetch_loan_columns, loan_analytics
+from report_snapshot import read_snapshot, snapshot_age, snapshot_label, is_fresh
 
 # Configuration
 DB_CONFIG = {
@@ -31,184 +37,738 @@ DB_CONFIG = {
     'database': os.getenv('DB_NAME', 'library_system')
 }
 
+# Optional read replica for report queries; unset settings fall back to the
+# primary's, so usually only DB_REPLICA_HOST (and read-only credentials) are set
+REPLICA_SETTINGS = {
+    'host': 'DB_REPLICA_HOST',
+    'port': 'DB_REPLICA_PORT',
+    'user': 'DB_REPLICA_USER',
+    'password': 'DB_REPLICA_PASSWORD'
+}
+
+# Connections used to run the statistics queries concurrently
+STATS_POOL_SIZE = int(os.getenv('REPORT_DB_POOL_SIZE', '4'))
+
+# Pooled connections idle longer than this are pinged before reuse
+POOL_IDLE_CHECK_SECONDS = 60
+
+# Seconds to wait for a connection, and retries (with doubling backoff
+# starting at DB_RETRY_BACKOFF_SECONDS) of a failed connect or transient error
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', '10'))
+DB_RETRIES = int(os.getenv('DB_RETRIES', '3'))
+DB_RETRY_BACKOFF_SECONDS = float(os.getenv('DB_RETRY_BACKOFF_SECONDS', '0.5'))
+
+# Server-side limit on each report SELECT (max_execution_time); 0 disables it
+REPORT_QUERY_TIMEOUT = float(os.getenv('REPORT_QUERY_TIMEOUT', '300'))
+
+# After the replica fails, report connections go to the primary this long
+# before the replica is tried again
+REPLICA_RETRY_SECONDS = 60
+
+# Connect errors retrying cannot fix: access denied, unknown database
+FATAL_CONNECT_ERRORS = (1044, 1045, 1049)
+
+# Deadlock, lock wait timeout and lost connections; a read-only report can
+# simply run again
+TRANSIENT_ERRORS = (1205, 1213, 2006, 2013, 2055)
+
+_replica_down_until = 0
+
+def _backoff(attempt):
+    time.sleep(DB_RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+def _open_connection(config, query_timeout=0):
+    """Connect to `config`, retrying failed attempts with backoff"""
+    import mysql.connector
+    from mysql.connector import Error
+    for attempt in range(DB_RETRIES + 1):
+        try:
+            connection = mysql.connector.connect(connection_timeout=DB_CONNECT_TIMEOUT, **config)
+            break
+        except Error as e:
+            if attempt == DB_RETRIES or e.errno in FATAL_CONNECT_ERRORS:
+                raise
+            _backoff(attempt)
+    if query_timeout:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SET SESSION max_execution_time = %s", (int(query_timeout * 1000),))
+        except Error:
+            pass  # Servers without max_execution_time (MariaDB, MySQL < 5.7.8)
+        finally:
+            cursor.close()
+    return connection
+
+def replica_config():
+    """Connection settings of the read replica, or None when none is configured"""
+    if not os.getenv(REPLICA_SETTINGS['host']):
+        return None
+    config = dict(DB_CONFIG)
+    for key, variable in REPLICA_SETTINGS.items():
+        if os.getenv(variable):
+            config[key] = int(os.getenv(variable)) if key == 'port' else os.getenv(variable)
+    return config
+
 def connect_to_database():
     """Connect to MySQL database"""
+    from mysql.connector import Error
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
+        return _open_connection(DB_CONFIG)
     except Error as e:
         print(f"Error connecting to database: {e}", file=sys.stderr)
         sys.exit(1)
 
-def get_statistics(connection):
-    """Fetch statistics from database"""
-    cursor = connection.cursor(dictionary=True)
-    stats = {}
-    
-    # Total books
-    cursor.execute("SELECT COUNT(*) as total FROM books")
-    stats['total_books'] = cursor.fetchone()['total']
-    
-    cursor.execute("SELECT SUM(total_copies) as total FROM books")
-    result = cursor.fetchone()
-    stats['total_copies'] = result['total'] if result['total'] else 0
-    
-    cursor.execute("SELECT SUM(available_copies) as total FROM books")
-    result = cursor.fetchone()
-    stats['available_copies'] = result['total'] if result['total'] else 0
-    
-    # Total users
-    cursor.execute("SELECT COUNT(*) as total FROM users WHERE role = 'user'")
-    stats['total_users'] = cursor.fetchone()['total']
-    
-    # Total loans
-    cursor.execute("SELECT COUNT(*) as total FROM loans")
-    stats['total_loans'] = cursor.fetchone()['total']
-    
-    cursor.execute("SELECT COUNT(*) as total FROM loans WHERE status = 'active'")
-    stats['active_loans'] = cursor.fetchone()['total']
-    
-    cursor.execute("SELECT COUNT(*) as total FROM loans WHERE status = 'returned'")
-    stats['returned_loans'] = cursor.fetchone()['total']
-    
-    # Overdue loans
-    cursor.execute("""
-        SELECT COUNT(*) as total FROM loans 
-        WHERE status = 'active' AND due_date < CURDATE()
-    """)
-    stats['overdue_loans'] = cursor.fetchone()['total']
-    
-    # Total fines
-    cursor.execute("SELECT SUM(amount) as total FROM fines WHERE status = 'pending'")
-    result = cursor.fetchone()
-    stats['total_fines'] = float(result['total']) if result['total'] else 0.0
-    
-    # Total holds
-    cursor.execute("SELECT COUNT(*) as total FROM holds WHERE status IN ('pending', 'available')")
-    stats['active_holds'] = cursor.fetchone()['total']
-    
-    # Loans by month (last 12 months)
-    cursor.execute("""
+def connect_for_reports(query_timeout=REPORT_QUERY_TIMEOUT):
+    """Connect for read-only report queries
+
+    Uses the read replica when one is configured and reachable, and falls
+    back to the primary otherwise. Each SELECT is limited to
+    `query_timeout` seconds on the server. Raises mysql.connector.Error if
+    neither can be reached.
+    """
+    global _replica_down_until
+    from mysql.connector import Error
+    config = replica_config()
+    if config and time.monotonic() >= _replica_down_until:
+        try:
+            return _open_connection(config, query_timeout)
+        except Error as e:
+            _replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+            print(f"Read replica unavailable, using the primary: {e}", file=sys.stderr)
+    return _open_connection(DB_CONFIG, query_timeout)
+
+def with_retries(operation):
+    """Call `operation()`, calling it again after a transient database error"""
+    from mysql.connector import Error
+    for attempt in range(DB_RETRIES + 1):
+        try:
+            return operation()
+        except Error as e:
+            if attempt == DB_RETRIES or e.errno not in TRANSIENT_ERRORS:
+                raise
+            print(f"Retrying after database error: {e}", file=sys.stderr)
+            _backoff(attempt)
+
+class ConnectionPool:
+    """Small blocking pool of database connections shared by report queries
+
+    Connections are opened lazily up to `size` (see connect_for_reports);
+    callers block until one is released instead of failing when the pool
+    is exhausted.
+    """
+
+    def __init__(self, size=STATS_POOL_SIZE):
+        from mysql.connector import Error
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        # Open the first connection eagerly so bad credentials fail fast
+        try:
+            self._idle.put((connect_for_reports(), time.monotonic()))
+        except Error as e:
+            print(f"Error connecting to database: {e}", file=sys.stderr)
+            sys.exit(1)
+        self._opened = 1
+
+    def acquire(self):
+        """Take an idle connection, opening a new one if under the limit"""
+        from mysql.connector import Error
+        try:
+            return self._checked(*self._idle.get_nowait())
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return connect_for_reports()
+                except Error:
+                    self._opened -= 1
+                    raise
+        return self._checked(*self._idle.get())
+
+    def _checked(self, connection, released_at):
+        # Connections idle for a while (e.g. in --serve mode) may have been
+        # dropped by the server's wait_timeout
+        if time.monotonic() - released_at > POOL_IDLE_CHECK_SECONDS:
+            connection.ping(reconnect=True, attempts=2, delay=1)
+        return connection
+
+    def release(self, connection):
+        """Return a connection to the pool"""
+        self._idle.put((connection, time.monotonic()))
+
+    def discard(self, connection):
+        """Close a broken connection instead of returning it to the pool"""
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._opened -= 1
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            # A connection lost mid-query would fail whoever gets it next
+            if connection.is_connected():
+                self.release(connection)
+            else:
+                self.discard(connection)
+            raise
+        else:
+            self.release(connection)
+
+    @contextmanager
+    def snapshot(self):
+        """A connection inside a read-only consistent-snapshot transaction
+
+        Every query run on it sees the database as of the same moment, so
+        figures like active + returned vs total loans always agree. Being
+        one connection, the queries run one after another.
+        """
+        from mysql.connector import Error
+        with self.connection() as connection:
+            connection.start_transaction(consistent_snapshot=True,
+                                         isolation_level='REPEATABLE READ', readonly=True)
+            try:
+                yield connection
+            finally:
+                try:
+                    connection.rollback()  # Nothing to commit
+                except Error:
+                    pass  # Lost connection; connection() discards it
+
+    def close(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                break
+
+class SingleConnectionPool:
+    """ConnectionPool interface over one connection, e.g. a snapshot's"""
+
+    size = 1
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    @contextmanager
+    def connection(self):
+        yield self._connection
+
+def report_period(filters=None):
+    """Loan-date window of the report as (start, end exclusive, label)
+
+    Without --from/--to this is the rolling 12 months the report always
+    showed; with only --to it is the 12 months ending on that date.
+    """
+    filters = filters or {}
+    date_to = filters.get('date_to')
+    end = (date_to or date.today()) + timedelta(days=1)
+    start = filters.get('date_from') or months_ago(end - timedelta(days=1), 12)
+    if filters.get('date_from') or date_to:
+        label = f"{start.isoformat()} to {(end - timedelta(days=1)).isoformat()}"
+    else:
+        label = 'Last 12 Months'
+    if filters.get('category'):
+        label += f", {filters['category']}"
+    return start, end, label
+
+def _loan_scope(filters, alias='loans'):
+    """WHERE clauses and params limiting loans to the report's date range and category
+
+    Every predicate is a plain range or IN on an indexed column, so MySQL can
+    use idx_loan_date_status / idx_book_loan_date instead of scanning.
+    """
+    clauses = []
+    params = []
+    if filters.get('date_from'):
+        clauses.append(f"{alias}.loan_date >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        clauses.append(f"{alias}.loan_date < %s")
+        params.append(filters['date_to'] + timedelta(days=1))
+    if filters.get('category'):
+        clauses.append(f"{alias}.book_id IN (SELECT id FROM books WHERE category = %s)")
+        params.append(filters['category'])
+    return clauses, params
+
+def _created_scope(filters, column):
+    clauses = []
+    params = []
+    if filters.get('date_from'):
+        clauses.append(f"{column} >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        clauses.append(f"{column} < %s")
+        params.append(filters['date_to'] + timedelta(days=1))
+    return clauses, params
+
+def _where(clauses):
+    return f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+def build_queries(filters=None):
+    """Statistics queries for `filters` as {name: (sql, params, many)}
+
+    Scalar KPIs use one conditional-aggregation query per table, so each
+    table is read once no matter how many figures are derived from it.
+    Catalog figures honour only the category; loan, fine and hold figures
+    also honour the date range.
+    """
+    filters = filters or {}
+    category = filters.get('category')
+    queries = {}
+
+    # Books
+    book_clauses = ["category = %s"] if category else []
+    queries['books'] = (f"""
+        SELECT COUNT(*) as total_books,
+               COALESCE(SUM(total_copies), 0) as total_copies,
+               COALESCE(SUM(available_copies), 0) as available_copies
+        FROM books
+        {_where(book_clauses)}
+    """, [category] if category else [], False)
+
+    # Users
+    queries['users'] = ("SELECT COUNT(*) as total_users FROM users WHERE role = 'user'", [], False)
+
+    # Loans
+    clauses, params = _loan_scope(filters)
+    queries['loans'] = (f"""
+        SELECT COUNT(*) as total_loans,
+               COALESCE(SUM(status = 'active'), 0) as active_loans,
+               COALESCE(SUM(status = 'returned'), 0) as returned_loans,
+               COALESCE(SUM(status = 'active' AND due_date < CURDATE()), 0) as overdue_loans
+        FROM loans
+        {_where(clauses)}
+    """, params, False)
+
+    # Pending fines
+    clauses, params = _created_scope(filters, 'created_at')
+    clauses.insert(0, "status = 'pending'")
+    if category:
+        clauses.append("""(
+            loan_id IN (SELECT id FROM loans WHERE book_id IN (SELECT id FROM books WHERE category = %s))
+            OR hold_id IN (SELECT id FROM holds WHERE book_id IN (SELECT id FROM books WHERE category = %s))
+        )""")
+        params += [category, category]
+    queries['fines'] = (f"""
+        SELECT COALESCE(SUM(amount), 0) as total_fines FROM fines
+        {_where(clauses)}
+    """, params, False)
+
+    # Active holds
+    clauses, params = _created_scope(filters, 'hold_date')
+    clauses.insert(0, "status IN ('pending', 'available')")
+    if category:
+        clauses.append("book_id IN (SELECT id FROM books WHERE category = %s)")
+        params.append(category)
+    queries['holds'] = (f"""
+        SELECT COUNT(*) as active_holds FROM holds
+        {_where(clauses)}
+    """, params, False)
+
+    # Loans by month (last 12 months unless a range is given)
+    start, end, _ = report_period(filters)
+    clauses, params = _loan_scope({'category': category})
+    clauses = ["loans.loan_date >= %s", "loans.loan_date < %s"] + clauses
+    queries['loans_by_month'] = (f"""
         SELECT DATE_FORMAT(loan_date, '%Y-%m') as month, COUNT(*) as count
         FROM loans
-        WHERE loan_date >= DATE_SUB(CURDATE(), INTERVAL 12 MONTH)
+        {_where(clauses)}
         GROUP BY month
         ORDER BY month
-    """)
-    stats['loans_by_month'] = cursor.fetchall()
-    
+    """, [start, end] + params, True)
+
     # Books by category
-    cursor.execute("""
+    queries['books_by_category'] = (f"""
         SELECT category, COUNT(*) as count
         FROM books
-        WHERE category IS NOT NULL
+        WHERE category IS NOT NULL {"AND category = %s" if category else ""}
         GROUP BY category
         ORDER BY count DESC
         LIMIT 10
-    """)
-    stats['books_by_category'] = cursor.fetchall()
-    
+    """, [category] if category else [], True)
+
     # Most borrowed books
-    cursor.execute("""
-        SELECT b.title, b.author, COUNT(l.id) as borrow_count
-        FROM books b
-        LEFT JOIN loans l ON b.id = l.book_id
-        GROUP BY b.id, b.title, b.author
-        ORDER BY borrow_count DESC
-        LIMIT 10
-    """)
-    stats['most_borrowed'] = cursor.fetchall()
-    
-    cursor.close()
+    clauses, params = _loan_scope(filters)
+    if clauses:
+        # Count the scoped loans per book first, then join only the top 10
+        queries['most_borrowed'] = (f"""
+            SELECT b.title, b.author, top.borrow_count
+            FROM (
+                SELECT loans.book_id, COUNT(*) as borrow_count
+                FROM loans
+                {_where(clauses)}
+                GROUP BY loans.book_id
+                ORDER BY borrow_count DESC
+                LIMIT 10
+            ) top
+            JOIN books b ON b.id = top.book_id
+            ORDER BY top.borrow_count DESC
+        """, params, True)
+    else:
+        queries['most_borrowed'] = ("""
+            SELECT b.title, b.author, COUNT(l.id) as borrow_count
+            FROM books b
+            LEFT JOIN loans l ON b.id = l.book_id
+            GROUP BY b.id, b.title, b.author
+            ORDER BY borrow_count DESC
+            LIMIT 10
+        """, [], True)
+
+    return queries
+
+def run_query(connection, sql, params=(), many=False):
+    """Execute a single query and return one row or all rows as dicts"""
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall() if many else cursor.fetchone()
+    finally:
+        cursor.close()
+
+def _run_timed_query(db, timings, name, sql, params, many):
+    """run_query on a connection or a ConnectionPool, recorded as query span `name`"""
+    if isinstance(db, ConnectionPool):
+        with db.connection() as connection:
+            return _run_timed_query(connection, timings, name, sql, params, many)
+    with timings.span('queries', name) as span:
+        result = run_query(db, sql, params, many)
+        span['rows'] = len(result) if many else int(result is not None)
+    return result
+
+def _rollup_statistics(db, rollup_path, rebuild, filters, timings):
+    if isinstance(db, ConnectionPool):
+        with db.connection() as connection:
+            return _rollup_statistics(connection, rollup_path, rebuild, filters, timings)
+    source = f"{DB_CONFIG['host']}/{DB_CONFIG['database']}"
+    start, end, _ = report_period(filters)
+    top_books = not (filters.get('date_from') or filters.get('date_to'))
+    with timings.span('queries', 'rollup') as span:
+        result = rollup_statistics(db, source, rollup_path, rebuild, start, end, top_books)
+        span['rows'] = sum(len(rows) for rows in result.values())
+    return result
+
+def _loan_analytics(db, filters, timings):
+    if isinstance(db, ConnectionPool):
+        with db.connection() as connection:
+            return _loan_analytics(connection, filters, timings)
+    clauses, params = _loan_scope(filters)
+    with timings.span('queries', 'loan_analytics') as span:
+        columns = fetch_loan_columns(db, _where(clauses), params)
+        span['rows'] = columns.rows
+        return loan_analytics(columns)
+
+def get_statistics(db, rollup_path=None, rebuild=False, filters=None, timings=None, analytics=False):
+    """Fetch statistics from database
+
+    `db` is either a single connection (queries run one after another) or a
+    ConnectionPool, in which case the independent queries run concurrently.
+    `filters` may hold `date_from`/`date_to` (dates, inclusive) and
+    `category`. With `rollup_path`, `loans_by_month` (and `most_borrowed`
+    when there is no date range) come from the incremental rollup store
+    instead of scanning the loans table; the store does not know
+    categories, so a category filter always queries MySQL. Each query is
+    recorded as a span in `timings` when given. With `analytics`, the
+    scoped loans are also streamed into NumPy arrays for the
+    `loan_analytics` figures (see report_analytics).
+    """
+    filters = filters or {}
+    timings = timings or Timings()
+    queries = build_queries(filters)
+    if filters.get('category'):
+        rollup_path = None
+    if rollup_path:
+        del queries['loans_by_month']
+        if not (filters.get('date_from') or filters.get('date_to')):
+            del queries['most_borrowed']
+
+    if isinstance(db, ConnectionPool):
+        with ThreadPoolExecutor(max_workers=db.size) as executor:
+            futures = {
+                name: executor.submit(_run_timed_query, db, timings, name, sql, params, many)
+                for name, (sql, params, many) in queries.items()
+            }
+            if rollup_path:
+                futures['rollup'] = executor.submit(
+                    _rollup_statistics, db, rollup_path, rebuild, filters, timings)
+            if analytics:
+                futures['loan_analytics'] = executor.submit(_loan_analytics, db, filters, timings)
+            results = {name: future.result() for name, future in futures.items()}
+    else:
+        results = {name: _run_timed_query(db, timings, name, sql, params, many)
+                   for name, (sql, params, many) in queries.items()}
+        if rollup_path:
+            results['rollup'] = _rollup_statistics(db, rollup_path, rebuild, filters, timings)
+        if analytics:
+            results['loan_analytics'] = _loan_analytics(db, filters, timings)
+
+    if rollup_path:
+        results.update(results.pop('rollup'))
+
+    books = results['books']
+    loans = results['loans']
+    stats = {
+        'total_books': int(books['total_books']),
+        'total_copies': int(books['total_copies']),
+        'available_copies': int(books['available_copies']),
+        'total_users': int(results['users']['total_users']),
+        'total_loans': int(loans['total_loans']),
+        'active_loans': int(loans['active_loans']),
+        'returned_loans': int(loans['returned_loans']),
+        'overdue_loans': int(loans['overdue_loans']),
+        'total_fines': float(results['fines']['total_fines']),
+        'active_holds': int(results['holds']['active_holds']),
+        'loans_by_month': results['loans_by_month'],
+        'books_by_category': results['books_by_category'],
+        'most_borrowed': results['most_borrowed'],
+        'period': report_period(filters)[2]
+    }
+    if analytics:
+        stats['loan_analytics'] = results['loan_analytics']
     return stats
 
-def generate_graphs(stats, output_dir):
-    """Generate graphs using matplotlib"""
-    graphs = []
-    
+# Resolution of the rasterized charts
+CHART_DPI = 300
+
+# raster: matplotlib PNGs; vector: native reportlab drawings
+CHART_MODES = ('raster', 'vector')
+
+# Typesetters of the PDF: reportlab in process, or pdflatex (report_latex)
+PDF_BACKENDS = ('reportlab', 'latex')
+
+def chart_params():
+    """Settings outside the renderers that affect chart output (cache key input)"""
+    import matplotlib
+    return {'dpi': CHART_DPI, 'matplotlib': matplotlib.__version__}
+
+def _new_figure(figsize):
+    # Figure renders through the Agg canvas on savefig; pyplot (and its GUI
+    # backend selection) is never loaded
+    from matplotlib.figure import Figure
+    return Figure(figsize=figsize)
+
+def _render_loans_by_month(data, target):
+    months = [row['month'] for row in data['rows']]
+    counts = [row['count'] for row in data['rows']]
+
+    fig = _new_figure((10, 6))
+    ax = fig.subplots()
+    ax.plot(months, counts, marker='o', linewidth=2, markersize=8)
+    ax.set_title(f"Loans by Month ({data['period']})", fontsize=14, fontweight='bold')
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Number of Loans', fontsize=12)
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(target, format='png', dpi=CHART_DPI, bbox_inches='tight')
+
+def _render_books_by_category(rows, target):
+    categories = [row['category'][:20] for row in rows]  # Truncate long names
+    counts = [row['count'] for row in rows]
+
+    fig = _new_figure((10, 6))
+    ax = fig.subplots()
+    ax.barh(categories, counts, color='steelblue')
+    ax.set_title('Books by Category (Top 10)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Number of Books', fontsize=12)
+    ax.set_ylabel('Category', fontsize=12)
+    fig.tight_layout()
+    fig.savefig(target, format='png', dpi=CHART_DPI, bbox_inches='tight')
+
+def _render_most_borrowed(rows, target):
+    titles = [row['title'][:30] + '...' if len(row['title']) > 30 else row['title']
+              for row in rows]
+    counts = [row['borrow_count'] for row in rows]
+
+    fig = _new_figure((10, 6))
+    ax = fig.subplots()
+    ax.barh(titles, counts, color='darkgreen')
+    ax.set_title('Most Borrowed Books (Top 10)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Number of Borrows', fontsize=12)
+    ax.set_ylabel('Book Title', fontsize=12)
+    fig.tight_layout()
+    fig.savefig(target, format='png', dpi=CHART_DPI, bbox_inches='tight')
+
+def _render_loan_status(sizes, target):
+    fig = _new_figure((8, 8))
+    ax = fig.subplots()
+    labels = ['Active', 'Returned', 'Overdue']
+    colors = ['#3498db', '#2ecc71', '#e74c3c']
+    explode = (0.05, 0, 0.1)
+
+    ax.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%',
+           shadow=True, startangle=90, textprops={'fontsize': 12})
+    ax.set_title('Loan Status Distribution', fontsize=14, fontweight='bold')
+    ax.axis('equal')
+    fig.savefig(target, format='png', dpi=CHART_DPI, bbox_inches='tight')
+
+def _render_histogram(data, target):
+    labels = [row['label'] for row in data['rows']]
+    counts = [row['count'] for row in data['rows']]
+
+    fig = _new_figure((10, 6))
+    ax = fig.subplots()
+    ax.bar(labels, counts, color=data['color'])
+    ax.set_title(data['title'], fontsize=14, fontweight='bold')
+    ax.set_xlabel(data['xlabel'], fontsize=12)
+    ax.set_ylabel('Number of Loans', fontsize=12)
+    ax.grid(True, axis='y', alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(target, format='png', dpi=CHART_DPI, bbox_inches='tight')
+
+def _render_weekday_load(rows, target):
+    days = [row['day'] for row in rows]
+    positions = range(len(days))
+
+    fig = _new_figure((10, 6))
+    ax = fig.subplots()
+    ax.bar([p - 0.2 for p in positions], [row['loans'] for row in rows], width=0.4,
+           color='#3498db', label='Loans')
+    ax.bar([p + 0.2 for p in positions], [row['returns'] for row in rows], width=0.4,
+           color='#2ecc71', label='Returns')
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(days)
+    ax.set_title('Desk Load by Weekday', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Weekday', fontsize=12)
+    ax.set_ylabel('Number of Loans', fontsize=12)
+    ax.legend()
+    ax.grid(True, axis='y', alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(target, format='png', dpi=CHART_DPI, bbox_inches='tight')
+
+def chart_tasks(stats):
+    """List the charts to draw for `stats` as (file name, renderer, data)"""
+    tasks = []
+
     # 1. Loans by Month
     if stats['loans_by_month']:
-        months = [row['month'] for row in stats['loans_by_month']]
-        counts = [row['count'] for row in stats['loans_by_month']]
-        
-        plt.figure(figsize=(10, 6))
-        plt.plot(months, counts, marker='o', linewidth=2, markersize=8)
-        plt.title('Loans by Month (Last 12 Months)', fontsize=14, fontweight='bold')
-        plt.xlabel('Month', fontsize=12)
-        plt.ylabel('Number of Loans', fontsize=12)
-        plt.xticks(rotation=45, ha='right')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        
-        graph_path = os.path.join(output_dir, 'loans_by_month.png')
-        plt.savefig(graph_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        graphs.append(graph_path)
-    
+        data = {'rows': stats['loans_by_month'], 'period': stats.get('period', 'Last 12 Months')}
+        tasks.append(('loans_by_month.png', _render_loans_by_month, data))
+
     # 2. Books by Category
     if stats['books_by_category']:
-        categories = [row['category'][:20] for row in stats['books_by_category']]  # Truncate long names
-        counts = [row['count'] for row in stats['books_by_category']]
-        
-        plt.figure(figsize=(10, 6))
-        plt.barh(categories, counts, color='steelblue')
-        plt.title('Books by Category (Top 10)', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Books', fontsize=12)
-        plt.ylabel('Category', fontsize=12)
-        plt.tight_layout()
-        
-        graph_path = os.path.join(output_dir, 'books_by_category.png')
-        plt.savefig(graph_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        graphs.append(graph_path)
-    
+        tasks.append(('books_by_category.png', _render_books_by_category, stats['books_by_category']))
+
     # 3. Most Borrowed Books
     if stats['most_borrowed']:
-        titles = [row['title'][:30] + '...' if len(row['title']) > 30 else row['title'] 
-                  for row in stats['most_borrowed']]
-        counts = [row['borrow_count'] for row in stats['most_borrowed']]
-        
-        plt.figure(figsize=(10, 6))
-        plt.barh(titles, counts, color='darkgreen')
-        plt.title('Most Borrowed Books (Top 10)', fontsize=14, fontweight='bold')
-        plt.xlabel('Number of Borrows', fontsize=12)
-        plt.ylabel('Book Title', fontsize=12)
-        plt.tight_layout()
-        
-        graph_path = os.path.join(output_dir, 'most_borrowed.png')
-        plt.savefig(graph_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        graphs.append(graph_path)
-    
+        tasks.append(('most_borrowed.png', _render_most_borrowed, stats['most_borrowed']))
+
     # 4. Loan Status Pie Chart
-    plt.figure(figsize=(8, 8))
-    labels = ['Active', 'Returned', 'Overdue']
-    sizes = [
-        stats['active_loans'],
-        stats['returned_loans'],
-        stats['overdue_loans']
-    ]
-    colors = ['#3498db', '#2ecc71', '#e74c3c']
-    explode = (0.05, 0, 0.1)
-    
-    plt.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%',
-            shadow=True, startangle=90, textprops={'fontsize': 12})
-    plt.title('Loan Status Distribution', fontsize=14, fontweight='bold')
-    plt.axis('equal')
-    
-    graph_path = os.path.join(output_dir, 'loan_status.png')
-    plt.savefig(graph_path, dpi=300, bbox_inches='tight')
-    plt.close()
-    graphs.append(graph_path)
-    
+    sizes = [stats['active_loans'], stats['returned_loans'], stats['overdue_loans']]
+    if sum(sizes):
+        tasks.append(('loan_status.png', _render_loan_status, sizes))
+
+    # 5-7. Loan analytics distributions
+    analytics = stats.get('loan_analytics')
+    if analytics and analytics['time_to_return']['returned']:
+        tasks.append(('loan_durations.png', _render_histogram, {
+            'rows': analytics['loan_durations'], 'title': 'Time to Return',
+            'xlabel': 'Days on Loan', 'color': 'steelblue'}))
+    if analytics and any(row['count'] for row in analytics['overdue_aging']):
+        tasks.append(('overdue_aging.png', _render_histogram, {
+            'rows': analytics['overdue_aging'], 'title': 'Overdue Aging',
+            'xlabel': 'Days Past Due', 'color': '#e74c3c'}))
+    if analytics and analytics['loans']:
+        tasks.append(('weekday_load.png', _render_weekday_load, analytics['weekday_load']))
+
+    return tasks
+
+def _render_chart(renderer, data):
+    buffer = io.BytesIO()
+    renderer(data, buffer)
+    return buffer.getvalue()
+
+def render_graphs(stats, jobs=None, cache=None, executor=None):
+    """Render the charts in memory; returns a list of (file name, PNG bytes)
+
+    Each chart is an independent task; with more than one job they are
+    rendered in a process pool of up to `jobs` workers (default: one per
+    CPU), or in `executor` when a long-lived pool is supplied. The output
+    is identical to a sequential run. Charts whose inputs are unchanged are
+    taken from `cache` instead of being re-rendered.
+    """
+    graphs = {}
+    tasks = []
+    keys = {}
+    params = chart_params() if cache else None
+    for name, renderer, data in chart_tasks(stats):
+        graphs[name] = None
+        if cache:
+            keys[name] = cache.key(renderer, data, params)
+            graphs[name] = cache.get(keys[name])
+            if graphs[name] is not None:
+                continue
+        tasks.append((name, renderer, data))
+
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    renderers = [(renderer, data) for _, renderer, data in tasks]
+    if executor and tasks:
+        rendered = list(executor.map(_render_chart, *zip(*renderers)))
+    elif jobs <= 1:
+        rendered = [_render_chart(*task) for task in renderers]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            rendered = list(executor.map(_render_chart, *zip(*renderers)))
+
+    for (name, _, _), png in zip(tasks, rendered):
+        graphs[name] = png
+        if cache:
+            cache.put(keys[name], png)
+    if cache:
+        cache.report()
+
+    return list(graphs.items())
+
+def generate_graphs(stats, output_dir, jobs=None, cache=None, executor=None):
+    """Generate graphs using matplotlib and write them into `output_dir`"""
+    graphs = []
+    for name, png in render_graphs(stats, jobs=jobs, cache=cache, executor=executor):
+        graph_path = os.path.join(output_dir, name)
+        with open(graph_path, 'wb') as f:
+            f.write(png)
+        graphs.append(graph_path)
     return graphs
 
-def generate_pdf_with_reportlab(stats, graphs, output_path):
-    """Generate PDF using reportlab (no LaTeX required)"""
+def generate_pdf_with_reportlab(stats, graphs, output_path, appendix=None):
+    """Generate PDF using reportlab (no LaTeX required)
+
+    `graphs` holds chart file paths, (file name, PNG bytes) pairs from
+    render_graphs or (file name, Drawing) pairs from build_vector_charts;
+    `output_path` may be a path or a writable binary file
+    object, in which case nothing touches the disk. `appendix` is an
+    optional iterable of catalog rows (see report_appendix), consumed while
+    the PDF is built to add the full catalog appendix.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, Image
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+
     # Create PDF document
-    doc = SimpleDocTemplate(output_path, pagesize=A4,
-                            rightMargin=72, leftMargin=72,
-                            topMargin=72, bottomMargin=18)
+    if appendix is None:
+        doc = SimpleDocTemplate(output_path, pagesize=A4,
+                                rightMargin=72, leftMargin=72,
+                                topMargin=72, bottomMargin=18)
+    else:
+        from report_appendix import StreamingDocTemplate, appendix_flowables
+        doc = StreamingDocTemplate(output_path, pagesize=A4,
+                                   rightMargin=72, leftMargin=72,
+                                   topMargin=72, bottomMargin=18)
+        # The frame keeps 6pt of padding on every side
+        doc.tail = appendix_flowables(appendix, doc.width - 12, doc.height - 12)
     
     # Container for the 'Flowable' objects
     elements = []
@@ -237,6 +797,8 @@ def generate_pdf_with_reportlab(stats, graphs, output_path):
     elements.append(Paragraph("Statistical Report", styles['Heading2']))
     elements.append(Spacer(1, 0.2*inch))
     elements.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
+    if stats.get('snapshot'):
+        elements.append(Paragraph(f"Statistics as of {snapshot_label(stats['snapshot'])}", styles['Normal']))
     elements.append(Spacer(1, 0.3*inch))
     
     # Executive Summary
@@ -282,24 +844,41 @@ def generate_pdf_with_reportlab(stats, graphs, output_path):
     elements.append(Paragraph("Visual Analytics", heading_style))
     
     # Add graphs
-    graph_dir = os.path.dirname(output_path)
-    for graph_path in graphs:
-        if os.path.exists(graph_path):
-            graph_name = os.path.basename(graph_path)
-            # Add caption based on graph name
-            if 'loans_by_month' in graph_name:
-                elements.append(Paragraph("Loans Trend (Last 12 Months)", styles['Heading3']))
-            elif 'loan_status' in graph_name:
-                elements.append(Paragraph("Loan Status Distribution", styles['Heading3']))
-            elif 'books_by_category' in graph_name:
-                elements.append(Paragraph("Books by Category (Top 10)", styles['Heading3']))
-            elif 'most_borrowed' in graph_name:
-                elements.append(Paragraph("Most Borrowed Books (Top 10)", styles['Heading3']))
-            
-            # Add image
-            img = Image(graph_path, width=6*inch, height=3.6*inch)
+    for graph in graphs:
+        if isinstance(graph, tuple):
+            graph_name, graph_source = graph
+            if isinstance(graph_source, bytes):
+                graph_source = io.BytesIO(graph_source)
+        elif os.path.exists(graph):
+            graph_name = os.path.basename(graph)
+            graph_source = graph
+        else:
+            continue
+
+        # Add caption based on graph name
+        if 'loans_by_month' in graph_name:
+            elements.append(Paragraph(
+                f"Loans Trend ({escape(stats.get('period', 'Last 12 Months'))})", styles['Heading3']))
+        elif 'loan_status' in graph_name:
+            elements.append(Paragraph("Loan Status Distribution", styles['Heading3']))
+        elif 'books_by_category' in graph_name:
+            elements.append(Paragraph("Books by Category (Top 10)", styles['Heading3']))
+        elif 'most_borrowed' in graph_name:
+            elements.append(Paragraph("Most Borrowed Books (Top 10)", styles['Heading3']))
+        elif 'loan_durations' in graph_name:
+            elements.append(Paragraph("Time to Return", styles['Heading3']))
+        elif 'overdue_aging' in graph_name:
+            elements.append(Paragraph("Overdue Aging", styles['Heading3']))
+        elif 'weekday_load' in graph_name:
+            elements.append(Paragraph("Desk Load by Weekday", styles['Heading3']))
+        
+        # Add image (vector drawings are flowables already)
+        if hasattr(graph_source, 'wrapOn'):
+            elements.append(graph_source)
+        else:
+            img = Image(graph_source, width=6*inch, height=3.6*inch)
             elements.append(img)
-            elements.append(Spacer(1, 0.3*inch))
+        elements.append(Spacer(1, 0.3*inch))
     
     elements.append(PageBreak())
     
@@ -352,244 +931,575 @@ def generate_pdf_with_reportlab(stats, graphs, output_path):
         ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
     ]))
     elements.append(category_table)
+
+    # Loan Analytics Tables
+    analytics = stats.get('loan_analytics')
+    if analytics:
+        elements.append(PageBreak())
+        elements.append(Paragraph("Loan Analytics", heading_style))
+        table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#9b59b6')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
+        ])
+
+        def days(value):
+            return '-' if value is None else f"{value:.1f} days"
+
+        returns = analytics['time_to_return']
+        elements.append(Paragraph("Time to Return", styles['Heading3']))
+        return_data = [
+            ['Metric', 'Value'],
+            ['Loans Analysed', str(analytics['loans'])],
+            ['Distinct Borrowers', str(analytics['borrowers'])],
+            ['Distinct Books', str(analytics['books'])],
+            ['Returned Loans', str(returns['returned'])],
+            ['Returned Late', str(returns['late'])],
+            ['Mean Time to Return', days(returns['mean'])],
+            ['Median (p50)', days(returns['p50'])],
+            ['p95', days(returns['p95'])],
+            ['p99', days(returns['p99'])]
+        ]
+        return_table = Table(return_data, colWidths=[4*inch, 2*inch])
+        return_table.setStyle(table_style)
+        elements.append(return_table)
+        elements.append(Spacer(1, 0.3*inch))
+
+        elements.append(Paragraph("Overdue Aging", styles['Heading3']))
+        aging_data = [['Days Past Due', 'Outstanding Loans']]
+        for row in analytics['overdue_aging']:
+            aging_data.append([row['label'], str(row['count'])])
+        aging_table = Table(aging_data, colWidths=[4*inch, 2*inch])
+        aging_table.setStyle(table_style)
+        elements.append(aging_table)
+        elements.append(Spacer(1, 0.3*inch))
+
+        elements.append(Paragraph("Loans by Weekday", styles['Heading3']))
+        weekday_data = [['Weekday', 'Loans', 'Returns']]
+        for row in analytics['weekday_load']:
+            weekday_data.append([row['day'], str(row['loans']), str(row['returns'])])
+        weekday_table = Table(weekday_data, colWidths=[3*inch, 1.5*inch, 1.5*inch])
+        weekday_table.setStyle(table_style)
+        elements.append(weekday_table)
     
     # Build PDF
     doc.build(elements)
+    if not isinstance(output_path, str):
+        return output_path
     return output_path if os.path.exists(output_path) else None
 
-def generate_latex_document(stats, graphs, output_path):
-    """Generate LaTeX document"""
-    latex_content = r"""
-\documentclass[11pt,a4paper]{article}
-\usepackage[utf8]{inputenc}
-\usepackage{graphicx}
-\usepackage{geometry}
-\usepackage{fancyhdr}
-\usepackage{booktabs}
-\usepackage{multirow}
-\usepackage{xcolor}
-\usepackage{hyperref}
-
-\geometry{margin=1in}
-\pagestyle{fancy}
-\fancyhf{}
-\fancyhead[L]{\textbf{Library Management System}}
-\fancyhead[R]{\today}
-\fancyfoot[C]{\thepage}
-
-\title{\textbf{Library Management System\\Statistical Report}}
-\author{Generated Report}
-\date{\today}
-
-\begin{document}
-
-\maketitle
-
-\section*{Executive Summary}
-
-This report provides a comprehensive overview of the library management system's statistics and performance metrics.
-
-\subsection*{Key Statistics}
-
-\begin{table}[h]
-\centering
-\begin{tabular}{lr}
-\toprule
-\textbf{Metric} & \textbf{Value} \\
-\midrule
-Total Books & """ + str(stats['total_books']) + r""" \\
-Total Copies & """ + str(stats['total_copies']) + r""" \\
-Available Copies & """ + str(stats['available_copies']) + r""" \\
-Total Users & """ + str(stats['total_users']) + r""" \\
-Total Loans & """ + str(stats['total_loans']) + r""" \\
-Active Loans & """ + str(stats['active_loans']) + r""" \\
-Returned Loans & """ + str(stats['returned_loans']) + r""" \\
-Overdue Loans & """ + str(stats['overdue_loans']) + r""" \\
-Active Reservations & """ + str(stats['active_holds']) + r""" \\
-Total Pending Fines & """ + f"{stats['total_fines']:.2f}" + r""" EGP \\
-\bottomrule
-\end{tabular}
-\end{table}
-
-\newpage
-\section*{Visual Analytics}
-"""
-    
-    # Add graphs
-    if graphs:
-        if 'loans_by_month.png' in str(graphs):
-            latex_content += r"""
-\subsection*{Loans Trend (Last 12 Months)}
-
-\begin{figure}[h]
-\centering
-\includegraphics[width=0.9\textwidth]{loans_by_month.png}
-\caption{Monthly loan activity over the past 12 months}
-\end{figure}
-"""
-        
-        if 'loan_status.png' in str(graphs):
-            latex_content += r"""
-\subsection*{Loan Status Distribution}
-
-\begin{figure}[h]
-\centering
-\includegraphics[width=0.6\textwidth]{loan_status.png}
-\caption{Distribution of loan statuses}
-\end{figure}
-"""
-        
-        if 'books_by_category.png' in str(graphs):
-            latex_content += r"""
-\subsection*{Books by Category}
-
-\begin{figure}[h]
-\centering
-\includegraphics[width=0.9\textwidth]{books_by_category.png}
-\caption{Book distribution across categories}
-\end{figure}
-"""
-        
-        if 'most_borrowed.png' in str(graphs):
-            latex_content += r"""
-\subsection*{Most Borrowed Books}
-
-\begin{figure}[h]
-\centering
-\includegraphics[width=0.9\textwidth]{most_borrowed.png}
-\caption{Top 10 most frequently borrowed books}
-\end{figure}
-"""
-    
-    # Add detailed tables
-    latex_content += r"""
-\newpage
-\section*{Detailed Statistics}
-
-\subsection*{Most Borrowed Books}
-
-\begin{table}[h]
-\centering
-\begin{tabular}{lcc}
-\toprule
-\textbf{Book Title} & \textbf{Author} & \textbf{Borrow Count} \\
-\midrule
-"""
-    
-    for book in stats['most_borrowed'][:10]:
-        title = book['title'].replace('&', '\\&')
-        author = book['author'].replace('&', '\\&')
-        latex_content += f"{title[:50]} & {author[:30]} & {book['borrow_count']} \\\\\n"
-    
-    latex_content += r"""
-\bottomrule
-\end{tabular}
-\end{table}
-
-\subsection*{Books by Category}
-
-\begin{table}[h]
-\centering
-\begin{tabular}{lc}
-\toprule
-\textbf{Category} & \textbf{Count} \\
-\midrule
-"""
-    
-    for cat in stats['books_by_category']:
-        category = cat['category'].replace('&', '\\&')
-        latex_content += f"{category} & {cat['count']} \\\\\n"
-    
-    latex_content += r"""
-\bottomrule
-\end{tabular}
-\end{table}
+def _vector_graphs(stats):
+    from report_vector_charts import build_vector_charts
+    return build_vector_charts(stats)
 
-\vfill
-\begin{center}
-\textit{Report generated on \today}
-\end{center}
+def report_filters(options):
+    """Statistics filters from the --from/--to/--category options"""
+    return {
+        'date_from': options.date_from,
+        'date_to': options.date_to,
+        'category': options.category
+    }
 
-\end{document}
-"""
-    
-    # Write LaTeX file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(latex_content)
+# Stages of one report run, in order; progress events number them 1..3
+REPORT_STAGES = ('get_statistics', 'generate_graphs', 'generate_pdf')
 
-def compile_latex_to_pdf(latex_path, output_dir):
-    """Compile LaTeX document to PDF"""
-    try:
-        import platform
-        is_windows = platform.system() == 'Windows'
-        
-        # Use absolute paths
-        abs_latex_path = os.path.abspath(latex_path)
-        abs_output_dir = os.path.abspath(output_dir)
-        
-        # Run pdflatex twice to resolve references
-        result = subprocess.run(
-            ['pdflatex', '-interaction=nonstopmode', '-output-directory', abs_output_dir, abs_latex_path],
-            capture_output=True,
-            text=True,
-            cwd=abs_output_dir,
-            shell=is_windows
-        )
-        
-        if result.returncode != 0:
-            print(f"LaTeX compilation error: {result.stderr}", file=sys.stderr)
-            return None
-        
-        # Run again for references
-        subprocess.run(
-            ['pdflatex', '-interaction=nonstopmode', '-output-directory', abs_output_dir, abs_latex_path],
-            capture_output=True,
-            text=True,
-            cwd=abs_output_dir,
-            shell=is_windows
-        )
-        
-        pdf_path = os.path.join(abs_output_dir, os.path.basename(latex_path).replace('.tex', '.pdf'))
-        return pdf_path if os.path.exists(pdf_path) else None
-    except FileNotFoundError:
-        print("Error: pdflatex not found. Please install LaTeX distribution.", file=sys.stderr)
+def progress_listener(emit, job_id=None):
+    """Timings listener that passes report stage starts and ends to `emit` as progress events"""
+    def listener(event, group, name, record):
+        if group != 'stages' or name not in REPORT_STAGES:
+            return
+        message = {'event': 'progress', 'stage': name, 'state': event,
+                   'step': REPORT_STAGES.index(name) + 1, 'steps': len(REPORT_STAGES)}
+        if job_id is not None:
+            message = {'id': job_id, **message}
+        if record:
+            message['wall_ms'] = record['wall_ms']
+        emit(message)
+    return listener
+
+def _published_statistics(options):
+    """The statistics of the published snapshot (see publish_stats), if this report can use them
+
+    Only a report of the whole library can, since the snapshot is not
+    scoped, and only while the snapshot is fresh. A report with the loan
+    analytics section also needs a snapshot that includes them.
+    """
+    if options.live_stats or options.rebuild or any(report_filters(options).values()):
+        return None
+    snapshot = read_snapshot()
+    if not snapshot or not is_fresh(snapshot):
         return None
+    stats = snapshot['statistics']
+    if not options.analytics:
+        stats.pop('loan_analytics', None)
+    elif 'loan_analytics' not in stats:
+        return None
+    stats['snapshot'] = {
+        'version': snapshot['version'],
+        'generated_at': snapshot['generated_at'],
+        'age_seconds': round(snapshot_age(snapshot))
+    }
+    return stats
+
+def _report_statistics(pool, options, timings=None):
+    # Get statistics: from the published snapshot when it covers this
+    # report, otherwise all from one consistent read unless --no-snapshot
+    # trades that for running the queries concurrently
+    print("Fetching statistics...", file=sys.stderr)
+    timings = timings or Timings()
+
+    def fetch(db):
+        return get_statistics(
+            db,
+            rollup_path=None if options.no_rollup else ROLLUP_PATH,
+            rebuild=options.rebuild,
+            filters=report_filters(options),
+            timings=timings,
+            analytics=options.analytics
+        )
+
+    def fetch_snapshot():
+        with pool.snapshot() as connection:
+            return fetch(connection)
+
+    with timings.span('stages', 'get_statistics') as span:
+        stats = _published_statistics(options)
+        if stats:
+            span['stats_snapshot'] = stats['snapshot']['version']
+            return stats
+        return with_retries(lambda: fetch(pool) if options.no_snapshot else fetch_snapshot())
+
+def _report_graphs(stats, options, timings, output_dir=None, chart_executor=None):
+    # Generate graphs: PNG files in `output_dir`, in memory without one
+    print("Generating graphs...", file=sys.stderr)
+    with timings.span('stages', 'generate_graphs') as span:
+        if options.charts == 'vector':
+            graphs = _vector_graphs(stats)
+        else:
+            cache = None if options.no_cache else ChartCache()
+            if output_dir:
+                graphs = generate_graphs(stats, output_dir, jobs=options.jobs,
+                                         cache=cache, executor=chart_executor)
+            else:
+                graphs = render_graphs(stats, jobs=options.jobs,
+                                       cache=cache, executor=chart_executor)
+            if cache:
+                span['cache_hits'] = cache.hits
+        span['charts'] = len(graphs)
+    return graphs
+
+def _catalog_rows(options):
+    """Rows of the full catalog appendix, streamed on a dedicated connection
+
+    The rows are read while the PDF is laid out, which can take minutes for
+    a large catalog, so this query is exempt from REPORT_QUERY_TIMEOUT.
+    """
+    from report_appendix import stream_catalog
+    connection = connect_for_reports(query_timeout=0)
+    try:
+        yield from stream_catalog(connection, report_filters(options))
+    finally:
+        connection.close()
+
+def _appendix(options):
+    return _catalog_rows(options) if options.appendix else None
+
+def _write_pdf(stats, graphs, output_path, options):
+    # The appendix only exists in the reportlab layout, so a report that
+    # asks for it is always built with reportlab
+    if options.pdf_backend == 'latex' and not options.appendix:
+        from report_latex import build_latex_pdf
+        return build_latex_pdf(stats, graphs, output_path)
+    return generate_pdf_with_reportlab(stats, graphs, output_path, _appendix(options))
+
+def build_report(pool, output_dir, options, chart_executor=None, timings=None):
+    """Fetch statistics, draw the graphs and write report.pdf into `output_dir`
+
+    Stage and query spans are recorded in `timings` when given.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timings = timings or Timings()
+    stats = _report_statistics(pool, options, timings)
+    graphs = _report_graphs(stats, options, timings, output_dir, chart_executor)
+
+    print("Generating PDF...", file=sys.stderr)
+    pdf_path = os.path.join(output_dir, 'report.pdf')
+    with timings.span('stages', 'generate_pdf') as span:
+        pdf_path = _write_pdf(stats, graphs, pdf_path, options)
+        if pdf_path and os.path.exists(pdf_path):
+            span['bytes'] = os.path.getsize(pdf_path)
+    return pdf_path
+
+def build_report_bytes(pool, options, chart_executor=None, timings=None):
+    """Same report as build_report, built entirely in memory; returns the PDF bytes"""
+    timings = timings or Timings()
+    stats = _report_statistics(pool, options, timings)
+    graphs = _report_graphs(stats, options, timings, chart_executor=chart_executor)
+
+    print("Generating PDF...", file=sys.stderr)
+    with timings.span('stages', 'generate_pdf') as span:
+        buffer = io.BytesIO()
+        if _write_pdf(stats, graphs, buffer, options) is None:
+            raise RuntimeError('Failed to generate PDF')
+        span['bytes'] = buffer.tell()
+    return buffer.getvalue()
+
+def _chart_mode(value):
+    if value not in CHART_MODES:
+        raise ValueError(f"charts must be one of: {', '.join(CHART_MODES)}")
+    return value
+
+def _pdf_backend(value):
+    if value not in PDF_BACKENDS:
+        raise ValueError(f"pdf_backend must be one of: {', '.join(PDF_BACKENDS)}")
+    return value
+
+def _optional_date(value):
+    return date.fromisoformat(value) if value else None
+
+def _optional_text(value):
+    return str(value) if value else None
+
+# Per-job options a --serve client may set and how to parse them; everything
+# else comes from the worker's own command line
+JOB_OPTIONS = {
+    'rebuild': bool,
+    'no_rollup': bool,
+    'analytics': bool,
+    'no_snapshot': bool,
+    'live_stats': bool,
+    'appendix': bool,
+    'no_cache': bool,
+    'charts': _chart_mode,
+    'pdf_backend': _pdf_backend,
+    'date_from': _optional_date,
+    'date_to': _optional_date,
+    'category': _optional_text
+}
+
+def _process_context():
+    # forkserver/spawn: forking a process that already runs threads is unsafe
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+class _Shutdown(Exception):
+    pass
+
+def _raise_shutdown(signum, frame):
+    raise _Shutdown()
+
+def serve(options):
+    """Run as a long-lived worker that reads report jobs from stdin
+
+    Each input line is a JSON object {"id": ..., "output_dir": ...} with
+    optional "rebuild", "no_rollup", "analytics", "no_snapshot",
+    "live_stats", "no_cache", "charts", "pdf_backend", "appendix",
+    "date_from", "date_to" and "category" options. Each job is answered
+    with one JSON line on stdout carrying the same id. A job with "stream":
+    true instead of an output directory is built in memory; its answer line
+    carries "length" and is followed by that many PDF bytes. Answers carry
+    the job's "timings" (and "profile" with --profile). A job with
+    "progress": true also gets an
+    {"id": ..., "event": "progress", "stage": ..., "state": "started"|"finished"}
+    line as each stage starts and ends, before its answer. Imports, the database pool and the chart processes stay warm
+    between jobs; at most `options.max_concurrent` jobs run at once. EOF on
+    stdin, SIGTERM or SIGINT stop intake and let running jobs finish.
+    """
+    pool = ConnectionPool(max(STATS_POOL_SIZE, options.max_concurrent))
+    chart_executor = ProcessPoolExecutor(
+        max_workers=options.jobs or os.cpu_count() or 1,
+        mp_context=_process_context()
+    )
+    job_executor = ThreadPoolExecutor(max_workers=options.max_concurrent)
+    slots = threading.Semaphore(options.max_concurrent)
+    output_lock = threading.Lock()
+
+    def respond(message, payload=None):
+        if payload is not None:
+            message['length'] = len(payload)
+        with output_lock:
+            sys.stdout.buffer.write((json.dumps(message) + '\n').encode('utf-8'))
+            if payload is not None:
+                sys.stdout.buffer.write(payload)
+            sys.stdout.buffer.flush()
+
+    def run_job(job):
+        job_id = job.get('id')
+        timings = Timings(progress_listener(respond, job_id) if job.get('progress') else None)
+        try:
+            job_options = argparse.Namespace(**vars(options))
+            for name, parse in JOB_OPTIONS.items():
+                if name in job:
+                    setattr(job_options, name, parse(job[name]))
+            with profiled(options.profile, f'job{job_id}') as profile_path:
+                if job.get('stream'):
+                    pdf = build_report_bytes(pool, job_options, chart_executor, timings)
+                else:
+                    pdf_path = build_report(pool, job['output_dir'], job_options,
+                                            chart_executor, timings)
+            message = {'id': job_id, 'success': True, 'timings': timings.as_dict()}
+            if profile_path:
+                message['profile'] = profile_path
+            if job.get('stream'):
+                message['content_type'] = 'application/pdf'
+                respond(message, pdf)
+            elif pdf_path and os.path.exists(pdf_path):
+                message['pdf_path'] = pdf_path
+                respond(message)
+            else:
+                respond({'id': job_id, 'success': False, 'error': 'Failed to generate PDF',
+                         'timings': timings.as_dict()})
+        except Exception as e:
+            print(f"Report job {job_id} failed: {e}", file=sys.stderr)
+            respond({'id': job_id, 'success': False, 'error': str(e),
+                     'timings': timings.as_dict()})
+        finally:
+            slots.release()
+
+    signal.signal(signal.SIGTERM, _raise_shutdown)
+    signal.signal(signal.SIGINT, _raise_shutdown)
+    respond({'event': 'ready', 'pid': os.getpid()})
+
+    try:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+                if 'output_dir' not in job and not job.get('stream'):
+                    raise ValueError('output_dir or stream is required')
+            except ValueError as e:
+                respond({'id': None, 'success': False, 'error': f'Invalid job: {e}'})
+                continue
+            slots.acquire()
+            job_executor.submit(run_job, job)
+    except _Shutdown:
+        print("Shutting down report worker...", file=sys.stderr)
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        job_executor.shutdown(wait=True)
+        chart_executor.shutdown(wait=True)
+        pool.close()
+
+def export(options):
+    """Stream the tables named by --export into output_dir as CSV and/or Parquet"""
+    tables = list(EXPORTS) if 'all' in options.export else list(dict.fromkeys(options.export))
+    formats = list(dict.fromkeys(options.export_format or ['csv']))
+    timings = Timings()
+    # A dedicated connection: an unbuffered result set blocks it until fully
+    # read. Reading whole tables may legitimately take long, so no query timeout
+    from mysql.connector import Error
+    try:
+        connection = connect_for_reports(query_timeout=0)
+    except Error as e:
+        print(f"Error connecting to database: {e}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        with profiled(options.profile, 'export'):
+            results = export_tables(connection, tables, options.output_dir, formats,
+                                    report_filters(options),
+                                    options.batch_size or EXPORT_BATCH_SIZE, timings)
+    finally:
+        connection.close()
+    print(json.dumps({'success': True, 'exports': results, 'timings': timings.as_dict()}))
+
+def _render_batch_report(stats, charts, no_cache, pdf_backend, pdf_path):
+    """Draw one batch report's charts and write its PDF; runs in a worker process"""
+    if charts == 'vector':
+        graphs = _vector_graphs(stats)
+    else:
+        graphs = render_graphs(stats, jobs=1, cache=None if no_cache else ChartCache())
+    if pdf_backend == 'latex':
+        from report_latex import build_latex_pdf
+        if build_latex_pdf(stats, graphs, pdf_path) is None:
+            raise RuntimeError(f'pdflatex failed for {os.path.basename(pdf_path)}')
+    else:
+        generate_pdf_with_reportlab(stats, graphs, pdf_path)
+    return os.path.getsize(pdf_path)
+
+def _batch_aggregates(pool, specs, options, timings):
+    if options.no_snapshot:
+        return fetch_aggregates(pool, specs, timings)
+    with pool.snapshot() as connection:
+        return fetch_aggregates(SingleConnectionPool(connection), specs, timings)
+
+def batch(options):
+    """Build every report in the --batch manifest into output_dir
+
+    The statistics of all reports come from one set of aggregate queries
+    (see report_batch); the reports are then rendered in up to --jobs
+    processes, one report per process at a time. The rollup store is not
+    used: the aggregates already read each table once for the whole batch.
+    Batch reports leave out the loan analytics section and the catalog
+    appendix.
+    """
+    try:
+        specs = load_manifest(options.batch)
+    except (OSError, ValueError) as e:
+        print(json.dumps({'success': False, 'error': f'Invalid manifest: {e}'}))
+        sys.exit(1)
+    for spec in specs:
+        spec['period'] = report_period(spec['filters'])
+    os.makedirs(options.output_dir, exist_ok=True)
+
+    timings = Timings(progress_listener(_print_progress) if options.progress else None)
+    start = time.perf_counter()
+    pool = ConnectionPool()
+    try:
+        with profiled(options.profile, 'batch'):
+            print(f"Fetching statistics for {len(specs)} reports...", file=sys.stderr)
+            with timings.span('stages', 'get_statistics') as span:
+                aggregates = with_retries(lambda: _batch_aggregates(pool, specs, options, timings))
+                reports = [slice_statistics(aggregates, spec) for spec in specs]
+                span['grain'] = aggregates['grain']
+    finally:
+        pool.close()
+
+    print(f"Rendering {len(specs)} reports...", file=sys.stderr)
+    results = {}
+    with timings.span('stages', 'generate_pdf') as span:
+        workers = min(options.jobs or os.cpu_count() or 1, len(specs))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=_process_context()) as executor:
+            futures = {
+                spec['name']: executor.submit(_render_batch_report, stats, options.charts,
+                                              options.no_cache, options.pdf_backend,
+                                              os.path.join(options.output_dir, f"{spec['name']}.pdf"))
+                for spec, stats in zip(specs, reports)
+            }
+            for name, future in futures.items():
+                results[name] = {
+                    'pdf_path': os.path.join(options.output_dir, f"{name}.pdf"),
+                    'bytes': future.result()
+                }
+        span['reports'] = len(results)
+        span['workers'] = workers
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'success': True,
+        'reports': results,
+        'reports_per_min': round(len(results) * 60 / elapsed, 1) if elapsed else None,
+        'timings': timings.as_dict()
+    }))
+
+def _print_progress(message):
+    print(json.dumps(message), file=sys.stderr, flush=True)
 
 def main():
     """Main function"""
-    if len(sys.argv) < 2:
-        print("Usage: python generate_report.py <output_directory>", file=sys.stderr)
-        sys.exit(1)
-    
-    output_dir = sys.argv[1]
-    os.makedirs(output_dir, exist_ok=True)
-    
+    parser = argparse.ArgumentParser(description='Generate the library statistics PDF report')
+    parser.add_argument('output_dir', nargs='?', help='Directory for the generated graphs and PDF')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Recompute the loan rollup store from scratch')
+    parser.add_argument('--no-rollup', action='store_true',
+                        help='Scan the loans table directly instead of using the rollup store')
+    parser.add_argument('--analytics', action='store_true',
+                        help='Add the loan analytics section (one streamed pass over the scoped loans)')
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help='Run the statistics queries concurrently instead of in one consistent snapshot')
+    parser.add_argument('--live-stats', action='store_true',
+                        help='Query the database even when a fresh published statistics snapshot exists')
+    parser.add_argument('--jobs', type=int, default=None, metavar='N',
+                        help='Render charts in up to N processes (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Re-render every chart instead of reusing cached ones')
+    parser.add_argument('--charts', choices=CHART_MODES, default='raster',
+                        help='Embed charts as 300 dpi PNGs (raster) or vector drawings')
+    parser.add_argument('--pdf-backend', choices=PDF_BACKENDS, default='reportlab',
+                        help='Typeset the PDF with reportlab or with pdflatex (needs a TeX distribution)')
+    parser.add_argument('--appendix', action='store_true',
+                        help='Add a full catalog appendix (every book, streamed from the database)')
+    parser.add_argument('--from', dest='date_from', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Only count loans, fines and holds from this date on')
+    parser.add_argument('--to', dest='date_to', type=date.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Only count loans, fines and holds up to this date (inclusive)')
+    parser.add_argument('--category', help='Only count books in this category and their loans')
+    parser.add_argument('--stdout', action='store_true',
+                        help='Build the PDF in memory and write its bytes to stdout')
+    parser.add_argument('--stats-json', action='store_true',
+                        help='Print the statistics as JSON and exit (no charts or PDF)')
+    parser.add_argument('--export', action='append', choices=list(EXPORTS) + ['all'],
+                        help='Stream this whole table (repeatable) into output_dir instead of a report')
+    parser.add_argument('--export-format', action='append', choices=EXPORT_FORMATS,
+                        help='Export file format, repeatable (default: csv; parquet needs pyarrow)')
+    parser.add_argument('--batch-size', type=int, default=None, metavar='N',
+                        help='Rows fetched and written per export batch (default: 10000)')
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help='Build every report listed in this JSON manifest into output_dir')
+    parser.add_argument('--serve', action='store_true',
+                        help='Run as a worker that reads JSON report jobs from stdin')
+    parser.add_argument('--profile', metavar='DIR',
+                        help='Write a cProfile dump of each report run into DIR')
+    parser.add_argument('--max-concurrent', type=int, default=2, metavar='N',
+                        help='Report jobs a --serve worker runs at once (default: 2)')
+    parser.add_argument('--progress', action='store_true',
+                        help='Write a JSON progress event to stderr as each report stage starts and ends')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    if not args.output_dir and not (args.stats_json or args.stdout):
+        parser.error('output_dir is required unless --serve, --stdout or --stats-json is given')
+    if args.batch and not args.output_dir:
+        parser.error('--batch needs output_dir for the generated PDFs')
+    if args.export and not args.output_dir:
+        parser.error('--export needs output_dir for the exported files')
+    if args.batch and args.analytics:
+        parser.error('--batch reports do not include the loan analytics section')
+
+    if args.export:
+        export(args)
+        return
+
+    if args.batch:
+        batch(args)
+        return
+
     # Connect to database
-    connection = connect_to_database()
-    
+    pool = ConnectionPool()
+    timings = Timings(progress_listener(_print_progress) if args.progress else None)
+
     try:
-        # Get statistics
-        print("Fetching statistics...", file=sys.stderr)
-        stats = get_statistics(connection)
-        
-        # Generate graphs
-        print("Generating graphs...", file=sys.stderr)
-        graphs = generate_graphs(stats, output_dir)
-        
-        # Generate PDF using reportlab (no LaTeX required)
-        print("Generating PDF...", file=sys.stderr)
-        pdf_path = os.path.join(output_dir, 'report.pdf')
-        pdf_path = generate_pdf_with_reportlab(stats, graphs, pdf_path)
-        
+        with profiled(args.profile, 'run') as profile_path:
+            if args.stats_json:
+                stats = _report_statistics(pool, args, timings)
+            elif args.stdout:
+                pdf = build_report_bytes(pool, args, timings=timings)
+            else:
+                pdf_path = build_report(pool, args.output_dir, args, timings=timings)
+        if profile_path:
+            print(f"Profile written to {profile_path}", file=sys.stderr)
+
+        # stdout carries the statistics or the PDF itself, so timings go to stderr
+        if args.stats_json:
+            print(json.dumps(stats, default=str))
+            print(json.dumps({'timings': timings.as_dict()}), file=sys.stderr)
+            return
+
+        if args.stdout:
+            sys.stdout.buffer.write(pdf)
+            sys.stdout.buffer.flush()
+            print(json.dumps({'timings': timings.as_dict()}), file=sys.stderr)
+            return
+
         if pdf_path and os.path.exists(pdf_path):
-            print(json.dumps({'success': True, 'pdf_path': pdf_path}))
+            print(json.dumps({'success': True, 'pdf_path': pdf_path, 'timings': timings.as_dict()}))
         else:
-            print(json.dumps({'success': False, 'error': 'Failed to generate PDF'}))
+            print(json.dumps({'success': False, 'error': 'Failed to generate PDF',
+                              'timings': timings.as_dict()}))
             sys.exit(1)
     
     finally:
-        connection.close()
+        pool.close()
 
 if __name__ == '__main__':
     main()
-
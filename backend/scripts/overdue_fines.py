@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Overdue fine batch job
+Creates pending overdue fines for every active loan past its due date (and
+grace period) and marks those loans overdue, in chunked set-based batches
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import date
+from decimal import Decimal
+
+from generate_report import DB_CONFIG, connect_to_database
+from batch_lock import named_lock
+
+# Same fallback as loanPolicyService.getCurrentPolicy
+DEFAULT_POLICY = {
+    'fine_rate_per_day': Decimal('5.00'),
+    'grace_period_days': 0
+}
+
+# Loans fined per transaction
+CHUNK_SIZE = 1000
+
+# Named server lock so two runs never fine the same loans concurrently
+LOCK_NAME = 'library_overdue_fines'
+
+def get_policy(connection):
+    """Read the active loan policy once for the whole run"""
+    from mysql.connector import Error
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            'SELECT fine_rate_per_day, grace_period_days FROM loan_policies '
+            'WHERE is_active = TRUE ORDER BY created_at DESC LIMIT 1'
+        )
+        row = cursor.fetchone()
+    except Error as e:
+        print(f"Using the default loan policy: {e}", file=sys.stderr)
+        row = None
+    finally:
+        cursor.close()
+    if not row:
+        return dict(DEFAULT_POLICY)
+    return {
+        'fine_rate_per_day': Decimal(str(row['fine_rate_per_day'])),
+        'grace_period_days': int(row['grace_period_days'] or 0)
+    }
+
+def _fine_chunk(connection, policy, today, after_id, chunk_size, dry_run):
+    """Fine the next `chunk_size` eligible loans with id > `after_id` in one transaction
+
+    Returns (last loan id seen, fines created, total amount), or None when no
+    eligible loans remain.
+    """
+    grace = policy['grace_period_days']
+    cursor = connection.cursor()
+    try:
+        connection.start_transaction()
+        # Amounts are computed by MySQL for the whole chunk; FOR UPDATE locks
+        # only the loans, so a concurrent return cannot race the status change
+        # while checkouts and returns can still update the books' copy counts
+        cursor.execute("""
+            SELECT l.id, l.user_id, l.book_id,
+                   (DATEDIFF(%s, l.due_date) - %s) * %s as amount,
+                   DATEDIFF(%s, l.due_date) as days_overdue
+            FROM loans l
+            WHERE l.status = 'active'
+            AND l.due_date < %s - INTERVAL %s DAY
+            AND l.id > %s
+            AND NOT EXISTS (
+                SELECT 1 FROM fines f
+                WHERE f.loan_id = l.id
+                AND f.status = 'pending'
+                AND f.type = 'overdue'
+            )
+            ORDER BY l.id
+            LIMIT %s
+            FOR UPDATE
+        """, (today, grace, policy['fine_rate_per_day'], today, today, grace, after_id, chunk_size))
+        loans = cursor.fetchall()
+        if not loans:
+            connection.rollback()
+            return None
+
+        if not dry_run:
+            # Titles for the descriptions; a plain read takes no locks on books
+            book_ids = sorted({loan[2] for loan in loans})
+            cursor.execute(f"SELECT id, title FROM books WHERE id IN ({', '.join(['%s'] * len(book_ids))})",
+                           book_ids)
+            titles = dict(cursor.fetchall())
+            # executemany turns this into one multi-row INSERT
+            cursor.executemany("""
+                INSERT INTO fines (user_id, loan_id, amount, type, status, description)
+                VALUES (%s, %s, %s, 'overdue', 'pending', %s)
+            """, [(user_id, loan_id, amount,
+                   f'Overdue fine for "{titles.get(book_id)}". {days} day(s) overdue.')
+                  for loan_id, user_id, book_id, amount, days in loans])
+            placeholders = ', '.join(['%s'] * len(loans))
+            cursor.execute(f"""
+                UPDATE loans SET status = 'overdue'
+                WHERE id IN ({placeholders}) AND status = 'active'
+            """, [loan[0] for loan in loans])
+            connection.commit()
+        else:
+            connection.rollback()
+        return loans[-1][0], len(loans), sum(loan[3] for loan in loans)
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def process_overdue_fines(connection, today=None, chunk_size=CHUNK_SIZE, dry_run=False):
+    """Create overdue fines for all eligible loans; safe to re-run at any time
+
+    A loan is fined once: it must still be active with no pending overdue
+    fine, and fining it marks it overdue.
+    """
+    today = today or date.today()
+    # Statements outside a chunk's explicit transaction commit on their own
+    connection.autocommit = True
+    policy = get_policy(connection)
+    start = time.perf_counter()
+    fines = 0
+    amount = Decimal('0')
+    chunks = 0
+    after_id = 0
+    while True:
+        result = _fine_chunk(connection, policy, today, after_id, chunk_size, dry_run)
+        if result is None:
+            break
+        after_id, created, total = result
+        fines += created
+        amount += total
+        chunks += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'date': today.isoformat(),
+        'policy': {key: str(value) for key, value in policy.items()},
+        'fines_created': fines,
+        'total_amount': str(amount),
+        'chunks': chunks,
+        'dry_run': dry_run,
+        'seconds': round(elapsed, 2),
+        'loans_per_sec': round(fines / elapsed) if elapsed else None
+    }
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Create fines for overdue loans')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, metavar='N',
+                        help=f'Loans fined per transaction (default: {CHUNK_SIZE})')
+    parser.add_argument('--date', type=date.fromisoformat, default=None, metavar='YYYY-MM-DD',
+                        help='Compute days overdue as of this date (default: today)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report what would be fined without writing anything')
+    args = parser.parse_args()
+
+    connection = connect_to_database()
+    try:
+        with named_lock(connection, LOCK_NAME) as locked:
+            if not locked:
+                print(json.dumps({'success': False,
+                                  'error': 'Another overdue fine run is in progress'}))
+                sys.exit(1)
+            results = process_overdue_fines(connection, args.date, args.chunk_size, args.dry_run)
+        print(json.dumps({'success': True, 'database': DB_CONFIG['database'], **results}))
+    finally:
+        connection.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Statistics snapshot publisher
+Reads the library-wide report statistics once, from one consistent
+snapshot (on the replica when configured), and publishes them as the next
+version of the stats snapshot file (see report_snapshot)
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+
+from generate_report import DB_CONFIG, ROLLUP_PATH, ConnectionPool, get_statistics, with_retries
+from report_timing import Timings
+from report_snapshot import SNAPSHOT_PATH, MAX_AGE_MINUTES, write_snapshot
+from batch_lock import named_lock
+
+LOCK_NAME = 'library_stats_snapshot'
+
+def publish(pool, path=SNAPSHOT_PATH, analytics=False, max_age_minutes=MAX_AGE_MINUTES,
+            timings=None):
+    """Read the statistics and publish them; returns the snapshot
+
+    Incremental like a report run: loans_by_month and most_borrowed come
+    from the rollup store.
+    """
+    timings = timings or Timings()
+    start = time.perf_counter()
+    generated_at = datetime.now(timezone.utc)
+
+    def fetch():
+        with pool.snapshot() as connection:
+            return get_statistics(connection, rollup_path=ROLLUP_PATH, timings=timings,
+                                  analytics=analytics)
+
+    with timings.span('stages', 'get_statistics'):
+        stats = with_retries(fetch)
+    return write_snapshot(stats, generated_at, path, max_age_minutes,
+                          seconds=round(time.perf_counter() - start, 2))
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description='Publish the library-wide statistics snapshot')
+    parser.add_argument('--path', default=SNAPSHOT_PATH,
+                        help=f'Snapshot file to replace (default: {SNAPSHOT_PATH})')
+    parser.add_argument('--analytics', action='store_true',
+                        help='Include the loan analytics (one streamed pass over every loan)')
+    parser.add_argument('--max-age', type=float, default=MAX_AGE_MINUTES, metavar='MINUTES',
+                        help=f'Minutes until the snapshot counts as stale (default: {MAX_AGE_MINUTES:g})')
+    args = parser.parse_args()
+
+    timings = Timings()
+    pool = ConnectionPool(size=2)
+    try:
+        with pool.connection() as connection, named_lock(connection, LOCK_NAME) as locked:
+            if not locked:
+                print(json.dumps({'success': False,
+                                  'error': 'Another statistics snapshot is being published'}))
+                sys.exit(1)
+            snapshot = publish(pool, args.path, args.analytics, args.max_age, timings)
+    finally:
+        pool.close()
+
+    print(json.dumps({
+        'success': True,
+        'database': DB_CONFIG['database'],
+        'path': args.path,
+        'version': snapshot['version'],
+        'generated_at': snapshot['generated_at'],
+        'stale_after': snapshot['stale_after'],
+        'seconds': snapshot['seconds'],
+        'timings': timings.as_dict()
+    }))
+
+if __name__ == '__main__':
+    main()
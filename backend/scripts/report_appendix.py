@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Full catalog appendix
+Streams every book (copies, availability, borrow count) from the database
+into page-sized LongTables that are generated, laid out and dropped one page
+at a time, so a catalog of any size costs linear time and flat memory
+"""
+
+from datetime import timedelta
+
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Paragraph, PageBreak, LongTable, TableStyle
+
+# Books fetched from the server per round trip
+APPENDIX_BATCH_SIZE = 2000
+
+# Fixed row height (points) and column layout; the widths add up to the A4
+# frame of generate_pdf_with_reportlab, and longer text is cut to fit
+ROW_HEIGHT = 10
+HEADER_HEIGHT = 14
+COLUMNS = (
+    ('Title', 170, 44),
+    ('Author', 110, 28),
+    ('Category', 75, 18),
+    ('Copies', 32, None),
+    ('Available', 32, None),
+    ('Borrows', 32, None)
+)
+
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('LEADING', (0, 0), (-1, -1), 8),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (3, 0), (-1, -1), 'RIGHT'),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.HexColor('#bdc3c7')),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f8f9fa')])
+])
+
+def catalog_sql(filters):
+    """SELECT of every book in the report's category with its borrow count in the date range
+
+    Loans are counted per book in a derived table, so the books are read in
+    title order once instead of joining every loan row.
+    """
+    loan_clauses = []
+    params = []
+    if filters.get('date_from'):
+        loan_clauses.append("loan_date >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        loan_clauses.append("loan_date < %s")
+        params.append(filters['date_to'] + timedelta(days=1))
+    book_where = ""
+    if filters.get('category'):
+        book_where = "WHERE b.category = %s"
+        params.append(filters['category'])
+    loan_where = f"WHERE {' AND '.join(loan_clauses)}" if loan_clauses else ""
+    return f"""
+        SELECT b.title, b.author, b.category, b.total_copies, b.available_copies,
+               COALESCE(borrows.count, 0)
+        FROM books b
+        LEFT JOIN (
+            SELECT book_id, COUNT(*) as count
+            FROM loans
+            {loan_where}
+            GROUP BY book_id
+        ) borrows ON borrows.book_id = b.id
+        {book_where}
+        ORDER BY b.title, b.id
+    """, params
+
+def stream_catalog(connection, filters, batch_size=APPENDIX_BATCH_SIZE):
+    """Yield the catalog rows of catalog_sql, `batch_size` at a time from the server
+
+    The cursor is unbuffered, so only one batch of rows exists in Python.
+    """
+    sql, params = catalog_sql(filters)
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+def _cell(value, limit):
+    text = '' if value is None else str(value)
+    if limit and len(text) > limit:
+        return text[:limit - 3] + '...'
+    return text
+
+def _page_table(rows):
+    return LongTable(
+        [[name for name, _, _ in COLUMNS]] + rows,
+        colWidths=[width for _, width, _ in COLUMNS],
+        rowHeights=[HEADER_HEIGHT] + [ROW_HEIGHT] * len(rows),
+        repeatRows=1,
+        style=TABLE_STYLE
+    )
+
+def appendix_flowables(rows, width, height):
+    """Flowables of the appendix for catalog `rows`, generated page by page
+
+    `width`/`height` are the usable frame size. Every table holds exactly
+    the rows that fit on one page (the first one shares its page with the
+    heading), so no table ever needs splitting: the layout work per page is
+    constant and the whole appendix is linear in the number of books.
+    """
+    styles = getSampleStyleSheet()
+    intro = [
+        Paragraph("Appendix: Full Catalog", styles['Heading2']),
+        Paragraph("Every book in the catalog with its copies, the copies available now "
+                  "and how often it was borrowed in the report period.", styles['Normal'])
+    ]
+    used = sum(flowable.wrap(width, height)[1] + flowable.getSpaceAfter() for flowable in intro)
+    used += sum(flowable.getSpaceBefore() for flowable in intro[1:])
+    per_page = int((height - HEADER_HEIGHT) // ROW_HEIGHT)
+    room = max(1, int((height - used - HEADER_HEIGHT) // ROW_HEIGHT))
+
+    yield PageBreak()
+    yield from intro
+    page = []
+    books = 0
+    for row in rows:
+        page.append([_cell(value, limit) for value, (_, _, limit) in zip(row, COLUMNS)])
+        if len(page) == room:
+            books += len(page)
+            yield _page_table(page)
+            page = []
+            room = per_page
+    books += len(page)
+    if page:
+        yield _page_table(page)
+    yield Paragraph(f"{books} books.", styles['Normal'])
+
+class StreamingDocTemplate(SimpleDocTemplate):
+    """SimpleDocTemplate that keeps pulling flowables from `tail` while it builds
+
+    build() lays out its list front to back and stops once it is empty;
+    topping the list up to two entries from the iterator before each
+    flowable means the tail is generated lazily and never held in memory.
+    """
+
+    def __init__(self, filename, tail=(), **kw):
+        SimpleDocTemplate.__init__(self, filename, **kw)
+        self.tail = iter(tail)
+        self._story = None
+
+    def build(self, flowables, *args, **kw):
+        self._story = flowables
+        return SimpleDocTemplate.build(self, flowables, *args, **kw)
+
+    def filterFlowables(self, flowables):
+        # Also called for internal lists (e.g. page-begin actions); only the
+        # story being built is extended
+        while flowables is self._story and len(flowables) < 2:
+            flowable = next(self.tail, None)
+            if flowable is None:
+                break
+            flowables.append(flowable)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Batch reports
+Builds many scoped reports (e.g. one per category and month) from a single
+set of aggregates fetched at the finest grain the batch needs, instead of
+running every statistics query once per report
+"""
+
+import re
+import json
+import heapq
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+# Report names become PDF file names
+NAME_PATTERN = re.compile(r'^[A-Za-z0-9._-]+$')
+
+# Rows in the most borrowed books table and chart
+TOP_BOOKS = 10
+
+def _month_end(first):
+    return (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+def load_manifest(path):
+    """Report specs from a JSON manifest
+
+    The manifest is a list of {"name", "from", "to", "category"} objects,
+    optionally wrapped as {"reports": [...]}; every field is optional and
+    "month": "YYYY-MM" is shorthand for that month's from/to. Returns a list
+    of {"name", "filters"} where filters are what get_statistics takes.
+    """
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    entries = manifest.get('reports') if isinstance(manifest, dict) else manifest
+    if not isinstance(entries, list) or not entries:
+        raise ValueError('manifest must list at least one report')
+
+    specs = []
+    names = set()
+    for index, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict):
+            raise ValueError(f'report {index} must be an object')
+        date_from = date.fromisoformat(entry['from']) if entry.get('from') else None
+        date_to = date.fromisoformat(entry['to']) if entry.get('to') else None
+        if entry.get('month'):
+            if date_from or date_to:
+                raise ValueError(f'report {index}: give either month or from/to')
+            date_from = date.fromisoformat(f"{entry['month']}-01")
+            date_to = _month_end(date_from)
+        if date_from and date_to and date_from > date_to:
+            raise ValueError(f'report {index}: from must not be after to')
+        name = str(entry.get('name') or f'report-{index}')
+        if not NAME_PATTERN.match(name) or name in names:
+            raise ValueError(f'report {index}: name {name!r} must be unique and only use '
+                             'letters, digits, ".", "_" and "-"')
+        names.add(name)
+        specs.append({
+            'name': name,
+            'filters': {
+                'date_from': date_from,
+                'date_to': date_to,
+                'category': str(entry['category']) if entry.get('category') else None
+            }
+        })
+    return specs
+
+def _kpi_range(filters):
+    """Date range (start, end exclusive) the loan/fine/hold figures cover; None = unbounded"""
+    date_to = filters.get('date_to')
+    return filters.get('date_from'), date_to + timedelta(days=1) if date_to else None
+
+def _covering(ranges):
+    """Smallest (start, end) range containing all of `ranges`"""
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    return (None if None in starts else min(starts),
+            None if None in ends else max(ends))
+
+def batch_grain(specs):
+    """'month' when every date boundary of `specs` is a first of the month, else 'day'
+
+    Month buckets are enough to answer whole-month slices exactly and are
+    ~30x fewer rows; anything else needs daily buckets.
+    """
+    boundaries = []
+    for spec in specs:
+        boundaries += _kpi_range(spec['filters'])
+        boundaries += spec['period'][:2]
+    return 'month' if all(day is None or day.day == 1 for day in boundaries) else 'day'
+
+def _bucket(column, grain):
+    if grain == 'month':
+        return f"DATE({column}) - INTERVAL (DAYOFMONTH({column}) - 1) DAY"
+    return f"DATE({column})"
+
+def _range_where(column, date_range, clauses=()):
+    clauses = list(clauses)
+    params = []
+    start, end = date_range
+    if start:
+        clauses.append(f"{column} >= %s")
+        params.append(start)
+    if end:
+        clauses.append(f"{column} < %s")
+        params.append(end)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+def batch_queries(specs, grain):
+    """Aggregate queries covering every spec
+
+    Returns ({name: (sql, params)}, {name: (sql, params, range, categories)}).
+    Loans, pending fines and active holds are counted per (category, day or
+    month); books per category. Most borrowed books depend on the exact date
+    range, so the second dict has one per-book count per distinct range.
+    """
+    kpi_ranges = [_kpi_range(spec['filters']) for spec in specs]
+    loan_ranges = kpi_ranges + [spec['period'][:2] for spec in specs]
+    queries = {}
+    top_queries = {}
+
+    queries['books'] = ("""
+        SELECT category, COUNT(*), COALESCE(SUM(total_copies), 0), COALESCE(SUM(available_copies), 0)
+        FROM books
+        GROUP BY category
+    """, [])
+
+    queries['users'] = ("SELECT COUNT(*) FROM users WHERE role = 'user'", [])
+
+    where, params = _range_where('l.loan_date', _covering(loan_ranges))
+    queries['loans'] = (f"""
+        SELECT b.category as book_category, {_bucket('l.loan_date', grain)} as bucket,
+               COUNT(*),
+               COALESCE(SUM(l.status = 'active'), 0),
+               COALESCE(SUM(l.status = 'returned'), 0),
+               COALESCE(SUM(l.status = 'active' AND l.due_date < CURDATE()), 0)
+        FROM loans l
+        JOIN books b ON b.id = l.book_id
+        {where}
+        GROUP BY book_category, bucket
+    """, params)
+
+    # A fine belongs to the category of its loan's or its hold's book
+    where, params = _range_where('f.created_at', _covering(kpi_ranges), ["f.status = 'pending'"])
+    queries['fines'] = (f"""
+        SELECT COALESCE(lb.category, hb.category) as book_category,
+               {_bucket('f.created_at', grain)} as bucket,
+               COALESCE(SUM(f.amount), 0)
+        FROM fines f
+        LEFT JOIN loans l ON l.id = f.loan_id
+        LEFT JOIN books lb ON lb.id = l.book_id
+        LEFT JOIN holds h ON h.id = f.hold_id
+        LEFT JOIN books hb ON hb.id = h.book_id
+        {where}
+        GROUP BY book_category, bucket
+    """, params)
+
+    where, params = _range_where('h.hold_date', _covering(kpi_ranges),
+                                 ["h.status IN ('pending', 'available')"])
+    queries['holds'] = (f"""
+        SELECT b.category as book_category, {_bucket('h.hold_date', grain)} as bucket, COUNT(*)
+        FROM holds h
+        JOIN books b ON b.id = h.book_id
+        {where}
+        GROUP BY book_category, bucket
+    """, params)
+
+    for index, date_range in enumerate(sorted(set(kpi_ranges), key=str)):
+        categories = {spec['filters']['category'] for spec, kpi in zip(specs, kpi_ranges)
+                      if kpi == date_range}
+        clauses = []
+        category_params = []
+        if None not in categories:
+            # Only the categories some report in this range is scoped to
+            clauses.append(f"b.category IN ({', '.join(['%s'] * len(categories))})")
+            category_params = sorted(categories)
+        where, params = _range_where('l.loan_date', date_range, clauses)
+        top_queries[f'most_borrowed_{index}'] = (f"""
+            SELECT b.category, l.book_id, COUNT(*)
+            FROM loans l
+            JOIN books b ON b.id = l.book_id
+            {where}
+            GROUP BY b.category, l.book_id
+        """, category_params + params, date_range, categories)
+    return queries, top_queries
+
+def _top_books(rows, categories):
+    """Reduce (category, book_id, count) rows to the top books for each of `categories`
+
+    None stands for all categories. Keeps only TOP_BOOKS ids per category,
+    so a range with many borrowed books does not stay in memory.
+    """
+    by_category = defaultdict(list)
+    for category, book_id, count in rows:
+        by_category[category].append((int(count), -book_id))
+    top = {}
+    for category in categories:
+        if category is None:
+            candidates = [row for rows in by_category.values() for row in rows]
+        else:
+            candidates = by_category.get(category, [])
+        top[category] = [(-negative_id, count)
+                         for count, negative_id in heapq.nlargest(TOP_BOOKS, candidates)]
+    return top
+
+def _fetch(pool, timings, name, sql, params):
+    with pool.connection() as connection:
+        with timings.span('queries', name) as span:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+            span['rows'] = len(rows)
+    return rows
+
+def _fetch_top_books(pool, timings, name, sql, params, categories):
+    return _top_books(_fetch(pool, timings, name, sql, params), categories)
+
+def fetch_aggregates(pool, specs, timings):
+    """Run the batch's aggregate queries concurrently on `pool` (a ConnectionPool)
+
+    `specs` need a 'period' (start, end, label) as from report_period.
+    """
+    grain = batch_grain(specs)
+    queries, top_queries = batch_queries(specs, grain)
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        futures = {name: executor.submit(_fetch, pool, timings, name, sql, params)
+                   for name, (sql, params) in queries.items()}
+        top_futures = {
+            date_range: executor.submit(_fetch_top_books, pool, timings, name, sql, params, categories)
+            for name, (sql, params, date_range, categories) in top_queries.items()
+        }
+        results = {name: future.result() for name, future in futures.items()}
+        top_books = {date_range: future.result() for date_range, future in top_futures.items()}
+
+    # Like get_statistics, a report of the whole library fills its most
+    # borrowed books up with unborrowed ones
+    top = top_books.get((None, None), {}).get(None)
+    if top is not None and len(top) < TOP_BOOKS:
+        exclude = [book_id for book_id, _ in top] or [0]
+        rows = _fetch(pool, timings, 'most_borrowed_padding', f"""
+            SELECT id FROM books
+            WHERE id NOT IN ({', '.join(['%s'] * len(exclude))})
+            ORDER BY id
+            LIMIT {TOP_BOOKS - len(top)}
+        """, exclude)
+        top.extend((book_id, 0) for (book_id,) in rows)
+
+    book_ids = sorted({book_id for top in top_books.values()
+                       for books in top.values() for book_id, _ in books})
+    titles = {}
+    if book_ids:
+        rows = _fetch(pool, timings, 'most_borrowed_titles',
+                      f"SELECT id, title, author FROM books WHERE id IN ({', '.join(['%s'] * len(book_ids))})",
+                      book_ids)
+        titles = {book_id: (title, author) for book_id, title, author in rows}
+
+    results['grain'] = grain
+    results['top_books'] = top_books
+    results['titles'] = titles
+    return results
+
+def _in_range(day, start, end):
+    return (start is None or day >= start) and (end is None or day < end)
+
+def slice_statistics(aggregates, spec):
+    """Statistics for one spec derived from fetch_aggregates, shaped like get_statistics"""
+    filters = spec['filters']
+    category = filters.get('category')
+    start, end = _kpi_range(filters)
+    period_start, period_end, label = spec['period']
+
+    def scoped(rows):
+        for row in rows:
+            if (category is None or row[0] == category) and _in_range(row[1], start, end):
+                yield row
+
+    books = [row for row in aggregates['books'] if category is None or row[0] == category]
+    books_by_category = sorted(
+        ({'category': row[0], 'count': int(row[1])} for row in books if row[0] is not None),
+        key=lambda row: row['count'], reverse=True
+    )[:10]
+
+    loans = [0, 0, 0, 0]
+    for row in scoped(aggregates['loans']):
+        for i in range(4):
+            loans[i] += int(row[2 + i])
+
+    months = defaultdict(int)
+    for row in aggregates['loans']:
+        if (category is None or row[0] == category) and _in_range(row[1], period_start, period_end):
+            months[row[1].strftime('%Y-%m')] += int(row[2])
+
+    most_borrowed = []
+    for book_id, count in aggregates['top_books'][(start, end)][category]:
+        title, author = aggregates['titles'].get(book_id, (None, None))
+        most_borrowed.append({'title': title, 'author': author, 'borrow_count': count})
+
+    return {
+        'total_books': sum(int(row[1]) for row in books),
+        'total_copies': sum(int(row[2]) for row in books),
+        'available_copies': sum(int(row[3]) for row in books),
+        'total_users': int(aggregates['users'][0][0]),
+        'total_loans': loans[0],
+        'active_loans': loans[1],
+        'returned_loans': loans[2],
+        'overdue_loans': loans[3],
+        'total_fines': float(sum(row[2] for row in scoped(aggregates['fines']))),
+        'active_holds': sum(int(row[2]) for row in scoped(aggregates['holds'])),
+        'loans_by_month': [{'month': month, 'count': count} for month, count in sorted(months.items())],
+        'books_by_category': books_by_category,
+        'most_borrowed': most_borrowed,
+        'period': label
+    }
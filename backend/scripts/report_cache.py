@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Chart cache
+Content-addressed disk cache for rendered report charts with size-bounded
+LRU eviction
+"""
+
+import os
+import sys
+import json
+import hashlib
+import tempfile
+
+CACHE_DIR = os.getenv(
+    'REPORT_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.chart_cache')
+)
+CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+class ChartCache:
+    """Rendered charts stored under a hash of their input data and renderer
+
+    Entries are files named by key; their mtime is refreshed on every hit so
+    eviction can drop the least recently used ones first.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, renderer, data, params):
+        """Hash of the chart's input rows, its renderer and rendering parameters
+
+        The renderer's bytecode and constants are part of the key, so editing
+        a size, color or label in the renderer invalidates its entries.
+        """
+        code = renderer.__code__
+        payload = json.dumps({
+            'renderer': renderer.__name__,
+            'code': code.co_code.hex(),
+            'consts': repr(code.co_consts),
+            'params': params,
+            'data': data
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.png')
+
+    def get(self, key):
+        """Cached PNG bytes for `key`, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        """Add a freshly rendered chart and evict old entries if over budget"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until under `max_bytes`"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.png'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def report(self):
+        """Write the hit/miss counters to stderr"""
+        print(f"Chart cache: {self.hits} hit(s), {self.misses} miss(es)", file=sys.stderr)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Bulk exports
+Streams whole loans, fines and holds tables (with book and user details)
+to CSV and Parquet in fixed-size batches, so memory stays flat at any size
+"""
+
+import os
+import sys
+import csv
+import time
+
+from report_timing import Timings
+
+EXPORT_FORMATS = ('csv', 'parquet')
+
+# Rows fetched from the server and written out per batch
+EXPORT_BATCH_SIZE = int(os.getenv('REPORT_EXPORT_BATCH_SIZE', '10000'))
+
+# Per table: SELECT ... FROM/JOIN part, the date column --from/--to apply to,
+# and the output columns with their Parquet types. Rows come in primary key
+# order, which InnoDB can stream without sorting.
+EXPORTS = {
+    'loans': {
+        'sql': """
+            SELECT l.id, l.user_id, u.email, l.book_id, b.title, b.author,
+                   l.loan_date, l.due_date, l.return_date, l.status, l.created_at
+            FROM loans l
+            JOIN users u ON u.id = l.user_id
+            JOIN books b ON b.id = l.book_id
+        """,
+        'date_column': 'l.loan_date',
+        'order_by': 'l.id',
+        'columns': [
+            ('loan_id', 'int64'), ('user_id', 'int64'), ('user_email', 'string'),
+            ('book_id', 'int64'), ('title', 'string'), ('author', 'string'),
+            ('loan_date', 'date32'), ('due_date', 'date32'), ('return_date', 'date32'),
+            ('status', 'string'), ('created_at', 'timestamp')
+        ]
+    },
+    'fines': {
+        'sql': """
+            SELECT f.id, f.user_id, u.email, f.loan_id, f.hold_id, b.id, b.title, b.author,
+                   f.amount, f.type, f.status, f.description, f.created_at
+            FROM fines f
+            JOIN users u ON u.id = f.user_id
+            LEFT JOIN loans l ON l.id = f.loan_id
+            LEFT JOIN holds h ON h.id = f.hold_id
+            LEFT JOIN books b ON b.id = COALESCE(l.book_id, h.book_id)
+        """,
+        'date_column': 'f.created_at',
+        'order_by': 'f.id',
+        'columns': [
+            ('fine_id', 'int64'), ('user_id', 'int64'), ('user_email', 'string'),
+            ('loan_id', 'int64'), ('hold_id', 'int64'), ('book_id', 'int64'),
+            ('title', 'string'), ('author', 'string'), ('amount', 'decimal'),
+            ('type', 'string'), ('status', 'string'), ('description', 'string'),
+            ('created_at', 'timestamp')
+        ]
+    },
+    'holds': {
+        'sql': """
+            SELECT h.id, h.user_id, u.email, h.book_id, b.title, b.author,
+                   h.hold_date, h.expiry_datetime, h.fee_amount, h.fee_applied, h.status
+            FROM holds h
+            JOIN users u ON u.id = h.user_id
+            JOIN books b ON b.id = h.book_id
+        """,
+        'date_column': 'h.hold_date',
+        'order_by': 'h.id',
+        'columns': [
+            ('hold_id', 'int64'), ('user_id', 'int64'), ('user_email', 'string'),
+            ('book_id', 'int64'), ('title', 'string'), ('author', 'string'),
+            ('hold_date', 'timestamp'), ('expiry_datetime', 'timestamp'),
+            ('fee_amount', 'decimal'), ('fee_applied', 'bool'), ('status', 'string')
+        ]
+    }
+}
+
+def export_query(table, filters=None):
+    """SQL and params streaming `table`, limited by date_from/date_to/category"""
+    spec = EXPORTS[table]
+    filters = filters or {}
+    clauses = []
+    params = []
+    if filters.get('date_from'):
+        clauses.append(f"{spec['date_column']} >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        # Exclusive upper bound so DATETIME columns include the whole last day
+        clauses.append(f"{spec['date_column']} < %s + INTERVAL 1 DAY")
+        params.append(filters['date_to'])
+    if filters.get('category'):
+        clauses.append("b.category = %s")
+        params.append(filters['category'])
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"{spec['sql']} {where} ORDER BY {spec['order_by']}", params
+
+def _parquet_writer(path, table):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Error: Parquet export requires pyarrow. Install it with: pip install pyarrow",
+              file=sys.stderr)
+        sys.exit(1)
+    types = {
+        'int64': pa.int64(),
+        'string': pa.string(),
+        'date32': pa.date32(),
+        'timestamp': pa.timestamp('s'),
+        'decimal': pa.decimal128(10, 2),
+        'bool': pa.bool_()
+    }
+    schema = pa.schema([(name, types[kind]) for name, kind in EXPORTS[table]['columns']])
+    writer = pq.ParquetWriter(path, schema, compression='zstd')
+
+    def write(rows):
+        columns = list(zip(*rows))
+        arrays = []
+        for (name, kind), values in zip(EXPORTS[table]['columns'], columns):
+            if kind == 'bool':
+                values = [None if value is None else bool(value) for value in values]
+            arrays.append(pa.array(values, type=types[kind]))
+        # One row group per batch keeps only the current batch in memory
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+    return write, writer.close
+
+def _csv_writer(path, table):
+    f = open(path, 'w', newline='', encoding='utf-8')
+    writer = csv.writer(f)
+    writer.writerow([name for name, _ in EXPORTS[table]['columns']])
+    return writer.writerows, f.close
+
+def export_table(connection, table, output_dir, formats=('csv',), filters=None,
+                 batch_size=EXPORT_BATCH_SIZE):
+    """Stream `table` into <output_dir>/<table>.<format> for each format
+
+    `connection` must not be shared while the export runs: its unbuffered
+    cursor keeps the result set on the server and pulls `batch_size` rows
+    at a time. Returns rows, seconds, rows/sec and the files written.
+    """
+    sql, params = export_query(table, filters)
+    files = {fmt: os.path.join(output_dir, f"{table}.{fmt}") for fmt in formats}
+    writers = []
+    closers = []
+    try:
+        for fmt, path in files.items():
+            write, close = _parquet_writer(path, table) if fmt == 'parquet' else _csv_writer(path, table)
+            writers.append(write)
+            closers.append(close)
+
+        count = 0
+        start = time.perf_counter()
+        cursor = connection.cursor(buffered=False)
+        try:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for write in writers:
+                    write(rows)
+                count += len(rows)
+        finally:
+            cursor.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        for close in closers:
+            close()
+
+    return {
+        'rows': count,
+        'seconds': round(elapsed, 2),
+        'rows_per_sec': round(count / elapsed) if elapsed else None,
+        'files': {fmt: {'path': path, 'bytes': os.path.getsize(path)} for fmt, path in files.items()}
+    }
+
+def export_tables(connection, tables, output_dir, formats=('csv',), filters=None,
+                  batch_size=EXPORT_BATCH_SIZE, timings=None):
+    """Export each of `tables` in turn; returns {table: export_table result}"""
+    os.makedirs(output_dir, exist_ok=True)
+    # The server drops a streaming client that stalls longer than
+    # net_write_timeout; give slow writers (e.g. Parquet compression) room
+    cursor = connection.cursor()
+    cursor.execute("SET SESSION net_write_timeout = 600")
+    cursor.close()
+
+    timings = timings or Timings()
+    results = {}
+    for table in tables:
+        print(f"Exporting {table}...", file=sys.stderr)
+        with timings.span('exports', table) as span:
+            results[table] = export_table(connection, table, output_dir, formats,
+                                          filters, batch_size)
+            span['rows'] = results[table]['rows']
+        print(f"Exported {results[table]['rows']} {table} rows "
+              f"({results[table]['rows_per_sec']} rows/sec)", file=sys.stderr)
+    return results
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Library Management System - LaTeX report backend
+Typesets the report with pdflatex. The fixed preamble is precompiled once
+into a cached format file, a second pass only runs when the log asks for
+one, and every build runs in a private directory so reports can compile
+concurrently
+"""
+
+import os
+import re
+import sys
+import shutil
+import hashlib
+import subprocess
+import tempfile
+
+from report_snapshot import snapshot_label
+
+FORMAT_DIR = os.getenv(
+    'REPORT_LATEX_FORMAT_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '.latex_formats')
+)
+
+# Seconds one pdflatex run may take
+LATEX_TIMEOUT = int(os.getenv('REPORT_LATEX_TIMEOUT', '120'))
+
+# The first pass plus at most this many reruns asked for by the log
+MAX_RERUNS = 2
+
+# What LaTeX and its packages write to the log when another pass would
+# change the output
+RERUN_PATTERN = re.compile(r'Rerun to get|Label\(s\) may have changed|Please rerun')
+
+# Everything before \begin{document} that does not depend on the data; this
+# is what the format file holds
+PREAMBLE = r"""\documentclass[11pt,a4paper]{article}
+\usepackage[utf8]{inputenc}
+\usepackage{graphicx}
+\usepackage{geometry}
+\usepackage{fancyhdr}
+\usepackage{booktabs}
+\usepackage{multirow}
+\usepackage{xcolor}
+\usepackage{hyperref}
+
+\geometry{margin=1in}
+\pagestyle{fancy}
+\fancyhf{}
+\fancyhead[L]{\textbf{Library Management System}}
+\fancyhead[R]{\today}
+\fancyfoot[C]{\thepage}
+"""
+
+# Figures in document order: (chart file name, heading, width, caption)
+FIGURES = (
+    ('loans_by_month.png', 'Loans Trend ({period})', '0.9', 'Monthly loan activity ({period})'),
+    ('loan_status.png', 'Loan Status Distribution', '0.6', 'Distribution of loan statuses'),
+    ('books_by_category.png', 'Books by Category', '0.9', 'Book distribution across categories'),
+    ('most_borrowed.png', 'Most Borrowed Books', '0.9', 'Top 10 most frequently borrowed books'),
+    ('loan_durations.png', 'Time to Return', '0.9', 'Days on loan of returned loans'),
+    ('overdue_aging.png', 'Overdue Aging', '0.9', 'Days past due of outstanding loans'),
+    ('weekday_load.png', 'Desk Load by Weekday', '0.9', 'Loans and returns per weekday')
+)
+
+_SPECIAL = {
+    '\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$', '#': r'\#',
+    '_': r'\_', '{': r'\{', '}': r'\}', '~': r'\textasciitilde{}', '^': r'\textasciicircum{}'
+}
+
+def _escape(text):
+    return ''.join(_SPECIAL.get(char, char) for char in str(text))
+
+def _days(value):
+    return '-' if value is None else f"{value:.1f} days"
+
+def _table(spec, header, rows):
+    """A booktabs table with a bold `header` row"""
+    lines = [r"\begin{table}[h]", r"\centering", r"\begin{tabular}{" + spec + "}", r"\toprule",
+             " & ".join(r"\textbf{" + name + "}" for name in header) + r" \\", r"\midrule"]
+    lines += [" & ".join(_escape(cell) for cell in row) + r" \\" for row in rows]
+    lines += [r"\bottomrule", r"\end{tabular}", r"\end{table}", ""]
+    return "\n".join(lines)
+
+def _analytics_section(analytics):
+    """The Loan Analytics section, with the tables of generate_pdf_with_reportlab"""
+    returns = analytics['time_to_return']
+    return "\n".join([
+        r"\newpage",
+        r"\section*{Loan Analytics}",
+        "",
+        r"\subsection*{Time to Return}",
+        "",
+        _table('lr', ['Metric', 'Value'], [
+            ['Loans Analysed', analytics['loans']],
+            ['Distinct Borrowers', analytics['borrowers']],
+            ['Distinct Books', analytics['books']],
+            ['Returned Loans', returns['returned']],
+            ['Returned Late', returns['late']],
+            ['Mean Time to Return', _days(returns['mean'])],
+            ['Median (p50)', _days(returns['p50'])],
+            ['p95', _days(returns['p95'])],
+            ['p99', _days(returns['p99'])]
+        ]),
+        r"\subsection*{Overdue Aging}",
+        "",
+        _table('lc', ['Days Past Due', 'Outstanding Loans'],
+               [[row['label'], row['count']] for row in analytics['overdue_aging']]),
+        r"\subsection*{Loans by Weekday}",
+        "",
+        _table('lcc', ['Weekday', 'Loans', 'Returns'],
+               [[row['day'], row['loans'], row['returns']] for row in analytics['weekday_load']])
+    ])
+
+def _graph_name(graph):
+    return os.path.basename(graph) if isinstance(graph, str) else graph[0]
+
+def latex_body(stats, graphs):
+    """The report from \\title on, for a document whose preamble is PREAMBLE"""
+    names = {_graph_name(graph) for graph in graphs}
+    period = _escape(stats.get('period', 'Last 12 Months'))
+    latex_content = r"""
+\title{\textbf{Library Management System\\Statistical Report}}
+\author{Generated Report}
+\date{\today}
+
+\begin{document}
+
+\maketitle
+"""
+    if stats.get('snapshot'):
+        latex_content += "\nStatistics as of " + _escape(snapshot_label(stats['snapshot'])) + ".\n"
+    latex_content += r"""
+\section*{Executive Summary}
+
+This report provides a comprehensive overview of the library management system's statistics and performance metrics.
+
+\subsection*{Key Statistics}
+
+\begin{table}[h]
+\centering
+\begin{tabular}{lr}
+\toprule
+\textbf{Metric} & \textbf{Value} \\
+\midrule
+Total Books & """ + str(stats['total_books']) + r""" \\
+Total Copies & """ + str(stats['total_copies']) + r""" \\
+Available Copies & """ + str(stats['available_copies']) + r""" \\
+Total Users & """ + str(stats['total_users']) + r""" \\
+Total Loans & """ + str(stats['total_loans']) + r""" \\
+Active Loans & """ + str(stats['active_loans']) + r""" \\
+Returned Loans & """ + str(stats['returned_loans']) + r""" \\
+Overdue Loans & """ + str(stats['overdue_loans']) + r""" \\
+Active Reservations & """ + str(stats['active_holds']) + r""" \\
+Total Pending Fines & """ + f"{stats['total_fines']:.2f}" + r""" EGP \\
+\bottomrule
+\end{tabular}
+\end{table}
+
+\newpage
+\section*{Visual Analytics}
+"""
+
+    # Charts are referenced without extension: PNGs, or PDFs for vector charts
+    for name, heading, width, caption in FIGURES:
+        if name in names:
+            latex_content += r"""
+\subsection*{""" + heading.format(period=period) + r"""}
+
+\begin{figure}[h]
+\centering
+\includegraphics[width=""" + width + r"""\textwidth]{""" + os.path.splitext(name)[0] + r"""}
+\caption{""" + caption.format(period=period) + r"""}
+\end{figure}
+"""
+
+    # Add detailed tables
+    latex_content += r"""
+\newpage
+\section*{Detailed Statistics}
+
+\subsection*{Most Borrowed Books}
+
+\begin{table}[h]
+\centering
+\begin{tabular}{lcc}
+\toprule
+\textbf{Book Title} & \textbf{Author} & \textbf{Borrow Count} \\
+\midrule
+"""
+
+    for book in stats['most_borrowed'][:10]:
+        title = _escape(book['title'][:50])
+        author = _escape(book['author'][:30])
+        latex_content += f"{title} & {author} & {book['borrow_count']} \\\\\n"
+
+    latex_content += r"""
+\bottomrule
+\end{tabular}
+\end{table}
+
+\subsection*{Books by Category}
+
+\begin{table}[h]
+\centering
+\begin{tabular}{lc}
+\toprule
+\textbf{Category} & \textbf{Count} \\
+\midrule
+"""
+
+    for cat in stats['books_by_category']:
+        latex_content += f"{_escape(cat['category'])} & {cat['count']} \\\\\n"
+
+    latex_content += r"""
+\bottomrule
+\end{tabular}
+\end{table}
+"""
+
+    if stats.get('loan_analytics'):
+        latex_content += "\n" + _analytics_section(stats['loan_analytics'])
+
+    latex_content += r"""
+
+\vfill
+\begin{center}
+\textit{Report generated on \today}
+\end{center}
+
+\end{document}
+"""
+    return latex_content
+
+def generate_latex_document(stats, graphs, output_path):
+    """Generate LaTeX document (preamble included, no format file needed)"""
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(PREAMBLE + latex_body(stats, graphs))
+
+def stage_graphs(graphs, directory):
+    """Put the charts into `directory` under the names latex_body refers to
+
+    `graphs` takes the same forms as for generate_pdf_with_reportlab; vector
+    drawings are written as PDFs.
+    """
+    for graph in graphs:
+        if isinstance(graph, str):
+            shutil.copy(graph, directory)
+            continue
+        name, chart = graph
+        if isinstance(chart, bytes):
+            with open(os.path.join(directory, name), 'wb') as f:
+                f.write(chart)
+        else:
+            from reportlab.graphics import renderPDF
+            renderPDF.drawToFile(chart, os.path.join(directory, os.path.splitext(name)[0] + '.pdf'))
+
+_version = None
+
+def _pdflatex_version():
+    global _version
+    if _version is None:
+        _version = subprocess.run(['pdflatex', '--version'], capture_output=True, text=True,
+                                  check=True).stdout.split('\n', 1)[0]
+    return _version
+
+def preamble_format(directory=FORMAT_DIR):
+    """Path of the format file holding PREAMBLE precompiled, built on first use
+
+    The file name carries a hash of the preamble and the pdflatex version, so
+    editing the preamble or upgrading TeX builds a new one. Concurrent first
+    builds each work in a directory of their own and the last rename wins.
+    """
+    key = hashlib.sha256((PREAMBLE + _pdflatex_version()).encode('utf-8')).hexdigest()[:16]
+    name = f'report-preamble-{key}'
+    path = os.path.join(directory, name + '.fmt')
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    work = tempfile.mkdtemp(prefix='format-', dir=directory)
+    try:
+        with open(os.path.join(work, 'preamble.tex'), 'w', encoding='utf-8') as f:
+            f.write(PREAMBLE + '\\dump\n')
+        subprocess.run(['pdflatex', '-ini', '-interaction=nonstopmode', '-halt-on-error',
+                        f'-jobname={name}', '&pdflatex', 'preamble.tex'],
+                       cwd=work, capture_output=True, check=True, timeout=LATEX_TIMEOUT)
+        os.replace(os.path.join(work, name + '.fmt'), path)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    # Formats of an older preamble or TeX
+    for entry in os.listdir(directory):
+        if entry.startswith('report-preamble-') and entry != name + '.fmt':
+            try:
+                os.remove(os.path.join(directory, entry))
+            except OSError:
+                pass
+    return path
+
+def _needs_rerun(log_path):
+    try:
+        with open(log_path, encoding='latin-1') as f:
+            return RERUN_PATTERN.search(f.read()) is not None
+    except FileNotFoundError:
+        return False
+
+def compile_latex_to_pdf(latex_path, output_dir, fmt=None):
+    """Compile LaTeX document to PDF
+
+    With `fmt`, the name of a format file in `output_dir`, the document
+    starts after the preamble the format holds. pdflatex runs again only
+    while its log asks for a rerun, at most MAX_RERUNS times.
+    """
+    abs_latex_path = os.path.abspath(latex_path)
+    abs_output_dir = os.path.abspath(output_dir)
+    jobname = os.path.splitext(os.path.basename(latex_path))[0]
+    command = ['pdflatex', '-interaction=nonstopmode', '-halt-on-error',
+               '-output-directory', abs_output_dir]
+    if fmt:
+        command.append(f'-fmt={fmt}')
+    command.append(abs_latex_path)
+
+    try:
+        for _ in range(1 + MAX_RERUNS):
+            result = subprocess.run(command, capture_output=True, text=True, errors='replace',
+                                    cwd=abs_output_dir, timeout=LATEX_TIMEOUT)
+            if result.returncode != 0:
+                # pdflatex reports errors on stdout
+                print(f"LaTeX compilation error: {result.stdout[-2000:]}", file=sys.stderr)
+                return None
+            if not _needs_rerun(os.path.join(abs_output_dir, jobname + '.log')):
+                break
+    except FileNotFoundError:
+        print("Error: pdflatex not found. Please install LaTeX distribution.", file=sys.stderr)
+        return None
+    except subprocess.TimeoutExpired:
+        print(f"Error: pdflatex took longer than {LATEX_TIMEOUT}s", file=sys.stderr)
+        return None
+
+    pdf_path = os.path.join(abs_output_dir, jobname + '.pdf')
+    return pdf_path if os.path.exists(pdf_path) else None
+
+def _link_format(format_path, directory):
+    # A hard link is free; a copy still beats loading the packages
+    target = os.path.join(directory, os.path.basename(format_path))
+    try:
+        os.link(format_path, target)
+    except OSError:
+        shutil.copy(format_path, target)
+    return os.path.splitext(os.path.basename(format_path))[0]
+
+def build_latex_pdf(stats, graphs, output_path, format_dir=FORMAT_DIR):
+    """Typeset the report with pdflatex into `output_path`
+
+    `output_path` may be a path or a writable binary file object. The build
+    runs in a fresh temporary directory with its own copy of the charts, so
+    any number of builds can run at once. If the format file cannot be
+    built, the document is compiled with its full preamble instead.
+    """
+    work = tempfile.mkdtemp(prefix='library-latex-')
+    try:
+        stage_graphs(graphs, work)
+        try:
+            fmt = _link_format(preamble_format(format_dir), work)
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"Warning: no precompiled LaTeX preamble ({e}); loading it in full", file=sys.stderr)
+            fmt = None
+
+        latex_path = os.path.join(work, 'report.tex')
+        with open(latex_path, 'w', encoding='utf-8') as f:
+            f.write(latex_body(stats, graphs) if fmt else PREAMBLE + latex_body(stats, graphs))
+        pdf_path = compile_latex_to_pdf(latex_path, work, fmt)
+        if not pdf_path and fmt:
+            print("Warning: compiling with the precompiled preamble failed; retrying without it",
+                  file=sys.stderr)
+            generate_latex_document(stats, graphs, latex_path)
+            pdf_path = compile_latex_to_pdf(latex_path, work)
+        if not pdf_path:
+            return None
+
+        if isinstance(output_path, str):
+            shutil.move(pdf_path, output_path)
+        else:
+            with open(pdf_path, 'rb') as f:
+                shutil.copyfileobj(f, output_path)
+        return output_path
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Incremental loan rollups
+Keeps per-day and per-book loan counts in a local SQLite file so the report
+only aggregates loans created since the previous run
+"""
+
+import os
+import sqlite3
+from datetime import date, timedelta
+
+ROLLUP_PATH = os.getenv(
+    'REPORT_ROLLUP_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_rollup.sqlite3')
+)
+
+# Loans younger than this are never persisted: an INSERT that commits late
+# could otherwise land below the high-water mark and be skipped forever.
+# They are still counted on every run as the un-persisted "tail".
+SETTLE_MINUTES = int(os.getenv('REPORT_ROLLUP_SETTLE_MINUTES', '5'))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS loan_days (
+    day TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS book_loans (
+    book_id INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_book_loans_count ON book_loans (count DESC);
+"""
+
+def open_rollup(path=ROLLUP_PATH):
+    """Open (and create if needed) the rollup store"""
+    store = sqlite3.connect(path, timeout=30, isolation_level=None)
+    store.executescript(SCHEMA)
+    return store
+
+def _get_meta(store, key, default=None):
+    row = store.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+def _set_meta(store, key, value):
+    store.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, str(value))
+    )
+
+def _fetch(connection, sql, params=()):
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+
+def _delta(connection, lower, upper=None):
+    """Aggregate loans with lower < id [<= upper] by day and by book"""
+    where = "id > %s"
+    params = [lower]
+    if upper is not None:
+        where += " AND id <= %s"
+        params.append(upper)
+    days = _fetch(connection, f"""
+        SELECT loan_date as day, COUNT(*) as count
+        FROM loans WHERE {where}
+        GROUP BY loan_date
+    """, params)
+    books = _fetch(connection, f"""
+        SELECT book_id, COUNT(*) as count
+        FROM loans WHERE {where}
+        GROUP BY book_id
+    """, params)
+    return (
+        {str(row['day']): int(row['count']) for row in days},
+        {int(row['book_id']): int(row['count']) for row in books}
+    )
+
+def refresh_rollup(store, connection, source, rebuild=False):
+    """Fold settled loans above the high-water mark into the store
+
+    `source` identifies the database the store was built from; a store
+    built from another database is discarded and rebuilt. Returns the
+    high-water mark after the refresh.
+    """
+    store.execute("BEGIN IMMEDIATE")
+    try:
+        high_water = int(_get_meta(store, 'high_water_id', 0))
+        if rebuild or _get_meta(store, 'source') != source:
+            store.execute("DELETE FROM loan_days")
+            store.execute("DELETE FROM book_loans")
+            high_water = 0
+            _set_meta(store, 'source', source)
+
+        settled = _fetch(connection, """
+            SELECT MAX(id) as max_id FROM loans
+            WHERE id > %s AND created_at < NOW() - INTERVAL %s MINUTE
+        """, (high_water, SETTLE_MINUTES))[0]['max_id']
+
+        if settled is not None:
+            days, books = _delta(connection, high_water, settled)
+            store.executemany(
+                "INSERT INTO loan_days (day, count) VALUES (?, ?) "
+                "ON CONFLICT(day) DO UPDATE SET count = count + excluded.count",
+                days.items()
+            )
+            store.executemany(
+                "INSERT INTO book_loans (book_id, count) VALUES (?, ?) "
+                "ON CONFLICT(book_id) DO UPDATE SET count = count + excluded.count",
+                books.items()
+            )
+            high_water = int(settled)
+
+        _set_meta(store, 'high_water_id', high_water)
+        store.execute("COMMIT")
+    except BaseException:
+        store.execute("ROLLBACK")
+        raise
+    return high_water
+
+def months_ago(today, months):
+    """Same date `months` earlier, clamped like MySQL's DATE_SUB"""
+    year, month = divmod(today.year * 12 + today.month - 1 - months, 12)
+    month += 1
+    for day in (today.day, 30, 29, 28):
+        try:
+            return date(year, month, day)
+        except ValueError:
+            continue
+
+def loans_by_month(store, tail_days, start=None, end=None):
+    """Loan counts per month for loan dates in [start, end)
+
+    Defaults to the last 12 months, like the report's direct query.
+    """
+    today = date.today()
+    start = (start or months_ago(today, 12)).isoformat()
+    end = (end or today + timedelta(days=1)).isoformat()
+    counts = {}
+    for day, count in store.execute(
+        "SELECT day, count FROM loan_days WHERE day >= ? AND day < ?", (start, end)
+    ):
+        counts[day[:7]] = counts.get(day[:7], 0) + count
+    for day, count in tail_days.items():
+        if start <= day < end:
+            counts[day[:7]] = counts.get(day[:7], 0) + count
+    return [{'month': month, 'count': counts[month]} for month in sorted(counts)]
+
+def most_borrowed(store, connection, tail_books, limit=10):
+    """Top `limit` existing books by borrow count, padded with unborrowed books"""
+    page_size = limit * 3
+    offset = 0
+    found = []
+    seen = set()
+    while len(found) < limit:
+        page = dict(store.execute(
+            "SELECT book_id, count FROM book_loans ORDER BY count DESC LIMIT ? OFFSET ?",
+            (page_size, offset)
+        ).fetchall())
+        if offset == 0:
+            # Tail loans can lift a book from anywhere in the ranking
+            for book_id in tail_books:
+                if book_id not in page:
+                    row = store.execute(
+                        "SELECT count FROM book_loans WHERE book_id = ?", (book_id,)
+                    ).fetchone()
+                    page[book_id] = row[0] if row else 0
+        candidates = {
+            book_id: count + (tail_books.get(book_id, 0) if offset == 0 else 0)
+            for book_id, count in page.items() if book_id not in seen
+        }
+        if not candidates:
+            break
+        seen.update(candidates)
+        placeholders = ', '.join(['%s'] * len(candidates))
+        books = {
+            row['id']: row for row in _fetch(connection, f"""
+                SELECT id, title, author FROM books WHERE id IN ({placeholders})
+            """, list(candidates))
+        }
+        ranked = sorted(candidates.items(), key=lambda item: (-item[1], item[0]))
+        for book_id, count in ranked:
+            if book_id in books and count > 0 and len(found) < limit:
+                book = books[book_id]
+                found.append({'id': book_id, 'title': book['title'],
+                              'author': book['author'], 'borrow_count': count})
+        offset += page_size
+
+    if len(found) < limit:
+        exclude = [book['id'] for book in found] or [0]
+        placeholders = ', '.join(['%s'] * len(exclude))
+        for row in _fetch(connection, f"""
+            SELECT id, title, author FROM books
+            WHERE id NOT IN ({placeholders})
+            ORDER BY id
+            LIMIT {int(limit - len(found))}
+        """, exclude):
+            found.append({'id': row['id'], 'title': row['title'],
+                          'author': row['author'], 'borrow_count': 0})
+
+    return [{key: book[key] for key in ('title', 'author', 'borrow_count')} for book in found]
+
+def rollup_statistics(connection, source, path=ROLLUP_PATH, rebuild=False,
+                      start=None, end=None, top_books=True):
+    """`loans_by_month` (and `most_borrowed`) from the rollup store plus the live tail
+
+    Per-book counts cover all time, so `most_borrowed` is only returned
+    when `top_books` is set, i.e. for reports without a date range.
+    """
+    store = open_rollup(path)
+    try:
+        high_water = refresh_rollup(store, connection, source, rebuild=rebuild)
+        tail_days, tail_books = _delta(connection, high_water)
+        stats = {'loans_by_month': loans_by_month(store, tail_days, start, end)}
+        if top_books:
+            stats['most_borrowed'] = most_borrowed(store, connection, tail_books)
+        return stats
+    finally:
+        store.close()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Published statistics snapshot
+The library-wide report statistics as a versioned JSON file, published by
+publish_stats.py and read by the admin dashboard API and the PDF report
+instead of querying the big tables each time
+"""
+
+import os
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+SNAPSHOT_PATH = os.getenv(
+    'STATS_SNAPSHOT_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stats_snapshot.json')
+)
+
+# Layout of the file; readers ignore a snapshot with another schema version
+SCHEMA_VERSION = 1
+
+# Past this age a snapshot is stale: the dashboard flags it and reports
+# query the database instead
+MAX_AGE_MINUTES = float(os.getenv('STATS_SNAPSHOT_MAX_AGE_MINUTES', '15'))
+
+# The figures shown on the admin dashboard (and in the report's key
+# statistics table)
+KPIS = (
+    'total_books', 'total_copies', 'available_copies', 'total_users', 'total_loans',
+    'active_loans', 'returned_loans', 'overdue_loans', 'total_fines', 'active_holds'
+)
+
+def read_snapshot(path=SNAPSHOT_PATH):
+    """The published snapshot, or None if there is none (or it has another schema)"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return snapshot if snapshot.get('schema_version') == SCHEMA_VERSION else None
+
+def snapshot_age(snapshot, now=None):
+    """Seconds since the snapshot's statistics were read"""
+    now = now or datetime.now(timezone.utc)
+    return (now - datetime.fromisoformat(snapshot['generated_at'])).total_seconds()
+
+def is_fresh(snapshot, now=None):
+    """Whether the snapshot is younger than the max age it was published with"""
+    now = now or datetime.now(timezone.utc)
+    return now < datetime.fromisoformat(snapshot['stale_after'])
+
+def snapshot_label(snapshot):
+    """When, and from which published version, a report's statistics are
+
+    `snapshot` is the "snapshot" entry _published_statistics adds to them.
+    """
+    generated_at = datetime.fromisoformat(snapshot['generated_at']).astimezone()
+    return (f"{generated_at.strftime('%B %d, %Y %H:%M')} (published snapshot "
+            f"#{snapshot['version']}, {snapshot['age_seconds'] // 60} min old)")
+
+def write_snapshot(stats, generated_at, path=SNAPSHOT_PATH, max_age_minutes=MAX_AGE_MINUTES,
+                   **metadata):
+    """Publish `stats` (get_statistics output) read at `generated_at` as the next version
+
+    The file is written next to `path` and renamed over it, so readers see
+    either the previous snapshot or this one, never a partial file.
+    `metadata` is stored alongside. Returns the snapshot.
+    """
+    previous = read_snapshot(path)
+    generated_at = generated_at.astimezone(timezone.utc).replace(microsecond=0)
+    snapshot = {
+        'schema_version': SCHEMA_VERSION,
+        'version': previous['version'] + 1 if previous else 1,
+        'generated_at': generated_at.isoformat(),
+        'stale_after': (generated_at + timedelta(minutes=max_age_minutes)).isoformat(),
+        **metadata,
+        'kpis': {name: stats[name] for name in KPIS},
+        'statistics': stats
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.stats-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return snapshot
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Report instrumentation
+Records wall time, CPU time, row counts and peak memory for each report
+stage and statistics query, and optionally profiles a whole run
+"""
+
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+def peak_rss_mb(children=False):
+    """Peak resident set size in MB of this process, or of its reaped children"""
+    if not children:
+        try:
+            with open('/proc/self/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return round(int(line.split()[1]) / 1024, 1)
+        except OSError:
+            pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+class Timings:
+    """Spans recorded during one report run, grouped as {group: {name: span}}
+
+    Spans may be recorded from several threads at once. CPU time is that of
+    the recording thread, so work done in chart processes only shows up as
+    wall time; peak memory is the process high-water mark when the span ends.
+    `listener`, when given, is called as listener(event, group, name, record)
+    with event 'started' (record is None) and 'finished' around each span.
+    """
+
+    def __init__(self, listener=None):
+        self.groups = {}
+        self.listener = listener
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, group, name):
+        """Time the block; the yielded dict can take extra fields such as `rows`"""
+        record = {}
+        if self.listener:
+            self.listener('started', group, name, None)
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield record
+        finally:
+            record['wall_ms'] = round((time.perf_counter() - wall) * 1000, 2)
+            record['cpu_ms'] = round((time.thread_time() - cpu) * 1000, 2)
+            record['peak_rss_mb'] = peak_rss_mb()
+            with self._lock:
+                self.groups.setdefault(group, {})[name] = record
+            if self.listener:
+                self.listener('finished', group, name, record)
+
+    def as_dict(self):
+        with self._lock:
+            result = {'total_ms': round((time.perf_counter() - self._start) * 1000, 2)}
+            result.update({group: dict(spans) for group, spans in self.groups.items()})
+            return result
+
+@contextmanager
+def profiled(directory, label):
+    """cProfile the block into `directory`; yields the dump path, or None when disabled
+
+    Python 3.12+ allows one active profiler per process, so a run that
+    overlaps a profiled one is not profiled.
+    """
+    if not directory:
+        yield None
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        yield None
+        return
+    path = os.path.join(directory, f"report-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{label}.pstats")
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(path)
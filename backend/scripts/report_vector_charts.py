@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Library Management System - Vector report charts
+Draws the report charts as native reportlab drawings, embedded in the PDF as
+vector graphics instead of 300 dpi PNGs
+"""
+
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.barcharts import HorizontalBarChart, VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.widgets.markers import makeMarker
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+
+# Same footprint as the raster charts in generate_pdf_with_reportlab
+WIDTH = 6 * inch
+HEIGHT = 3.6 * inch
+
+def _drawing(title):
+    drawing = Drawing(WIDTH, HEIGHT)
+    drawing.add(String(WIDTH / 2, HEIGHT - 14, title, fontName='Helvetica-Bold',
+                       fontSize=12, textAnchor='middle'))
+    return drawing
+
+def _axis_title(drawing, x, y, text, angle=0):
+    label = String(0, 0, text, fontName='Helvetica', fontSize=9, textAnchor='middle')
+    if angle:
+        group = Group(label)
+        group.translate(x, y)
+        group.rotate(angle)
+        drawing.add(group)
+    else:
+        label.x, label.y = x, y
+        drawing.add(label)
+
+def loans_by_month_chart(rows, period='Last 12 Months'):
+    months = [row['month'] for row in rows]
+    counts = [int(row['count']) for row in rows]
+
+    drawing = _drawing(f'Loans by Month ({period})')
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 55, 60
+    chart.width, chart.height = WIDTH - 75, HEIGHT - 95
+    chart.data = [counts]
+    chart.joinedLines = 1
+    chart.lines[0].strokeColor = colors.HexColor('#1f77b4')
+    chart.lines[0].strokeWidth = 2
+    chart.lines[0].symbol = makeMarker('FilledCircle')
+    chart.lines[0].symbol.fillColor = colors.HexColor('#1f77b4')
+    chart.lines[0].symbol.size = 5
+    chart.categoryAxis.categoryNames = months
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.visibleGrid = 1
+    chart.valueAxis.gridStrokeColor = colors.Color(0, 0, 0, alpha=0.15)
+    drawing.add(chart)
+    _axis_title(drawing, chart.x + chart.width / 2, 6, 'Month')
+    _axis_title(drawing, 14, chart.y + chart.height / 2, 'Number of Loans', angle=90)
+    return drawing
+
+def _barh_chart(title, names, counts, color, value_title, category_title):
+    drawing = _drawing(title)
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 150, 35
+    chart.width, chart.height = WIDTH - 170, HEIGHT - 65
+    chart.data = [counts]
+    chart.bars[0].fillColor = colors.HexColor(color)
+    chart.bars[0].strokeColor = None
+    chart.categoryAxis.categoryNames = names
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.boxAnchor = 'e'
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 8
+    drawing.add(chart)
+    _axis_title(drawing, chart.x + chart.width / 2, 6, value_title)
+    _axis_title(drawing, 10, chart.y + chart.height / 2, category_title, angle=90)
+    return drawing
+
+def books_by_category_chart(rows):
+    return _barh_chart(
+        'Books by Category (Top 10)',
+        [row['category'][:20] for row in rows],  # Truncate long names
+        [int(row['count']) for row in rows],
+        '#4682b4', 'Number of Books', 'Category'
+    )
+
+def most_borrowed_chart(rows):
+    return _barh_chart(
+        'Most Borrowed Books (Top 10)',
+        [row['title'][:30] + '...' if len(row['title']) > 30 else row['title'] for row in rows],
+        [int(row['borrow_count']) for row in rows],
+        '#006400', 'Number of Borrows', 'Book Title'
+    )
+
+def _bar_chart(title, names, series, bar_colors, value_title, category_title):
+    drawing = _drawing(title)
+    chart = VerticalBarChart()
+    chart.x, chart.y = 55, 45
+    chart.width, chart.height = WIDTH - 75, HEIGHT - 80
+    chart.data = series
+    chart.barSpacing = 1
+    for i, color in enumerate(bar_colors):
+        chart.bars[i].fillColor = colors.HexColor(color)
+        chart.bars[i].strokeColor = None
+    chart.categoryAxis.categoryNames = names
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = 7
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 8
+    chart.valueAxis.visibleGrid = 1
+    chart.valueAxis.gridStrokeColor = colors.Color(0, 0, 0, alpha=0.15)
+    drawing.add(chart)
+    _axis_title(drawing, chart.x + chart.width / 2, 6, category_title)
+    _axis_title(drawing, 14, chart.y + chart.height / 2, value_title, angle=90)
+    return drawing
+
+def histogram_chart(title, rows, color, category_title):
+    return _bar_chart(title, [row['label'] for row in rows], [[int(row['count']) for row in rows]],
+                      [color], 'Number of Loans', category_title)
+
+def weekday_load_chart(rows):
+    drawing = _bar_chart(
+        'Desk Load by Weekday',
+        [row['day'] for row in rows],
+        [[int(row['loans']) for row in rows], [int(row['returns']) for row in rows]],
+        ['#3498db', '#2ecc71'], 'Number of Loans', 'Weekday'
+    )
+    legend = Legend()
+    legend.x, legend.y = WIDTH - 80, HEIGHT - 24
+    legend.fontName = 'Helvetica'
+    legend.fontSize = 8
+    legend.colorNamePairs = [(colors.HexColor('#3498db'), 'Loans'), (colors.HexColor('#2ecc71'), 'Returns')]
+    drawing.add(legend)
+    return drawing
+
+def loan_status_chart(sizes):
+    labels = ['Active', 'Returned', 'Overdue']
+    slice_colors = ['#3498db', '#2ecc71', '#e74c3c']
+    popouts = [5, 0, 10]
+    total = sum(sizes)
+
+    drawing = _drawing('Loan Status Distribution')
+    pie = Pie()
+    pie.width = pie.height = HEIGHT - 100
+    pie.x = (WIDTH - pie.width) / 2
+    pie.y = 30
+    pie.data = [int(size) for size in sizes]
+    pie.labels = [f"{label} {100.0 * size / total:.1f}%" for label, size in zip(labels, sizes)]
+    pie.startAngle = 90
+    pie.direction = 'anticlockwise'
+    pie.slices.strokeColor = colors.white
+    pie.slices.fontName = 'Helvetica'
+    pie.slices.fontSize = 9
+    for i, color in enumerate(slice_colors):
+        pie.slices[i].fillColor = colors.HexColor(color)
+        pie.slices[i].popout = popouts[i]
+    drawing.add(pie)
+    return drawing
+
+def build_vector_charts(stats):
+    """Return the report charts as a list of (chart name, Drawing)
+
+    Names match the raster files so captions and ordering stay the same.
+    """
+    charts = []
+    if stats['loans_by_month']:
+        charts.append(('loans_by_month.png', loans_by_month_chart(
+            stats['loans_by_month'], stats.get('period', 'Last 12 Months'))))
+    if stats['books_by_category']:
+        charts.append(('books_by_category.png', books_by_category_chart(stats['books_by_category'])))
+    if stats['most_borrowed']:
+        charts.append(('most_borrowed.png', most_borrowed_chart(stats['most_borrowed'])))
+    sizes = [stats['active_loans'], stats['returned_loans'], stats['overdue_loans']]
+    if sum(sizes):
+        charts.append(('loan_status.png', loan_status_chart(sizes)))
+    analytics = stats.get('loan_analytics')
+    if analytics and analytics['time_to_return']['returned']:
+        charts.append(('loan_durations.png', histogram_chart(
+            'Time to Return', analytics['loan_durations'], '#4682b4', 'Days on Loan')))
+    if analytics and any(row['count'] for row in analytics['overdue_aging']):
+        charts.append(('overdue_aging.png', histogram_chart(
+            'Overdue Aging', analytics['overdue_aging'], '#e74c3c', 'Days Past Due')))
+    if analytics and analytics['loans']:
+        charts.append(('weekday_load.png', weekday_load_chart(analytics['weekday_load'])))
+    return charts
@@ -11,6 +11,7 @@ const staffRoutes = require('./routes/staffRoutes');
 const adminRoutes = require('./routes/adminRoutes');
 const reviewRoutes = require('./routes/reviewRoutes');
 const profileRoutes = require('./routes/profileRoutes');
+const batchJobService = require('./services/batchJobService');
 
 const app = express();
 const PORT = process.env.PORT || 5000;
@@ -78,5 +79,6 @@ app.use((err, req, res, next) => {
 
 app.listen(PORT, () => {
   console.log(`Server running on http://localhost:${PORT}`);
+  batchJobService.startScheduler();
 });
 
@@ -0,0 +1,123 @@
+const { spawn } = require('child_process');
+const path = require('path');
+
+// Library-wide maintenance jobs run as Python batch scripts on a timer,
+// instead of inside user-facing requests. Each script prints one JSON line
+// with its results on stdout.
+const SCRIPTS_DIR = path.join(__dirname, '../scripts');
+
+const JOBS = {
+  overdueFines: {
+    script: 'overdue_fines.py',
+    intervalMinutes: parseFloat(process.env.FINE_JOB_INTERVAL_MINUTES || '60')
+  },
+  expireHolds: {
+    script: 'expire_holds.py',
+    intervalMinutes: parseFloat(process.env.HOLD_EXPIRY_INTERVAL_MINUTES || '15')
+  },
+  searchIndex: {
+    script: 'build_search_index.py',
+    intervalMinutes: parseFloat(process.env.SEARCH_INDEX_INTERVAL_MINUTES || '5')
+  },
+  recommendations: {
+    script: 'build_recommendations.py',
+    intervalMinutes: parseFloat(process.env.RECOMMENDATION_INTERVAL_MINUTES || '60')
+  },
+  statsSnapshot: {
+    script: 'publish_stats.py',
+    intervalMinutes: parseFloat(process.env.STATS_SNAPSHOT_INTERVAL_MINUTES || '5')
+  }
+};
+
+const running = new Set();
+
+const runScript = (script, args = []) => {
+  return new Promise((resolve, reject) => {
+    const isWindows = process.platform === 'win32';
+    const scriptPath = path.join(SCRIPTS_DIR, script);
+    let command, commandArgs;
+
+    if (isWindows) {
+      command = `py -3.13 "${scriptPath}" ${args.join(' ')}`;
+      commandArgs = [];
+    } else {
+      command = 'python3';
+      commandArgs = [scriptPath, ...args];
+    }
+
+    const child = spawn(command, commandArgs, {
+      env: {
+        ...process.env,
+        DB_HOST: process.env.DB_HOST || 'localhost',
+        DB_USER: process.env.DB_USER || 'root',
+        DB_PASSWORD: process.env.DB_PASSWORD || 'root',
+        DB_NAME: process.env.DB_NAME || 'library_system'
+      },
+      shell: isWindows // Use shell on Windows for better compatibility
+    });
+
+    let stdout = '';
+    let stderr = '';
+    child.stdout.on('data', (data) => {
+      stdout += data.toString();
+    });
+    child.stderr.on('data', (data) => {
+      stderr += data.toString();
+    });
+
+    child.on('error', (error) => {
+      reject(new Error(`Failed to start ${script}: ${error.message}`));
+    });
+
+    child.on('close', (code) => {
+      const lines = stdout.trim().split('\n');
+      let result = null;
+      try {
+        result = JSON.parse(lines[lines.length - 1]);
+      } catch (error) {
+        // Fall through to the exit code / stderr below
+      }
+      if (code === 0 && result && result.success) {
+        resolve(result);
+      } else {
+        reject(new Error((result && result.error) || stderr.trim() || `${script} exited with code ${code}`));
+      }
+    });
+  });
+};
+
+// Run a job now unless a previous run of it is still going
+exports.runJob = async (name, args = []) => {
+  if (running.has(name)) {
+    return null;
+  }
+  running.add(name);
+  try {
+    return await runScript(JOBS[name].script, args);
+  } finally {
+    running.delete(name);
+  }
+};
+
+// Run every job once at startup and then on its interval; an interval of 0
+// disables the timer (e.g. when the scripts are run from cron instead)
+exports.startScheduler = () => {
+  for (const [name, job] of Object.entries(JOBS)) {
+    if (!(job.intervalMinutes > 0)) {
+      continue;
+    }
+    const run = () => {
+      exports.runJob(name)
+        .then((result) => {
+          if (result) {
+            console.log(`Batch job ${name}:`, JSON.stringify(result));
+          }
+        })
+        .catch((error) => {
+          console.error(`Batch job ${name} failed:`, error.message);
+        });
+    };
+    run();
+    setInterval(run, job.intervalMinutes * 60 * 1000).unref();
+  }
+};
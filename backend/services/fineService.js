@@ -32,69 +32,6 @@ const calculateDaysOverdue = (dueDate) => {
   return diffDays;
 };
 
-// Check and create fines for overdue loans
-exports.checkAndCreateOverdueFines = async () => {
-  try {
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-
-    // Find all active overdue loans without existing pending fines
-    const [overdueLoans] = await pool.execute(
-      `SELECT l.*, b.title as book_title
-       FROM loans l
-       JOIN books b ON l.book_id = b.id
-       WHERE l.status = 'active'
-       AND l.due_date < ?
-       AND NOT EXISTS (
-         SELECT 1 FROM fines f
-         WHERE f.loan_id = l.id
-         AND f.status = 'pending'
-         AND f.type = 'overdue'
-       )`,
-      [today]
-    );
-
-    const finesCreated = [];
-
-    for (const loan of overdueLoans) {
-      const daysOverdue = calculateDaysOverdue(loan.due_date);
-      const fineAmount = await calculateFineAmount(daysOverdue);
-
-      if (fineAmount > 0) {
-        const [result] = await pool.execute(
-          `INSERT INTO fines (user_id, loan_id, amount, type, status, description)
-           VALUES (?, ?, ?, 'overdue', 'pending', ?)`,
-          [
-            loan.user_id,
-            loan.id,
-            fineAmount,
-            `Overdue fine for "${loan.book_title}". ${daysOverdue} day(s) overdue.`
-          ]
-        );
-
-        // Update loan status to overdue if not already
-        await pool.execute(
-          'UPDATE loans SET status = ? WHERE id = ? AND status != ?',
-          ['overdue', loan.id, 'overdue']
-        );
-
-        finesCreated.push({
-          id: result.insertId,
-          loan_id: loan.id,
-          user_id: loan.user_id,
-          amount: fineAmount,
-          daysOverdue
-        });
-      }
-    }
-
-    return finesCreated;
-  } catch (error) {
-    console.error('Error checking overdue fines:', error);
-    throw error;
-  }
-};
-
 // Calculate fine for a specific loan
 exports.calculateLoanFine = async (loan) => {
   if (loan.status === 'returned') {
@@ -127,7 +64,6 @@ exports.getUserTotalPendingFines = async (userId) => {
 module.exports = {
   calculateFineAmount: async (daysOverdue) => await calculateFineAmount(daysOverdue),
   calculateDaysOverdue,
-  checkAndCreateOverdueFines: exports.checkAndCreateOverdueFines,
   calculateLoanFine: exports.calculateLoanFine,
   getUserTotalPendingFines: exports.getUserTotalPendingFines
 };
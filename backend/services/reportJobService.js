@@ -0,0 +1,146 @@
+const crypto = require('crypto');
+const reportWorkerService = require('./reportWorkerService');
+
+// Report generation as jobs the client submits and then polls. Requests for
+// the same scope share one job while it runs, and a finished PDF is kept in
+// memory for REPORT_RESULT_TTL_MINUTES so repeats are served without
+// regenerating it. At most REPORT_MAX_RESULTS PDFs are kept; the oldest go
+// first.
+const RESULT_TTL_MS = parseFloat(process.env.REPORT_RESULT_TTL_MINUTES || '10') * 60 * 1000;
+const MAX_RESULTS = parseInt(process.env.REPORT_MAX_RESULTS || '20');
+
+const jobs = new Map(); // job id -> job, kept until it expires
+const jobsByKey = new Map(); // scope key -> queued, running or completed job
+
+const scopeKey = ({ from, to, category, appendix, analytics }) =>
+  JSON.stringify([from || null, to || null, category || null, Boolean(appendix), Boolean(analytics)]);
+
+const collect = (stream) => {
+  return new Promise((resolve, reject) => {
+    const chunks = [];
+    stream.on('data', (chunk) => chunks.push(chunk));
+    stream.on('end', () => resolve(Buffer.concat(chunks)));
+    stream.on('error', reject);
+  });
+};
+
+const forget = (job) => {
+  jobs.delete(job.id);
+  if (jobsByKey.get(job.key) === job) {
+    jobsByKey.delete(job.key);
+  }
+};
+
+// Drop the oldest finished jobs (and their PDFs) beyond MAX_RESULTS
+const evictResults = () => {
+  const finished = [...jobs.values()].filter((job) => job.pdf);
+  for (const job of finished.slice(0, Math.max(0, finished.length - MAX_RESULTS))) {
+    forget(job);
+  }
+};
+
+const finish = (job, status, fields) => {
+  Object.assign(job, fields, { status, finishedAt: new Date() });
+  job.expiresAt = new Date(job.finishedAt.getTime() + RESULT_TTL_MS);
+  if (status !== 'completed' && jobsByKey.get(job.key) === job) {
+    // A failed job is only kept for polling; the next request retries
+    jobsByKey.delete(job.key);
+  }
+  setTimeout(() => forget(job), RESULT_TTL_MS).unref();
+  evictResults();
+};
+
+const run = async (job) => {
+  const onProgress = (event) => {
+    job.status = 'running';
+    job.stage = event.stage;
+    job.step = event.step;
+    job.steps = event.steps;
+    if (event.state === 'finished') {
+      job.completedSteps = event.step;
+    }
+  };
+  try {
+    const { stream } = await reportWorkerService.streamReport({
+      date_from: job.scope.from || null,
+      date_to: job.scope.to || null,
+      category: job.scope.category || null,
+      appendix: job.scope.appendix,
+      analytics: job.scope.analytics
+    }, onProgress);
+    const pdf = await collect(stream);
+    finish(job, 'completed', { pdf, stage: null });
+  } catch (error) {
+    console.error(`Report job ${job.id} failed:`, error.message);
+    finish(job, 'failed', { error: error.message });
+  }
+};
+
+// Public view of a job (everything but the PDF bytes)
+const describe = (job) => ({
+  id: job.id,
+  status: job.status,
+  scope: job.scope,
+  stage: job.stage,
+  progress: job.steps ? Math.round((job.completedSteps / job.steps) * 100) : 0,
+  createdAt: job.createdAt,
+  finishedAt: job.finishedAt || null,
+  expiresAt: job.expiresAt || null,
+  size: job.pdf ? job.pdf.length : null,
+  error: job.error || null
+});
+
+// Start a report for { from, to, category, appendix, analytics }, or join the queued/running job
+// or reuse the unexpired result for the same scope. Returns { job, reused }.
+exports.submit = (scope) => {
+  const key = scopeKey(scope);
+  const existing = jobsByKey.get(key);
+  if (existing) {
+    return { job: describe(existing), reused: true };
+  }
+
+  const job = {
+    id: crypto.randomUUID(),
+    key,
+    scope: {
+      from: scope.from || null,
+      to: scope.to || null,
+      category: scope.category || null,
+      appendix: Boolean(scope.appendix),
+      analytics: Boolean(scope.analytics)
+    },
+    status: 'queued',
+    stage: null,
+    step: 0,
+    steps: 0,
+    completedSteps: 0,
+    createdAt: new Date()
+  };
+  jobs.set(job.id, job);
+  jobsByKey.set(key, job);
+  job.done = run(job);
+  return { job: describe(job), reused: false };
+};
+
+// Job status by id, or null if unknown or expired
+exports.getJob = (id) => {
+  const job = jobs.get(id);
+  return job ? describe(job) : null;
+};
+
+// The finished PDF of a job as { pdf, createdAt }, or null if not available
+exports.getResult = (id) => {
+  const job = jobs.get(id);
+  return job && job.pdf ? { pdf: job.pdf, createdAt: job.createdAt } : null;
+};
+
+// Resolves once the job has finished, with { job, pdf } (pdf is null if
+// it failed), or null if the job is unknown
+exports.wait = async (id) => {
+  const job = jobs.get(id);
+  if (!job) {
+    return null;
+  }
+  await job.done;
+  return { job: describe(job), pdf: job.pdf || null };
+};
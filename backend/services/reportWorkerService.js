@@ -0,0 +1,203 @@
+const { spawn } = require('child_process');
+const path = require('path');
+const { PassThrough } = require('stream');
+
+// Long-lived `generate_report.py --serve` process. Jobs are sent as JSON
+// lines on its stdin and answered (by id) as JSON lines on its stdout, so
+// Python startup, imports and the DB connection are paid once. Streamed
+// jobs are answered with a JSON line carrying `length`, followed by that
+// many raw PDF bytes. Jobs submitted with a progress callback also get
+// {"id", "event": "progress", "stage", "state"} lines before their answer.
+const SCRIPT_PATH = path.join(__dirname, '../scripts/generate_report.py');
+const MAX_CONCURRENT = parseInt(process.env.REPORT_MAX_CONCURRENT || '2');
+// Optional directory for per-report cProfile dumps
+const PROFILE_DIR = process.env.REPORT_PROFILE_DIR;
+// reportlab (default) or latex
+const PDF_BACKEND = process.env.REPORT_PDF_BACKEND;
+
+let worker = null;
+let nextJobId = 1;
+const pendingJobs = new Map();
+
+// One-line summary of a job's stage timings, slowest queries first
+const formatTimings = (timings) => {
+  const stages = Object.entries(timings.stages || {})
+    .map(([name, span]) => `${name} ${Math.round(span.wall_ms)}ms`);
+  const queries = Object.entries(timings.queries || {})
+    .sort((a, b) => b[1].wall_ms - a[1].wall_ms)
+    .slice(0, 3)
+    .map(([name, span]) => `${name} ${Math.round(span.wall_ms)}ms/${span.rows} rows`);
+  return `${Math.round(timings.total_ms)}ms total; ${stages.join(', ')}; slowest queries: ${queries.join(', ')}`;
+};
+
+const startWorker = () => {
+  const isWindows = process.platform === 'win32';
+  let command, args;
+
+  if (isWindows) {
+    command = `py -3.13 "${SCRIPT_PATH}" --serve --max-concurrent ${MAX_CONCURRENT}`;
+    if (PROFILE_DIR) {
+      command += ` --profile "${PROFILE_DIR}"`;
+    }
+    if (PDF_BACKEND) {
+      command += ` --pdf-backend ${PDF_BACKEND}`;
+    }
+    args = [];
+  } else {
+    command = 'python3';
+    args = [SCRIPT_PATH, '--serve', '--max-concurrent', String(MAX_CONCURRENT)];
+    if (PROFILE_DIR) {
+      args.push('--profile', PROFILE_DIR);
+    }
+    if (PDF_BACKEND) {
+      args.push('--pdf-backend', PDF_BACKEND);
+    }
+  }
+
+  const child = spawn(command, args, {
+    env: {
+      ...process.env,
+      DB_HOST: process.env.DB_HOST || 'localhost',
+      DB_USER: process.env.DB_USER || 'root',
+      DB_PASSWORD: process.env.DB_PASSWORD || 'root',
+      DB_NAME: process.env.DB_NAME || 'library_system'
+    },
+    shell: isWindows // Use shell on Windows for better compatibility
+  });
+
+  let buffered = Buffer.alloc(0);
+  let body = null; // { stream, remaining } while PDF bytes are arriving
+
+  const handleMessage = (line) => {
+    let message;
+    try {
+      message = JSON.parse(line);
+    } catch (error) {
+      console.error('Report worker sent invalid output:', line);
+      return;
+    }
+
+    if (message.timings) {
+      console.log(`Report job ${message.id}: ${formatTimings(message.timings)}`);
+      if (message.profile) {
+        console.log(`Report job ${message.id} profile: ${message.profile}`);
+      }
+    }
+
+    const job = pendingJobs.get(message.id);
+    if (message.event === 'progress') {
+      if (job && job.onProgress) {
+        job.onProgress(message);
+      }
+      return;
+    }
+    if (message.length !== undefined) {
+      // Forward the payload even if nobody waits for it, to stay in frame
+      const stream = new PassThrough();
+      body = { stream, remaining: message.length };
+      if (body.remaining === 0) {
+        stream.end();
+        body = null;
+      }
+      message.stream = stream;
+    }
+    if (!job) {
+      return;
+    }
+    pendingJobs.delete(message.id);
+
+    if (message.success) {
+      job.resolve(message);
+    } else {
+      job.reject(new Error(message.error || 'Failed to generate report'));
+    }
+  };
+
+  child.stdout.on('data', (chunk) => {
+    buffered = Buffer.concat([buffered, chunk]);
+    while (buffered.length > 0) {
+      if (body) {
+        const part = buffered.subarray(0, body.remaining);
+        buffered = buffered.subarray(part.length);
+        body.remaining -= part.length;
+        body.stream.write(part);
+        if (body.remaining === 0) {
+          body.stream.end();
+          body = null;
+        }
+        continue;
+      }
+
+      const newline = buffered.indexOf(0x0a);
+      if (newline === -1) {
+        break;
+      }
+      const line = buffered.subarray(0, newline).toString('utf8');
+      buffered = buffered.subarray(newline + 1);
+      if (line.trim()) {
+        handleMessage(line);
+      }
+    }
+  });
+
+  child.stderr.on('data', (data) => {
+    process.stderr.write(`[report-worker] ${data}`);
+  });
+
+  const failPending = (reason) => {
+    if (worker === child) {
+      worker = null;
+    }
+    if (body) {
+      body.stream.destroy(new Error(reason));
+      body = null;
+    }
+    for (const job of pendingJobs.values()) {
+      job.reject(new Error(reason));
+    }
+    pendingJobs.clear();
+  };
+
+  child.on('error', (error) => {
+    console.error('Failed to start report worker:', error);
+    failPending('Failed to start report generation. Make sure Python 3 is installed.');
+  });
+
+  child.on('exit', (code) => {
+    failPending(`Report worker exited with code ${code}`);
+  });
+
+  return child;
+};
+
+const submitJob = (job, onProgress) => {
+  return new Promise((resolve, reject) => {
+    if (!worker) {
+      worker = startWorker();
+    }
+
+    const id = String(nextJobId++);
+    pendingJobs.set(id, { resolve, reject, onProgress });
+    worker.stdin.write(JSON.stringify({ id, ...job, progress: Boolean(onProgress) }) + '\n');
+  });
+};
+
+// Queue a report job; resolves with { pdf_path } once the PDF is written
+exports.generateReport = (outputDir, options = {}) => {
+  return submitJob({ output_dir: outputDir, ...options });
+};
+
+// Queue an in-memory report job; resolves with { length, stream } as soon
+// as the PDF is ready, where `stream` yields its bytes without a temp file.
+// `onProgress`, if given, is called with each stage progress event.
+exports.streamReport = (options = {}, onProgress) => {
+  return submitJob({ stream: true, ...options }, onProgress);
+};
+
+// Close the worker's stdin; it finishes running jobs and exits
+exports.stopWorker = () => {
+  if (worker) {
+    worker.stdin.end();
+    worker = null;
+  }
+};
@@ -129,25 +129,360 @@ function generateFuzzySearchPatterns(searchTerm) {
   return patterns.slice(0, 8);
 }
 
+// search index - built by scripts/build_search_index.py (trigram + soundex
+// terms per book), so fuzzy search is an index probe instead of a table scan
+const SEARCH_INDEX_CHECK_MS = 30 * 1000;
+// candidates taken from each probe, best matches first - broader queries are
+// cut off here, so their total is only a lower bound (totalCapped)
+const MAX_CANDIDATES = 500;
+let searchIndexState = { checkedAt: 0, indexedUntil: null };
+
+// when was the index last refreshed (null = never built, use the LIKE search)
+async function getIndexedUntil() {
+  const now = Date.now();
+  if (now - searchIndexState.checkedAt < SEARCH_INDEX_CHECK_MS) {
+    return searchIndexState.indexedUntil;
+  }
+
+  let indexedUntil = null;
+  try {
+    const [rows] = await pool.execute(
+      "SELECT value FROM search_index_state WHERE name = 'indexed_until'"
+    );
+    indexedUntil = rows.length > 0 ? rows[0].value : null;
+  } catch (error) {
+    // table doesnt exist until the builder ran once
+    if (error.code !== 'ER_NO_SUCH_TABLE') {
+      throw error;
+    }
+  }
+  searchIndexState = { checkedAt: now, indexedUntil };
+  return indexedUntil;
+}
+
+// lowercase ascii words - has to match words() in build_search_index.py
+function normalizeWords(text) {
+  return (text || '')
+    .toLowerCase()
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim()
+    .split(' ')
+    .filter(word => word.length > 0);
+}
+
+// the index only holds latin letters and digits (accents stripped), so a query
+// with letters from other scripts (arabic titles etc) goes through the LIKE
+// search instead - otherwise those words would just be dropped
+function isIndexable(text) {
+  const folded = (text || '')
+    .toLowerCase()
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .replace(/[a-z0-9]+/g, '');
+  return normalizeWords(text).length > 0 && !/[\p{L}\p{N}]/u.test(folded);
+}
+
+// trigrams padded like the index: two spaces before, one after
+function trigrams(word) {
+  const padded = `  ${word} `;
+  const grams = new Set();
+  for (let i = 0; i < padded.length - 2; i++) {
+    grams.add(padded.substring(i, i + 3));
+  }
+  return grams;
+}
+
+// american soundex, same as the python one (not mysql's SOUNDEX which isnt capped at 4)
+const soundexCodes = {
+  b: '1', f: '1', p: '1', v: '1',
+  c: '2', g: '2', j: '2', k: '2', q: '2', s: '2', x: '2', z: '2',
+  d: '3', t: '3', l: '4', m: '5', n: '5', r: '6'
+};
+
+function soundex(word) {
+  if (!word || !/[a-z]/.test(word[0])) {
+    return null;
+  }
+  let code = word[0].toUpperCase();
+  let previous = soundexCodes[word[0]];
+  for (const char of word.substring(1)) {
+    const digit = soundexCodes[char];
+    if (digit && digit !== previous) {
+      code += digit;
+      if (code.length === 4) {
+        break;
+      }
+    }
+    if (char !== 'h' && char !== 'w') {
+      previous = digit;
+    }
+  }
+  return code.padEnd(4, '0');
+}
+
+// index terms for a search term (isbn-looking terms also as one token)
+function searchTerms(searchTerm) {
+  const words = normalizeWords(searchTerm);
+  if (/^[0-9xX\s-]+$/.test(searchTerm) && words.length > 1) {
+    words.push(searchTerm.replace(/[^0-9a-z]/gi, '').toLowerCase());
+  }
+
+  const grams = new Set();
+  const keys = new Set();
+  words.forEach(word => {
+    trigrams(word).forEach(gram => grams.add(gram));
+    if (word.length >= 3) {
+      const key = soundex(word);
+      if (key) keys.add(key);
+    }
+  });
+  // need at least 40% of the trigrams to count as a fuzzy match
+  const minGrams = Math.max(1, Math.ceil(grams.size * 0.4));
+  return { words, grams, keys, minGrams };
+}
+
+// candidate book ids from the index, plus books changed since it was refreshed
+// and description matches (FULLTEXT) - all index lookups, no scan of books
+async function findCandidateIds(searchTerm, terms, indexedUntil) {
+  const ids = new Set();
+  let capped = false;
+
+  const clauses = [];
+  const params = [];
+  if (terms.grams.size > 0) {
+    clauses.push(`(kind = 'trigram' AND term IN (${[...terms.grams].map(() => '?').join(', ')}))`);
+    params.push(...terms.grams);
+  }
+  if (terms.keys.size > 0) {
+    clauses.push(`(kind = 'phonetic' AND term IN (${[...terms.keys].map(() => '?').join(', ')}))`);
+    params.push(...terms.keys);
+  }
+  if (clauses.length > 0) {
+    const [matches] = await pool.execute(
+      `SELECT book_id, SUM(kind = 'trigram') as grams, MAX(kind = 'phonetic') as phonetic
+       FROM book_search_terms
+       WHERE ${clauses.join(' OR ')}
+       GROUP BY book_id
+       HAVING grams >= ? OR phonetic = 1
+       ORDER BY grams DESC, phonetic DESC
+       LIMIT ${MAX_CANDIDATES}`,
+      [...params, terms.minGrams]
+    );
+    matches.forEach(match => ids.add(match.book_id));
+    capped = matches.length === MAX_CANDIDATES;
+  }
+
+  const [described] = await pool.execute(
+    `SELECT id FROM books WHERE MATCH(description) AGAINST(? IN NATURAL LANGUAGE MODE) LIMIT ${MAX_CANDIDATES}`,
+    [searchTerm]
+  );
+  described.forEach(book => ids.add(book.id));
+  capped = capped || described.length === MAX_CANDIDATES;
+
+  // not indexed yet (added/edited after the last refresh) - these still have
+  // to be checked against the terms once the rows are loaded
+  const unchecked = new Set();
+  const [recent] = await pool.execute(
+    'SELECT id FROM books WHERE updated_at >= ?',
+    [indexedUntil]
+  );
+  recent.forEach(book => {
+    if (!ids.has(book.id)) {
+      ids.add(book.id);
+      unchecked.add(book.id);
+    }
+  });
+
+  return { ids: [...ids], unchecked, capped };
+}
+
+// same test the index query does, for books that arent indexed yet
+function matchesTerms(book, terms) {
+  const bookGrams = new Set();
+  const bookKeys = new Set();
+  normalizeWords(`${book.title} ${book.author} ${book.publisher || ''} ${(book.isbn || '').replace(/[^0-9a-z]/gi, '')}`)
+    .forEach(word => {
+      trigrams(word).forEach(gram => bookGrams.add(gram));
+      if (word.length >= 3) bookKeys.add(soundex(word));
+    });
+  const grams = [...terms.grams].filter(gram => bookGrams.has(gram)).length;
+  return grams >= terms.minGrams || [...terms.keys].some(key => bookKeys.has(key));
+}
+
+// score a candidate - levenshtein only runs on the short candidate list
+// tiers match the old ORDER BY: substring 10, fuzzy 5, sounds alike 3, else 1
+function rankCandidate(book, searchTerm, terms) {
+  const lowerTerm = searchTerm.toLowerCase();
+  const title = (book.title || '').toLowerCase();
+  const author = (book.author || '').toLowerCase();
+  if (title.includes(lowerTerm) || author.includes(lowerTerm)) {
+    return { tier: 10, similarity: 100 };
+  }
+
+  const bookWords = normalizeWords(`${book.title} ${book.author} ${book.publisher || ''}`);
+  let similarity = 0;
+  if (terms.words.length > 0 && bookWords.length > 0) {
+    const best = terms.words.map(word =>
+      Math.max(...bookWords.map(bookWord => calculateSimilarity(word, bookWord)))
+    );
+    similarity = best.reduce((sum, value) => sum + value, 0) / best.length;
+  }
+  if (similarity >= 60) {
+    return { tier: 5, similarity };
+  }
+
+  const bookKeys = new Set(bookWords.filter(word => word.length >= 3).map(soundex));
+  if ([...terms.keys].some(key => bookKeys.has(key))) {
+    return { tier: 3, similarity };
+  }
+  return { tier: 1, similarity };
+}
+
+function sortRanked(ranked) {
+  return ranked.sort((a, b) =>
+    b.rank.tier - a.rank.tier ||
+    b.rank.similarity - a.rank.similarity ||
+    (a.book.title || '').localeCompare(b.book.title || '')
+  );
+}
+
+// build the non-text filters (isbn, publisher, year etc)
+function buildFilterConditions(searchParams) {
+  const {
+    isbn,
+    publisher,
+    year,
+    yearFrom,
+    yearTo,
+    bookType,
+    availableOnly,
+    minRating,
+    category,
+    author
+  } = searchParams;
+  const conditions = [];
+  const params = [];
+
+  // ISBN search - remove dashes/spaces and do partial match
+  if (isbn) {
+    // normalize isbn - strip dashes and spaces, make uppercase
+    const normalizedIsbn = isbn.replace(/[-\s]/g, '').toUpperCase();
+    // search with normalized isbn (works with partial matches too)
+    conditions.push('REPLACE(REPLACE(UPPER(isbn), "-", ""), " ", "") LIKE ?');
+    params.push(`%${normalizedIsbn}%`);
+  }
+
+  // publisher search - case insensitive
+  if (publisher) {
+    conditions.push('LOWER(publisher) LIKE ?');
+    params.push(`%${publisher.toLowerCase()}%`);
+  }
+
+  // year filtering
+  if (year) {
+    conditions.push('publication_year = ?');
+    params.push(year);
+  } else {
+    if (yearFrom) {
+      conditions.push('publication_year >= ?');
+      params.push(yearFrom);
+    }
+    if (yearTo) {
+      conditions.push('publication_year <= ?');
+      params.push(yearTo);
+    }
+  }
+
+  // book type filter
+  if (bookType && bookType !== 'all') {
+    if (bookType === 'both') {
+      conditions.push("book_type IN ('both', 'physical', 'electronic')");
+    } else {
+      // parenthesized - the conditions get joined with AND, and a bare OR
+      // would let every 'both' book through whatever the other filters say
+      conditions.push('(book_type = ? OR book_type = ?)');
+      params.push(bookType, 'both');
+    }
+  }
+
+  // only show available books if this is set
+  if (availableOnly === 'true' || availableOnly === true) {
+    conditions.push('available_copies > 0');
+  }
+
+  // category filter
+  if (category) {
+    conditions.push('category = ?');
+    params.push(category);
+  }
+
+  // author filter
+  if (author) {
+    conditions.push('author LIKE ?');
+    params.push(`%${author}%`);
+  }
+
+  // min rating filter
+  if (minRating) {
+    conditions.push('average_rating >= ?');
+    params.push(parseFloat(minRating));
+  }
+
+  return { conditions, params };
+}
+
+// text search through the index - filters are applied to the candidates only
+async function indexedSearch(searchTerm, searchParams, indexedUntil) {
+  const { page = 1, limit = 20 } = searchParams;
+  const terms = searchTerms(searchTerm);
+  const { ids, unchecked, capped } = await findCandidateIds(searchTerm, terms, indexedUntil);
+  const limitNum = parseInt(limit);
+  const offsetNum = (parseInt(page) - 1) * limitNum;
+
+  let ranked = [];
+  if (ids.length > 0) {
+    const filters = buildFilterConditions(searchParams);
+    const conditions = [`id IN (${ids.map(() => '?').join(', ')})`, ...filters.conditions];
+    const [books] = await pool.execute(
+      `SELECT * FROM books WHERE ${conditions.join(' AND ')}`,
+      [...ids, ...filters.params]
+    );
+
+    ranked = sortRanked(books
+      .filter(book => !unchecked.has(book.id) || matchesTerms(book, terms))
+      .map(book => ({ book, rank: rankCandidate(book, searchTerm, terms) })));
+  }
+
+  const total = ranked.length;
+  return {
+    books: ranked.slice(offsetNum, offsetNum + limitNum).map(({ book }) => book),
+    total,
+    page: parseInt(page),
+    limit: limitNum,
+    totalPages: Math.ceil(total / limitNum),
+    totalCapped: capped
+  };
+}
+
 // advanced search - does fulltext and fuzzy matching stuff
 exports.advancedSearch = async (searchParams) => {
   try {
     const {
       query,
-      isbn,
-      publisher,
-      year,
-      yearFrom,
-      yearTo,
-      bookType,
-      availableOnly,
-      minRating,
-      category,
-      author,
       page = 1,
       limit = 20
     } = searchParams;
 
+    // use the precomputed index once its been built
+    if (query && isIndexable(query.trim())) {
+      const indexedUntil = await getIndexedUntil();
+      if (indexedUntil) {
+        return await indexedSearch(query.trim(), searchParams, indexedUntil);
+      }
+    }
+
     const offset = (page - 1) * limit;
     let whereConditions = [];
     const params = [];
@@ -208,68 +543,10 @@ exports.advancedSearch = async (searchParams) => {
       orderBy = 'ORDER BY title ASC';
     }
 
-    // ISBN search - remove dashes/spaces and do partial match
-    if (isbn) {
-      // normalize isbn - strip dashes and spaces, make uppercase
-      const normalizedIsbn = isbn.replace(/[-\s]/g, '').toUpperCase();
-      // search with normalized isbn (works with partial matches too)
-      whereConditions.push('REPLACE(REPLACE(UPPER(isbn), "-", ""), " ", "") LIKE ?');
-      params.push(`%${normalizedIsbn}%`);
-    }
-
-    // publisher search - case insensitive
-    if (publisher) {
-      whereConditions.push('LOWER(publisher) LIKE ?');
-      params.push(`%${publisher.toLowerCase()}%`);
-    }
-
-    // year filtering
-    if (year) {
-      whereConditions.push('publication_year = ?');
-      params.push(year);
-    } else {
-      if (yearFrom) {
-        whereConditions.push('publication_year >= ?');
-        params.push(yearFrom);
-      }
-      if (yearTo) {
-        whereConditions.push('publication_year <= ?');
-        params.push(yearTo);
-      }
-    }
-
-    // book type filter
-    if (bookType && bookType !== 'all') {
-      if (bookType === 'both') {
-        whereConditions.push("book_type IN ('both', 'physical', 'electronic')");
-      } else {
-        whereConditions.push('book_type = ? OR book_type = ?');
-        params.push(bookType, 'both');
-      }
-    }
-
-    // only show available books if this is set
-    if (availableOnly === 'true' || availableOnly === true) {
-      whereConditions.push('available_copies > 0');
-    }
-
-    // category filter
-    if (category) {
-      whereConditions.push('category = ?');
-      params.push(category);
-    }
-
-    // author filter
-    if (author) {
-      whereConditions.push('author LIKE ?');
-      params.push(`%${author}%`);
-    }
-
-    // min rating filter
-    if (minRating) {
-      whereConditions.push('average_rating >= ?');
-      params.push(parseFloat(minRating));
-    }
+    // isbn, publisher, year etc
+    const filters = buildFilterConditions(searchParams);
+    whereConditions.push(...filters.conditions);
+    params.push(...filters.params);
 
     // Build query
     let queryStr = 'SELECT * FROM books';
@@ -338,7 +615,8 @@ exports.advancedSearch = async (searchParams) => {
       total,
       page: parseInt(page),
       limit: parseInt(limit),
-      totalPages: Math.ceil(total / limit)
+      totalPages: Math.ceil(total / limit),
+      totalCapped: false
     };
   } catch (error) {
     console.error('Advanced search error:', error);
@@ -354,13 +632,44 @@ exports.getSearchSuggestions = async (query, limit = 10) => {
     }
 
     const searchTerm = query.trim();
+    const limitNum = parseInt(limit);
+
+    // index probe + ranking when the search index is built
+    const indexedUntil = isIndexable(searchTerm) ? await getIndexedUntil() : null;
+    if (indexedUntil) {
+      const terms = searchTerms(searchTerm);
+      const { ids, unchecked } = await findCandidateIds(searchTerm, terms, indexedUntil);
+      if (ids.length === 0) {
+        return [];
+      }
+      const [books] = await pool.execute(
+        `SELECT id, title, author, isbn, publisher FROM books WHERE id IN (${ids.map(() => '?').join(', ')})`,
+        ids
+      );
+      const seen = new Set();
+      return sortRanked(books
+        .filter(book => !unchecked.has(book.id) || matchesTerms(book, terms))
+        .map(book => ({ book, rank: rankCandidate(book, searchTerm, terms) })))
+        .map(({ book }) => ({
+          title: book.title,
+          author: book.author,
+          isbn: book.isbn,
+          publisher: book.publisher
+        }))
+        .filter(book => {
+          const key = `${book.title}|${book.author}|${book.isbn}|${book.publisher}`;
+          if (seen.has(key)) return false;
+          seen.add(key);
+          return true;
+        })
+        .slice(0, limitNum);
+    }
+
     const searchPattern = `%${searchTerm}%`;
     const mysql = require('mysql2');
     const escapedTerm = mysql.escape(searchTerm);
     const fuzzyPatterns = generateFuzzySearchPatterns(searchTerm);
     
-    const limitNum = parseInt(limit);
-    
     // build query with fuzzy matching (case insensitive)
     let suggestionQuery = `SELECT DISTINCT title, author, isbn, publisher
        FROM books
@@ -0,0 +1,44 @@
+const fs = require('fs/promises');
+const path = require('path');
+
+// Library-wide statistics published by scripts/publish_stats.py as a
+// versioned JSON file (see scripts/report_snapshot.py). The file is parsed
+// again only when it has been replaced, so serving the dashboard KPIs costs
+// one stat() and never touches the database.
+const SNAPSHOT_PATH = process.env.STATS_SNAPSHOT_PATH ||
+  path.join(__dirname, '../scripts/stats_snapshot.json');
+const SCHEMA_VERSION = 1;
+
+let cached = null; // { mtimeMs, snapshot }
+
+// The published snapshot, or null if none has been published yet
+exports.read = async () => {
+  let stat;
+  try {
+    stat = await fs.stat(SNAPSHOT_PATH);
+  } catch (error) {
+    if (error.code === 'ENOENT') {
+      return null;
+    }
+    throw error;
+  }
+
+  if (!cached || cached.mtimeMs !== stat.mtimeMs) {
+    const snapshot = JSON.parse(await fs.readFile(SNAPSHOT_PATH, 'utf8'));
+    if (snapshot.schema_version !== SCHEMA_VERSION) {
+      return null;
+    }
+    cached = { mtimeMs: stat.mtimeMs, snapshot };
+  }
+  return cached.snapshot;
+};
+
+// Dashboard view of a snapshot: the KPIs with their version and staleness
+exports.describe = (snapshot, now = new Date()) => ({
+  kpis: snapshot.kpis,
+  version: snapshot.version,
+  generatedAt: snapshot.generated_at,
+  staleAfter: snapshot.stale_after,
+  ageSeconds: Math.max(0, Math.round((now - new Date(snapshot.generated_at)) / 1000)),
+  stale: now >= new Date(snapshot.stale_after)
+});
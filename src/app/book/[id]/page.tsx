@@ -37,12 +37,24 @@ interface Review {
   is_current_user?: boolean;
 }
 
+interface Recommendation {
+  id: number;
+  title: string;
+  author: string;
+  category?: string;
+  available_copies: number;
+  total_copies: number;
+  average_rating?: number | null;
+  co_borrowers: number;
+}
+
 export default function BookDetailPage() {
   const params = useParams();
   const router = useRouter();
   const { user } = useAuth();
   const [book, setBook] = useState<Book | null>(null);
   const [reviews, setReviews] = useState<Review[]>([]);
+  const [recommendations, setRecommendations] = useState<Recommendation[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [successMessage, setSuccessMessage] = useState('');
@@ -63,6 +75,7 @@ export default function BookDetailPage() {
     if (bookId) {
       fetchBookDetails();
       fetchReviews();
+      fetchRecommendations();
     }
   }, [bookId]);
 
@@ -216,6 +229,18 @@ export default function BookDetailPage() {
     }
   };
 
+  const fetchRecommendations = async () => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/books/${bookId}/recommendations`);
+      if (response.ok) {
+        const data = await response.json();
+        setRecommendations(data.recommendations || []);
+      }
+    } catch (err: any) {
+      console.error('Error fetching recommendations:', err);
+    }
+  };
+
   const fetchReviews = async () => {
     try {
       const token = localStorage.getItem('auth_token');
@@ -550,6 +575,37 @@ export default function BookDetailPage() {
           </div>
         </div>
 
+        {/* Recommendations Section */}
+        {recommendations.length > 0 && (
+          <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-8 mb-8">
+            <h2 className="text-2xl font-bold text-gray-900 mb-6">
+              Patrons who borrowed this also borrowed
+            </h2>
+            <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 gap-4">
+              {recommendations.map((recommendation) => (
+                <Link
+                  key={recommendation.id}
+                  href={`/book/${recommendation.id}`}
+                  className="block p-4 rounded-lg border border-gray-200 hover:border-primary-300 hover:bg-gray-50 transition-colors"
+                >
+                  <p className="font-semibold text-gray-900 line-clamp-2">{recommendation.title}</p>
+                  <p className="text-sm text-gray-600 mb-2">by {recommendation.author}</p>
+                  {recommendation.average_rating && (
+                    <StarRating rating={recommendation.average_rating} size="sm" />
+                  )}
+                  <p className="text-xs text-gray-500 mt-2">
+                    {recommendation.available_copies > 0
+                      ? `${recommendation.available_copies} of ${recommendation.total_copies} available`
+                      : 'All copies on loan'}
+                    {' · '}
+                    {recommendation.co_borrowers} shared {recommendation.co_borrowers === 1 ? 'patron' : 'patrons'}
+                  </p>
+                </Link>
+              ))}
+            </div>
+          </div>
+        )}
+
         {/* Reviews Section */}
         <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-8">
           <div className="flex items-center justify-between mb-6">
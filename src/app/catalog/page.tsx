@@ -31,6 +31,7 @@ interface Pagination {
   limit: number;
   total: number;
   totalPages: number;
+  totalCapped?: boolean; // total is a lower bound (search candidate cap)
 }
 
 export default function CatalogPage() {
@@ -715,7 +716,7 @@ export default function CatalogPage() {
             ) : (
               <>
                 <div className="mb-4 text-sm text-gray-600">
-                  Showing {books.length} of {pagination.total} books
+                  Showing {books.length} of {pagination.total}{pagination.totalCapped ? '+' : ''} books
                 </div>
                 <div className="grid grid-cols-1 sm:grid-cols-2 lg:grid-cols-3 xl:grid-cols-4 gap-6">
                   {books.map((book) => (
@@ -29,6 +29,26 @@ interface Staff {
   role: string;
 }
 
+interface DashboardStats {
+  kpis: {
+    total_books: number;
+    total_copies: number;
+    available_copies: number;
+    total_users: number;
+    total_loans: number;
+    active_loans: number;
+    returned_loans: number;
+    overdue_loans: number;
+    total_fines: number;
+    active_holds: number;
+  };
+  version: number;
+  generatedAt: string;
+  staleAfter: string;
+  ageSeconds: number;
+  stale: boolean;
+}
+
 export default function AdminDashboardPage() {
   const { user, logout } = useAuth();
   const router = useRouter();
@@ -44,6 +64,11 @@ export default function AdminDashboardPage() {
   });
   const [adminHistory, setAdminHistory] = useState<any | null>(null);
   const [generatingReport, setGeneratingReport] = useState(false);
+  const [reportProgress, setReportProgress] = useState('');
+  const [reportAppendix, setReportAppendix] = useState(false);
+  const [reportAnalytics, setReportAnalytics] = useState(false);
+  const [dashboardStats, setDashboardStats] = useState<DashboardStats | null>(null);
+  const [refreshingStats, setRefreshingStats] = useState(false);
   const [books, setBooks] = useState<Book[]>([]);
   const [staff, setStaff] = useState<Staff[]>([]);
   const [users, setUsers] = useState<any[]>([]);
@@ -121,6 +146,43 @@ export default function AdminDashboardPage() {
     }
   };
 
+  // Fetch the published library statistics (KPIs)
+  const fetchDashboardStats = async () => {
+    try {
+      const token = localStorage.getItem('auth_token');
+      const response = await fetch(`${API_BASE_URL}/admin/stats`, {
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      if (response.ok) {
+        setDashboardStats(await response.json());
+      }
+    } catch (err: any) {
+      console.error('Error fetching dashboard stats:', err);
+    }
+  };
+
+  // Publish fresh statistics now
+  const handleRefreshStats = async () => {
+    setRefreshingStats(true);
+    try {
+      const token = localStorage.getItem('auth_token');
+      const response = await fetch(`${API_BASE_URL}/admin/stats/refresh`, {
+        method: 'POST',
+        headers: { 'Authorization': `Bearer ${token}` }
+      });
+      const data = await response.json();
+      if (!response.ok) {
+        throw new Error(data.error || 'Failed to refresh statistics');
+      }
+      setDashboardStats(data);
+    } catch (err: any) {
+      setError(err.message || 'Failed to refresh statistics');
+      setTimeout(() => setError(''), 5000);
+    } finally {
+      setRefreshingStats(false);
+    }
+  };
+
   // Fetch admin history
   const fetchAdminHistory = async () => {
     setLoading(true);
@@ -229,7 +291,7 @@ export default function AdminDashboardPage() {
   useEffect(() => {
     if (user?.role === 'admin') {
       setLoading(true);
-      Promise.all([fetchBooks(), fetchStaff(), fetchUsers(), fetchLoanPolicy()]).finally(() => setLoading(false));
+      Promise.all([fetchBooks(), fetchStaff(), fetchUsers(), fetchLoanPolicy(), fetchDashboardStats()]).finally(() => setLoading(false));
     }
   }, [user]);
 
@@ -304,9 +366,38 @@ export default function AdminDashboardPage() {
 
     try {
       const token = localStorage.getItem('auth_token');
-      const response = await fetch(`${API_BASE_URL}/admin/reports/generate`, {
-        headers: { 'Authorization': `Bearer ${token}` }
+      const headers = { 'Authorization': `Bearer ${token}` };
+
+      // Submit a report job (or join an identical one) and poll until it finishes
+      const params = new URLSearchParams();
+      if (reportAppendix) params.set('appendix', 'true');
+      if (reportAnalytics) params.set('analytics', 'true');
+      const query = params.toString() ? `?${params}` : '';
+      const submitResponse = await fetch(`${API_BASE_URL}/admin/reports/jobs${query}`, {
+        method: 'POST',
+        headers
       });
+      const submitData = await submitResponse.json();
+      if (!submitResponse.ok) {
+        throw new Error(submitData.error || 'Failed to generate report');
+      }
+
+      let job = submitData.job;
+      while (job.status === 'queued' || job.status === 'running') {
+        setReportProgress(job.status === 'queued' ? 'Queued...' : `${job.progress}%`);
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const pollResponse = await fetch(`${API_BASE_URL}/admin/reports/jobs/${job.id}`, { headers });
+        const pollData = await pollResponse.json();
+        if (!pollResponse.ok) {
+          throw new Error(pollData.error || 'Failed to generate report');
+        }
+        job = pollData.job;
+      }
+      if (job.status !== 'completed') {
+        throw new Error(job.error || 'Failed to generate report');
+      }
+
+      const response = await fetch(`${API_BASE_URL}/admin/reports/jobs/${job.id}/download`, { headers });
 
       if (response.ok) {
         // Get the blob
@@ -334,6 +425,7 @@ export default function AdminDashboardPage() {
       setTimeout(() => setError(''), 5000);
     } finally {
       setGeneratingReport(false);
+      setReportProgress('');
     }
   };
 
@@ -652,6 +744,55 @@ export default function AdminDashboardPage() {
             </div>
           )}
 
+          {/* Library statistics (published snapshot) */}
+          {dashboardStats && (
+            <div className="mb-8">
+              <div className="grid grid-cols-2 md:grid-cols-3 lg:grid-cols-6 gap-4">
+                <div className="bg-white rounded-lg shadow p-4">
+                  <p className="text-sm font-medium text-gray-600">Books</p>
+                  <p className="text-2xl font-bold text-gray-900">{dashboardStats.kpis.total_books}</p>
+                </div>
+                <div className="bg-white rounded-lg shadow p-4">
+                  <p className="text-sm font-medium text-gray-600">Copies Available</p>
+                  <p className="text-2xl font-bold text-gray-900">
+                    {dashboardStats.kpis.available_copies} / {dashboardStats.kpis.total_copies}
+                  </p>
+                </div>
+                <div className="bg-white rounded-lg shadow p-4">
+                  <p className="text-sm font-medium text-gray-600">Active Loans</p>
+                  <p className="text-2xl font-bold text-blue-600">{dashboardStats.kpis.active_loans}</p>
+                </div>
+                <div className="bg-white rounded-lg shadow p-4">
+                  <p className="text-sm font-medium text-gray-600">Overdue Loans</p>
+                  <p className="text-2xl font-bold text-red-600">{dashboardStats.kpis.overdue_loans}</p>
+                </div>
+                <div className="bg-white rounded-lg shadow p-4">
+                  <p className="text-sm font-medium text-gray-600">Pending Fines</p>
+                  <p className="text-2xl font-bold text-yellow-600">{dashboardStats.kpis.total_fines.toFixed(2)} EGP</p>
+                </div>
+                <div className="bg-white rounded-lg shadow p-4">
+                  <p className="text-sm font-medium text-gray-600">Active Holds</p>
+                  <p className="text-2xl font-bold text-gray-900">{dashboardStats.kpis.active_holds}</p>
+                </div>
+              </div>
+              <div className="mt-2 flex items-center gap-3 text-sm text-gray-500">
+                <span>
+                  As of {new Date(dashboardStats.generatedAt).toLocaleString()} (snapshot #{dashboardStats.version})
+                </span>
+                {dashboardStats.stale && (
+                  <span className="px-2 py-0.5 rounded bg-yellow-100 text-yellow-800">Stale</span>
+                )}
+                <button
+                  onClick={handleRefreshStats}
+                  disabled={refreshingStats}
+                  className="text-blue-600 hover:text-blue-800 disabled:text-gray-400"
+                >
+                  {refreshingStats ? 'Refreshing...' : 'Refresh'}
+                </button>
+              </div>
+            </div>
+          )}
+
           {/* Tabs */}
           <div className="border-b border-gray-200 mb-6">
             <nav className="-mb-px flex space-x-8">
@@ -1577,28 +1718,56 @@ export default function AdminDashboardPage() {
                   <h2 className="text-2xl font-semibold text-gray-900">My Admin History</h2>
                   <p className="mt-1 text-sm text-gray-600">Books you've added/edited and users you've edited</p>
                 </div>
-                <button
-                  onClick={handleGenerateReport}
-                  disabled={generatingReport}
-                  className="px-6 py-3 bg-blue-600 text-white font-medium rounded-lg hover:bg-blue-700 disabled:bg-gray-400 disabled:cursor-not-allowed transition-colors flex items-center gap-2"
-                >
-                  {generatingReport ? (
-                    <>
-                      <svg className="animate-spin h-5 w-5" fill="none" viewBox="0 0 24 24">
-                        <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4"></circle>
-                        <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
-                      </svg>
-                      Generating...
-                    </>
-                  ) : (
-                    <>
-                      <svg className="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                        <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M12 10v6m0 0l-3-3m3 3l3-3m2 8H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
-                      </svg>
-                      Generate PDF Report
-                    </>
-                  )}
-                </button>
+                <div className="flex items-center gap-4">
+                  <div className="flex items-center">
+                    <input
+                      type="checkbox"
+                      id="reportAppendix"
+                      checked={reportAppendix}
+                      onChange={(e) => setReportAppendix(e.target.checked)}
+                      disabled={generatingReport}
+                      className="h-4 w-4 text-blue-600 focus:ring-blue-500 border-gray-300 rounded"
+                    />
+                    <label htmlFor="reportAppendix" className="ml-2 text-sm text-gray-700">
+                      Include full catalog appendix
+                    </label>
+                  </div>
+                  <div className="flex items-center">
+                    <input
+                      type="checkbox"
+                      id="reportAnalytics"
+                      checked={reportAnalytics}
+                      onChange={(e) => setReportAnalytics(e.target.checked)}
+                      disabled={generatingReport}
+                      className="h-4 w-4 text-blue-600 focus:ring-blue-500 border-gray-300 rounded"
+                    />
+                    <label htmlFor="reportAnalytics" className="ml-2 text-sm text-gray-700">
+                      Include loan analytics
+                    </label>
+                  </div>
+                  <button
+                    onClick={handleGenerateReport}
+                    disabled={generatingReport}
+                    className="px-6 py-3 bg-blue-600 text-white font-medium rounded-lg hover:bg-blue-700 disabled:bg-gray-400 disabled:cursor-not-allowed transition-colors flex items-center gap-2"
+                  >
+                    {generatingReport ? (
+                      <>
+                        <svg className="animate-spin h-5 w-5" fill="none" viewBox="0 0 24 24">
+                          <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4"></circle>
+                          <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
+                        </svg>
+                        Generating... {reportProgress}
+                      </>
+                    ) : (
+                      <>
+                        <svg className="w-5 h-5" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+                          <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M12 10v6m0 0l-3-3m3 3l3-3m2 8H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
+                        </svg>
+                        Generate PDF Report
+                      </>
+                    )}
+                  </button>
+                </div>
               </div>
 
               {loading ? (